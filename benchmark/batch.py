@@ -0,0 +1,46 @@
+"""Compares compiling and running programs one at a time against compiling them as one batch.
+
+Run with `python -m benchmark.batch [compiler]`. The compiler defaults to clang. Caching is disabled, so every
+run pays for compilation.
+"""
+import shutil
+import sys
+from benchmark import bench_utils
+from compiler.generate import batch, llvm, sandbox
+from compiler.parse import parse
+
+PROGRAMS = [10, 100]
+STATEMENTS = 20
+
+
+def main() -> None:
+    compiler = sys.argv[1] if len(sys.argv) > 1 else sandbox.DEFAULT_COMPILER
+    if shutil.which(compiler) is None:
+        print("{} is not installed".format(compiler))
+        return
+
+    rows = []
+    for count in PROGRAMS:
+        trees = [
+            parse.parse_code(bench_utils.arithmetic_program(STATEMENTS, seed=seed))
+            for seed in range(count)
+        ]
+
+        def run_each() -> None:
+            for tree in trees:
+                sandbox.run(llvm.Llvm("temp.c", tree, True), compiler=compiler)
+
+        def run_batch() -> None:
+            result = sandbox.run(
+                batch.BatchLlvm("batch.c", trees, True), compiler=compiler
+            )
+            assert len(batch.split_output(result.stdout)) == count
+
+        for name, function in [("each", run_each), ("batch", run_batch)]:
+            seconds = bench_utils.best_time(function, 1)
+            rows.append([name, count, seconds, count / seconds])
+    bench_utils.print_table(["mode", "programs", "seconds", "programs/second"], rows)
+
+
+if __name__ == "__main__":
+    main()
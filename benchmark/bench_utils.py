@@ -0,0 +1,40 @@
+"""Helpers shared by the benchmark scripts."""
+import random
+import time
+from typing import Callable
+
+
+def arithmetic_program(statements: int, terms: int = 8, seed: int = 0) -> str:
+    """Returns a program made of statements, each an arithmetic expression with terms integer literals."""
+    rng = random.Random(seed)
+    lines = []
+    for _ in range(statements):
+        expression = str(rng.randint(0, 999))
+        for _ in range(terms - 1):
+            expression += " {} {}".format(rng.choice("+-*/"), rng.randint(1, 999))
+        lines.append("print({});".format(expression))
+    return "\n".join(lines) + "\n"
+
+
+def best_time(function: Callable[[], object], repeat: int = 3) -> float:
+    """Returns the fastest of repeat wall clock timings of function, in seconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def print_table(header: list[str], rows: list[list[object]]) -> None:
+    """Prints rows as a simple left aligned table."""
+    table = [header] + [[format_cell(cell) for cell in row] for row in rows]
+    widths = [max(len(row[i]) for row in table) for i in range(len(header))]
+    for row in table:
+        print("  ".join(cell.ljust(width) for cell, width in zip(row, widths)))
+
+
+def format_cell(cell: object) -> str:
+    if isinstance(cell, float):
+        return "{:.4f}".format(cell)
+    return str(cell)
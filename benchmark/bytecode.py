@@ -0,0 +1,61 @@
+"""Compares evaluating programs with PythonVisitor against compiling them to bytecode and running the stack VM.
+
+Run with `python -m benchmark.bytecode`.
+"""
+from benchmark import bench_utils
+from compiler.generate import bytecode, python_visitor
+from compiler.parse import parse
+
+SIZES = [(2_000, 8), (200, 200)]
+# How many times each program is evaluated in the repeated evaluation rows
+RUNS = 20
+
+
+def main() -> None:
+    rows = []
+    for statements, terms in SIZES:
+        tree = parse.parse_code(bench_utils.arithmetic_program(statements, terms))
+        program = bytecode.compile_node(tree)
+        assert program.run() == python_visitor.PythonVisitor().visit(tree).results
+
+        visitor_seconds = bench_utils.best_time(
+            lambda: python_visitor.PythonVisitor().visit(tree)
+        )
+        compile_seconds = bench_utils.best_time(lambda: bytecode.compile_node(tree))
+        run_seconds = bench_utils.best_time(program.run)
+        rows.extend(
+            [
+                [statements, terms, 1, "PythonVisitor", visitor_seconds, 1.0],
+                [
+                    statements,
+                    terms,
+                    1,
+                    "compile + run",
+                    compile_seconds + run_seconds,
+                    visitor_seconds / (compile_seconds + run_seconds),
+                ],
+                [
+                    statements,
+                    terms,
+                    RUNS,
+                    "PythonVisitor",
+                    RUNS * visitor_seconds,
+                    1.0,
+                ],
+                [
+                    statements,
+                    terms,
+                    RUNS,
+                    "compile once",
+                    compile_seconds + RUNS * run_seconds,
+                    RUNS * visitor_seconds / (compile_seconds + RUNS * run_seconds),
+                ],
+            ]
+        )
+    bench_utils.print_table(
+        ["statements", "terms", "runs", "method", "seconds", "speedup"], rows
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""Measures the throughput of the multi-file driver for different worker counts and chunk sizes.
+
+Run with `python -m benchmark.driver`. Only LLVM is generated, no binaries are compiled.
+"""
+import os
+import tempfile
+from benchmark import bench_utils
+from compiler import driver
+
+FILES = 400
+STATEMENTS = 50
+# (jobs, chunksize)
+SETTINGS = [(1, 1), (2, 1), (4, 1), (4, 16), (None, 1), (None, 16)]
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        sources = []
+        for index in range(FILES):
+            source = os.path.join(directory, "program_{}.c".format(index))
+            with open(source, "w") as file:
+                file.write(bench_utils.arithmetic_program(STATEMENTS, seed=index))
+            sources.append(source)
+
+        rows = []
+        for jobs, chunksize in SETTINGS:
+            report = driver.compile_files(sources, jobs, chunksize)
+            assert not report.failures
+            rows.append(
+                [
+                    jobs or "{} (auto)".format(os.cpu_count()),
+                    chunksize,
+                    report.seconds,
+                    report.files_per_second,
+                    report.lines_per_second,
+                ]
+            )
+    print("{} files of {} lines, {} CPUs".format(FILES, STATEMENTS, os.cpu_count()))
+    bench_utils.print_table(
+        ["jobs", "chunksize", "seconds", "files/second", "lines/second"], rows
+    )
+
+
+if __name__ == "__main__":
+    main()
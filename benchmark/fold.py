@@ -0,0 +1,63 @@
+"""Measures how much constant folding shrinks the generated LLVM and how long clang takes to compile it.
+
+Run with `python -m benchmark.fold`. Compile times are skipped when clang is not installed.
+"""
+import shutil
+import subprocess
+import tempfile
+from benchmark import bench_utils
+from compiler.generate import llvm
+from compiler.optimize import fold
+from compiler.parse import parse
+
+SIZES = [(500, 8), (100, 64)]
+
+
+def compile_time(llvm_code: str) -> float | None:
+    """Returns the time clang takes to compile llvm_code, or None if clang is not installed."""
+    if shutil.which("clang") is None:
+        return None
+    with tempfile.TemporaryDirectory() as directory:
+        command = ["clang", "-x", "ir", "-o", directory + "/a.out", "-"]
+        return bench_utils.best_time(
+            lambda: subprocess.run(command, input=llvm_code.encode(), check=True), 1
+        )
+
+
+def main() -> None:
+    rows = []
+    for statements, terms in SIZES:
+        tree = parse.parse_code(bench_utils.arithmetic_program(statements, terms))
+        folded, removed = fold.fold(tree)
+        seconds = bench_utils.best_time(lambda: fold.fold(tree))
+        for name, root in [("unfolded", tree), ("folded", folded)]:
+            llvm_code = llvm.generate(root)
+            rows.append(
+                [
+                    name,
+                    statements,
+                    terms,
+                    removed if root is folded else 0,
+                    seconds if root is folded else 0.0,
+                    len(llvm_code.splitlines()),
+                    len(llvm_code),
+                    compile_time(llvm_code) or "-",
+                ]
+            )
+    bench_utils.print_table(
+        [
+            "tree",
+            "statements",
+            "terms",
+            "removed",
+            "fold seconds",
+            "ir lines",
+            "ir bytes",
+            "clang seconds",
+        ],
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Compares rebuilding a large program in full against rebuilding it incrementally after a one statement edit.
+
+Run with `python -m benchmark.incremental [statements]`.
+"""
+import sys
+from benchmark import bench_utils
+from compiler.generate import incremental, llvm
+from compiler.parse import parse
+
+STATEMENTS = 100000
+# Each edit replaces the statement in the middle of the program
+EDITS = [
+    ("same registers", "print(1 + 2 + 3 + 4 + 5 + 6 + 7 + 8);"),
+    ("more registers", "print(1 + 2 + 3 + 4 + 5 + 6 + 7 + 8 + 9 + 10);"),
+]
+
+
+def main() -> None:
+    statements = int(sys.argv[1]) if len(sys.argv) > 1 else STATEMENTS
+    lines = bench_utils.arithmetic_program(statements).splitlines()
+    program = "\n".join(lines) + "\n"
+
+    rows = []
+    seconds = bench_utils.best_time(
+        lambda: llvm.generate(parse.parse_code(program), ssa=True), 1
+    )
+    rows.append(["full build", seconds, statements, statements])
+
+    compiler = incremental.IncrementalLlvm(ssa=True)
+    seconds = bench_utils.best_time(lambda: compiler.generate(program), 1)
+    rows.append(
+        ["first incremental build", seconds, compiler.parsed, compiler.renumbered]
+    )
+
+    for name, edit in EDITS:
+        edited = lines[:]
+        edited[statements // 2] = edit
+        edited_program = "\n".join(edited) + "\n"
+        # Alternate between the two versions so every build has an edit to apply
+        versions = iter([edited_program, program] * 3)
+        seconds = bench_utils.best_time(lambda: compiler.generate(next(versions)), 3)
+        compiler.generate(program)
+        llvm_code = compiler.generate(edited_program)
+        rows.append(["edit, " + name, seconds, compiler.parsed, compiler.renumbered])
+        assert llvm_code == llvm.generate(parse.parse_code(edited_program), ssa=True)
+    bench_utils.print_table(["build", "seconds", "parsed", "renumbered"], rows)
+
+
+if __name__ == "__main__":
+    main()
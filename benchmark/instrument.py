@@ -0,0 +1,63 @@
+"""Measures the overhead of instrumentation, both disabled and enabled.
+
+Run with `python -m benchmark.instrument`.
+"""
+import os
+import tempfile
+import timeit
+from benchmark import bench_utils
+from compiler import driver
+from compiler.utils import instrument
+
+CALLS = 1_000_000
+FILES = 200
+STATEMENTS = 50
+
+
+def span_and_count() -> None:
+    with instrument.span("phase"):
+        instrument.count("things")
+
+
+def main() -> None:
+    rows = []
+    for enabled in [False, True]:
+        if enabled:
+            instrument.enable()
+        seconds = min(timeit.repeat(span_and_count, number=CALLS, repeat=3))
+        rows.append(["span and count", enabled, seconds / CALLS * 1e9])
+        instrument.reset()
+    instrument.disable()
+    bench_utils.print_table(["operation", "enabled", "nanoseconds"], rows)
+    print()
+
+    with tempfile.TemporaryDirectory() as directory:
+        sources = []
+        for index in range(FILES):
+            source = os.path.join(directory, "program_{}.c".format(index))
+            with open(source, "w") as file:
+                file.write(bench_utils.arithmetic_program(STATEMENTS, seed=index))
+            sources.append(source)
+
+        rows = []
+        for enabled in [False, True]:
+            if enabled:
+                instrument.enable()
+            seconds = bench_utils.best_time(lambda: driver.compile_files(sources, 1))
+            rows.append(["compile {} files".format(FILES), enabled, seconds])
+        report = instrument.report()
+        instrument.disable()
+        instrument.reset()
+    bench_utils.print_table(["operation", "enabled", "seconds"], rows)
+    print()
+    bench_utils.print_table(
+        ["phase", "calls", "wall seconds", "cpu seconds"],
+        [
+            [name, phase["calls"], phase["wall_seconds"], phase["cpu_seconds"]]
+            for name, phase in report["phases"].items()
+        ],
+    )
+
+
+if __name__ == "__main__":
+    main()
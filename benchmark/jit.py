@@ -0,0 +1,37 @@
+"""Compares the latency of running programs in process with llvmlite against compiling them with clang.
+
+Run with `python -m benchmark.jit [compiler]`. The compiler defaults to clang. Either backend is skipped when it is
+not installed. Caching is disabled for the compiler, and the jit is measured both compiling and reusing modules.
+"""
+import shutil
+import sys
+from benchmark import bench_utils
+from compiler.generate import jit, llvm, sandbox
+from compiler.parse import parse
+
+SIZES = [(10, 8), (200, 8), (1_000, 8)]
+
+
+def main() -> None:
+    compiler = sys.argv[1] if len(sys.argv) > 1 else sandbox.DEFAULT_COMPILER
+    rows = []
+    for statements, terms in SIZES:
+        tree = parse.parse_code(bench_utils.arithmetic_program(statements, terms))
+        llvm_code = llvm.generate(tree, ssa=True)
+        if shutil.which(compiler):
+            seconds = bench_utils.best_time(
+                lambda: sandbox.run(llvm_code, compiler=compiler)
+            )
+            rows.append([compiler, statements, terms, seconds])
+        if jit.available():
+            seconds = bench_utils.best_time(lambda: jit.Jit().run(llvm_code))
+            rows.append(["jit", statements, terms, seconds])
+            engine = jit.Jit()
+            engine.run(llvm_code)
+            seconds = bench_utils.best_time(lambda: engine.run(llvm_code))
+            rows.append(["jit (cached)", statements, terms, seconds])
+    bench_utils.print_table(["backend", "statements", "terms", "seconds"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+"""Measures lexing time against input size.
+
+Run with `python -m benchmark.lex`. Time per byte should stay flat as the input grows.
+"""
+from benchmark import bench_utils
+from compiler.lex import lex
+
+SIZES = [1_000, 4_000, 16_000, 64_000]
+
+
+def main() -> None:
+    rows = []
+    for statements in SIZES:
+        program = bench_utils.arithmetic_program(statements)
+        seconds = bench_utils.best_time(lambda: lex.lex(program))
+        rows.append([statements, len(program), seconds, seconds / len(program) * 1e9])
+    bench_utils.print_table(["statements", "bytes", "seconds", "ns/byte"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Compares the memory use and traversal speed of Node object trees and NodePools.
+
+Run with `python -m benchmark.node_pool`.
+"""
+import gc
+import tracemalloc
+from typing import Callable
+from benchmark import bench_utils
+from compiler.parse import node, parse, pool, visitor
+
+STATEMENTS = 20_000
+
+
+class NodeCounter(visitor.PostOrderVisitor):
+    def __init__(self) -> None:
+        self.count = 0
+
+    def visit_node(self, _: node.Node) -> None:
+        self.count += 1
+
+
+def retained_memory(function: Callable[[], object]) -> int:
+    """Returns the bytes still allocated by the result of function."""
+    gc.collect()
+    tracemalloc.start()
+    result = function()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def main() -> None:
+    program = bench_utils.arithmetic_program(STATEMENTS)
+    tree = parse.parse_code(program)
+    node_pool = pool.from_node(tree)
+    count = len(node_pool)
+
+    tree_size = retained_memory(lambda: parse.parse_code(program))
+    # Build the pool from an existing tree, so only the pool is counted
+    pool_size = retained_memory(lambda: pool.from_node(tree))
+
+    tree_walk = bench_utils.best_time(lambda: NodeCounter().visit(tree))
+    pool_walk = bench_utils.best_time(lambda: sum(1 for _ in node_pool.post_order()))
+    # Children always precede their parents, so a linear scan is a valid post-order traversal
+    pool_scan = bench_utils.best_time(lambda: sum(1 for _ in node_pool.kinds))
+
+    bench_utils.print_table(
+        ["representation", "nodes", "bytes/node", "traversal seconds"],
+        [
+            ["Node objects", count, tree_size / count, tree_walk],
+            ["NodePool.post_order", count, pool_size / count, pool_walk],
+            ["NodePool linear scan", count, pool_size / count, pool_scan],
+        ],
+    )
+    bench_utils.print_table(
+        ["conversion", "seconds"],
+        [
+            ["from_node", bench_utils.best_time(lambda: pool.from_node(tree))],
+            ["to_node", bench_utils.best_time(node_pool.to_node)],
+        ],
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Compares evaluating a program over many bindings with NumPy against a loop over PythonVisitor.
+
+Run with `python -m benchmark.numpy_eval`. The loop is only timed over LOOP_ROWS rows, and its rate is compared
+with NumPy's over each row count.
+"""
+import random
+from benchmark import bench_utils
+from compiler.generate import numpy_visitor, python_visitor
+from compiler.parse import parse
+
+STATEMENTS = 10
+TERMS = 16
+LOOP_ROWS = 1_000
+ROWS = [1_000, 100_000, 1_000_000]
+NAMES = ["x", "y", "z"]
+
+
+def program(seed: int = 0) -> str:
+    """Returns statements made of identifiers and literals, dividing only by positive literals."""
+    rng = random.Random(seed)
+    lines = []
+    for _ in range(STATEMENTS):
+        expression = rng.choice(NAMES)
+        for _ in range(TERMS - 1):
+            operator = rng.choice("+-*/")
+            if operator == "/":
+                operand = str(rng.randint(1, 99))
+            else:
+                operand = rng.choice(NAMES + [str(rng.randint(0, 99))])
+            expression += " {} {}".format(operator, operand)
+        lines.append(expression + ";")
+    return "\n".join(lines)
+
+
+def main() -> None:
+    if not numpy_visitor.available():
+        print("NumPy is not installed")
+        return
+    np = numpy_visitor.numpy()
+    tree = parse.parse_code(program())
+    rng = np.random.default_rng(0)
+    columns = {name: rng.integers(-1000, 1000, max(ROWS)) for name in NAMES}
+
+    def loop() -> None:
+        for row in range(LOOP_ROWS):
+            bindings = {name: int(column[row]) for name, column in columns.items()}
+            python_visitor.PythonVisitor(bindings).visit(tree)
+
+    loop_rate = LOOP_ROWS / bench_utils.best_time(loop, 1)
+    rows = [["PythonVisitor loop", LOOP_ROWS, LOOP_ROWS / loop_rate, loop_rate, 1.0]]
+    for count in ROWS:
+        sliced = {name: column[:count] for name, column in columns.items()}
+        seconds = bench_utils.best_time(lambda: numpy_visitor.evaluate(tree, sliced))
+        rows.append(
+            ["numpy", count, seconds, count / seconds, count / seconds / loop_rate]
+        )
+    bench_utils.print_table(
+        ["method", "rows", "seconds", "rows/second", "speedup"], rows
+    )
+
+
+if __name__ == "__main__":
+    main()
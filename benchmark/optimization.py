@@ -0,0 +1,59 @@
+"""Compares compile time against run time at each optimization level, and for a custom opt pipeline.
+
+Run with `python -m benchmark.optimization [compiler] [opt]`. They default to clang and opt. Caching is disabled,
+so every run pays for compilation.
+"""
+import shutil
+import sys
+from benchmark import bench_utils
+from compiler.generate import llvm, sandbox
+from compiler.parse import parse
+
+STATEMENTS = [1000, 5000]
+# Run at level 2, after the passes
+PIPELINE = "mem2reg,instcombine,simplifycfg"
+REPEAT = 3
+
+
+def main() -> None:
+    compiler = sys.argv[1] if len(sys.argv) > 1 else sandbox.DEFAULT_COMPILER
+    opt = sys.argv[2] if len(sys.argv) > 2 else sandbox.DEFAULT_OPT
+    for program in [compiler, opt]:
+        if shutil.which(program) is None:
+            print("{} is not installed".format(program))
+            return
+
+    rows = []
+    for statements in STATEMENTS:
+        tree = parse.parse_code(bench_utils.arithmetic_program(statements))
+        for ssa in [False, True]:
+            settings = [(level, None) for level in llvm.OPTIMIZATION_LEVELS]
+            settings.append((2, PIPELINE))
+            for optimization, passes in settings:
+                code = llvm.generate(tree, ssa=ssa, optimization=optimization)
+                results = [
+                    sandbox.run(
+                        code,
+                        flags=llvm.optimization_flags(optimization),
+                        compiler=compiler,
+                        passes=passes,
+                        opt=opt,
+                    )
+                    for _ in range(REPEAT)
+                ]
+                rows.append(
+                    [
+                        statements,
+                        ssa,
+                        "-O{}".format(optimization) + (" " + passes if passes else ""),
+                        min(result.compile_seconds for result in results),
+                        min(result.run_seconds for result in results),
+                    ]
+                )
+    bench_utils.print_table(
+        ["statements", "ssa", "optimization", "compile seconds", "run seconds"], rows
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+"""Measures parser throughput on large arithmetic programs.
+
+Run with `python -m benchmark.parse`. Tokens are lexed up front so only parsing is timed.
+"""
+from benchmark import bench_utils
+from compiler.lex import lex
+from compiler.parse import parse
+
+SIZES = [(2_000, 8), (2_000, 64), (200, 1_000)]
+REPEAT = 5
+
+
+def main() -> None:
+    rows = []
+    for statements, terms in SIZES:
+        program = bench_utils.arithmetic_program(statements, terms)
+        token_count = len(lex.lex(program))
+        seconds = min(
+            bench_utils.best_time(lambda: parse.parse(tokens), 1)
+            for tokens in [lex.lex(program) for _ in range(REPEAT)]
+        )
+        rows.append([statements, terms, token_count, seconds, token_count / seconds])
+    bench_utils.print_table(
+        ["statements", "terms", "tokens", "seconds", "tokens/second"], rows
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""Measures the cost of recording source positions while lexing and parsing.
+
+Run with `python -m benchmark.positions`. lex.get_tokens() lexes the same tokens without recording offsets.
+Line and column numbers are only worked out on demand, so the cost of a lookup is reported separately.
+"""
+from collections import deque
+from benchmark import bench_utils
+from compiler.lex import lex
+from compiler.parse import parse
+
+STATEMENTS = 4_000
+REPEAT = 20
+LOOKUPS = 10_000
+
+
+def main() -> None:
+    program = bench_utils.arithmetic_program(STATEMENTS)
+    plain_lex_time = bench_utils.best_time(
+        lambda: deque(lex.get_tokens(program)), REPEAT
+    )
+    lex_time = bench_utils.best_time(lambda: lex.lex(program), REPEAT)
+    parse_time = bench_utils.best_time(lambda: parse.parse(lex.lex(program)), REPEAT)
+
+    tokens = lex.lex(program)
+    step = len(program) // LOOKUPS
+    lookup_time = bench_utils.best_time(
+        lambda: [tokens.line_column(offset) for offset in range(0, len(program), step)]
+    )
+    bench_utils.print_table(
+        ["stage", "seconds"],
+        [
+            ["lex without positions", plain_lex_time],
+            ["lex", lex_time],
+            ["lex + parse", parse_time],
+            ["{} line/column lookups".format(LOOKUPS), lookup_time],
+        ],
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""Compares PythonVisitor, the bytecode VM and CPython compiled code on large arithmetic programs.
+
+Run with `python -m benchmark.python_codegen`. Each backend is timed compiling and running once, and running an
+already compiled program.
+"""
+from benchmark import bench_utils
+from compiler.generate import bytecode, python_codegen, python_visitor
+from compiler.parse import parse
+
+SIZES = [(2_000, 8), (200, 200)]
+
+
+def main() -> None:
+    rows = []
+    for statements, terms in SIZES:
+        tree = parse.parse_code(bench_utils.arithmetic_program(statements, terms))
+        expected = python_visitor.PythonVisitor().visit(tree).results
+        program = bytecode.compile_node(tree)
+        compiled = python_codegen.compile_node(tree)
+        assert program.run() == compiled.run() == expected
+
+        def compile_python() -> None:
+            python_codegen.compile_source.cache_clear()
+            python_codegen.evaluate(tree)
+
+        for name, once, run in [
+            ("PythonVisitor", lambda: python_visitor.PythonVisitor().visit(tree), None),
+            ("bytecode", lambda: bytecode.evaluate(tree), program.run),
+            ("python_codegen", compile_python, compiled.run),
+        ]:
+            rows.append(
+                [
+                    name,
+                    statements,
+                    terms,
+                    bench_utils.best_time(once),
+                    bench_utils.best_time(run) if run else "-",
+                ]
+            )
+    bench_utils.print_table(
+        ["backend", "statements", "terms", "compile + run", "run compiled"], rows
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+"""Times every stage of the pipeline on generated programs of growing size, and fails if any stage got slower.
+
+Run with `python -m benchmark.regression`. Save a baseline on a quiet machine with `--output baseline.json`, then
+compare later runs against it with `--baseline baseline.json`. The exit status is 1 if any stage is slower than its
+baseline by more than --threshold, even after being timed again --retries times. Timings are only comparable on the
+same machine, and a baseline saved with a different --seed or --repeat is refused with exit status 2.
+"""
+import argparse
+import dataclasses
+import gc
+import io
+import json
+import sys
+import time
+from typing import Any, Callable
+
+from benchmark import bench_utils, workload
+from compiler.generate import batch, bytecode, incremental, llvm, numpy_visitor
+from compiler.generate import python_codegen, python_visitor
+from compiler.lex import lex, stream
+from compiler.optimize import fold
+from compiler.parse import parse
+
+SIZES = [100, 1000, 10000]
+REPEAT = 5
+# A stage may be this fraction slower than its baseline before it counts as a regression
+THRESHOLD = 0.25
+# A stage which seems to have regressed is timed again up to this many times, since one slow timing may be noise
+RETRIES = 2
+# Timings shorter than this are mostly noise, so they never count as regressions
+MIN_SECONDS = 0.001
+
+
+@dataclasses.dataclass(frozen=True)
+class Stage:
+    """A stage of the pipeline.
+
+    Attributes:
+        name: The stage, e.g. lex or llvm_ssa.
+        setup: Prepares the input of run from a program. It is called before every timing and is not timed.
+        run: Runs the stage on what setup returned.
+    """
+
+    name: str
+    setup: Callable[[str], Any]
+    run: Callable[[Any], object]
+
+
+@dataclasses.dataclass(frozen=True)
+class Regression:
+    """A stage which got slower than its baseline.
+
+    Attributes:
+        stage: The name of the stage.
+        size: The number of statements in the program it was timed on.
+        baseline: The baseline time, in seconds.
+        seconds: The new time, in seconds.
+    """
+
+    stage: str
+    size: int
+    baseline: float
+    seconds: float
+
+    @property
+    def slowdown(self) -> float:
+        return self.seconds / self.baseline - 1
+
+
+def parsed(program: str) -> Any:
+    return parse.parse_code(program)
+
+
+def compile_python(tree: Any) -> list[int]:
+    python_codegen.compile_source.cache_clear()
+    return python_codegen.evaluate(tree)
+
+
+def lex_stream(program: str) -> list[Any]:
+    return list(stream.TokenStream(io.StringIO(program)))
+
+
+def edited(program: str) -> tuple[incremental.IncrementalLlvm, str]:
+    """Returns a builder which has compiled program, and program with its last statement changed."""
+    builder = incremental.IncrementalLlvm()
+    builder.generate(program)
+    lines = program.splitlines(keepends=True)
+    return builder, "".join(lines[:-1]) + "print(1);\n"
+
+
+STAGES = [
+    Stage("lex", lambda program: program, lex.lex),
+    Stage("lex_buffer", lambda program: program, lex.lex_buffer),
+    Stage("lex_stream", lambda program: program, lex_stream),
+    # Parsing consumes the tokens, so each timing lexes afresh
+    Stage("parse", lex.lex, parse.parse),
+    # Generated programs are all constants, which fold reduces to literals, so backends time the unfolded tree
+    Stage("fold", parsed, fold.fold),
+    Stage(
+        "python_visitor",
+        parsed,
+        lambda tree: python_visitor.PythonVisitor().visit(tree),
+    ),
+    # NumPy is optional, so its visitor is only timed where it is installed
+    *(
+        [
+            Stage(
+                "numpy_visitor",
+                parsed,
+                lambda tree: numpy_visitor.NumpyVisitor({}).visit(tree),
+            )
+        ]
+        if numpy_visitor.available()
+        else []
+    ),
+    Stage("bytecode", parsed, bytecode.evaluate),
+    Stage("python_codegen", parsed, compile_python),
+    Stage("llvm", parsed, lambda tree: llvm.generate(tree)),
+    Stage("llvm_ssa", parsed, lambda tree: llvm.generate(tree, ssa=True)),
+    # Each statement is a program of its own in the batch
+    Stage("batch", parsed, lambda tree: batch.generate(tree.statements)),
+    # An edit to the last statement, so only it is compiled again
+    Stage("incremental", edited, lambda pair: pair[0].generate(pair[1])),
+]
+
+
+def time_stage(stage: Stage, program: str, repeat: int = REPEAT) -> float:
+    """Returns the least CPU time of repeat runs of stage on program, in seconds.
+
+    CPU time is not inflated by other processes, and the garbage collector is paused while timing, so that its
+    pauses are not charged to whichever stage happened to trigger them.
+    """
+    timings = []
+    for _ in range(repeat):
+        argument = stage.setup(program)
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.process_time()
+            stage.run(argument)
+            timings.append(time.process_time() - start)
+        finally:
+            gc.enable()
+    return min(timings)
+
+
+def measure(
+    sizes: list[int], repeat: int = REPEAT, shape: workload.Shape = workload.Shape()
+) -> dict[str, dict[str, float]]:
+    """Times each stage on a program of each size, generated with shape.
+
+    Returns:
+        The CPU seconds each stage took, by stage name and then by size. Sizes are strings, as in JSON.
+    """
+    results: dict[str, dict[str, float]] = {stage.name: {} for stage in STAGES}
+    for size in sizes:
+        program = workload.generate(dataclasses.replace(shape, statements=size))
+        for stage in STAGES:
+            results[stage.name][str(size)] = time_stage(stage, program, repeat)
+    return results
+
+
+def retime(
+    results: dict[str, dict[str, float]],
+    regressions: list[Regression],
+    repeat: int = REPEAT,
+    shape: workload.Shape = workload.Shape(),
+) -> None:
+    """Times each stage and size in regressions again, keeping whichever timing in results is faster."""
+    stages = {stage.name: stage for stage in STAGES}
+    for size in sorted({regression.size for regression in regressions}):
+        program = workload.generate(dataclasses.replace(shape, statements=size))
+        for regression in regressions:
+            if regression.size == size:
+                timings = results[regression.stage]
+                timings[str(size)] = min(
+                    timings[str(size)],
+                    time_stage(stages[regression.stage], program, repeat),
+                )
+
+
+def compare(
+    results: dict[str, dict[str, float]],
+    baseline: dict[str, dict[str, float]],
+    threshold: float = THRESHOLD,
+    min_seconds: float = MIN_SECONDS,
+) -> list[Regression]:
+    """Returns each stage and size which is slower than baseline by more than threshold.
+
+    Stages and sizes missing from baseline are not compared, and neither are timings shorter than min_seconds.
+    """
+    regressions = []
+    for stage, timings in results.items():
+        for size, seconds in timings.items():
+            before = baseline.get(stage, {}).get(size)
+            if before is None or seconds < min_seconds:
+                continue
+            if seconds > before * (1 + threshold):
+                regressions.append(Regression(stage, int(size), before, seconds))
+    return regressions
+
+
+def get_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the timings to this JSON file")
+    parser.add_argument(
+        "--baseline", help="compare against timings saved with --output"
+    )
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    parser.add_argument("--retries", type=int, default=RETRIES)
+    parser.add_argument("--min-seconds", type=float, default=MIN_SECONDS)
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = get_args(argv)
+    shape = workload.Shape(seed=args.seed)
+    results = measure(args.sizes, args.repeat, shape)
+    baseline = {}
+    if args.baseline is not None:
+        with open(args.baseline) as file:
+            saved = json.load(file)
+        # Timings are only comparable on the same programs, timed the same number of times
+        if (saved["seed"], saved["repeat"]) != (args.seed, args.repeat):
+            print(
+                "The baseline was timed with --seed {} --repeat {}, not --seed {} --repeat {}".format(
+                    saved["seed"], saved["repeat"], args.seed, args.repeat
+                ),
+                file=sys.stderr,
+            )
+            return 2
+        baseline = saved["results"]
+    regressions = compare(results, baseline, args.threshold, args.min_seconds)
+    for _ in range(args.retries):
+        if not regressions:
+            break
+        retime(results, regressions, args.repeat, shape)
+        regressions = compare(results, baseline, args.threshold, args.min_seconds)
+
+    rows = []
+    for stage, timings in results.items():
+        for size, seconds in timings.items():
+            before = baseline.get(stage, {}).get(size)
+            rows.append(
+                [
+                    stage,
+                    size,
+                    seconds,
+                    before if before is not None else "-",
+                    "{:+.1%}".format(seconds / before - 1) if before else "-",
+                ]
+            )
+    bench_utils.print_table(
+        ["stage", "statements", "seconds", "baseline", "change"], rows
+    )
+
+    if args.output is not None:
+        with open(args.output, "w") as file:
+            json.dump(
+                {"seed": args.seed, "repeat": args.repeat, "results": results},
+                file,
+                indent=2,
+            )
+
+    for regression in regressions:
+        print(
+            "Regression: {} on {} statements took {:.4f} seconds, {:+.1%} on the baseline of {:.4f}".format(
+                regression.stage,
+                regression.size,
+                regression.seconds,
+                regression.slowdown,
+                regression.baseline,
+            ),
+            file=sys.stderr,
+        )
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+"""Compares the latency of compiling through the compile server against cold command line runs.
+
+Run with `python -m benchmark.server`. A server is started on a temporary socket, and each way of compiling a
+generated program is timed REPEAT times:
+
+    cold main: python -m compiler.main, which pays for interpreter startup and imports every time
+    cold client: python -m compiler.client, which starts a lighter interpreter and sends the build to the server
+    warm main: a main request sent on an open connection
+    compile: a compile request for the unchanged program, and for the program with one statement changed
+"""
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable
+
+from benchmark import bench_utils
+from compiler import client
+from compiler.utils import arguments as compiler_arguments
+
+STATEMENTS = 200
+REPEAT = 20
+# How long to wait for the server to start listening
+START_SECONDS = 30
+
+
+def latencies(function: Callable[[], object], repeat: int = REPEAT) -> list[float]:
+    """Returns the wall clock time of each of repeat calls of function, in seconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def wait_for_server(path: str) -> client.Client:
+    """Returns a connection to the server listening on path, once it is listening."""
+    deadline = time.monotonic() + START_SECONDS
+    while True:
+        try:
+            return client.Client(path)
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.05)
+
+
+def main() -> None:
+    program = bench_utils.arithmetic_program(STATEMENTS)
+    lines = program.splitlines(keepends=True)
+    edited = "".join(lines[:-1]) + "print(1);\n"
+    with tempfile.TemporaryDirectory(prefix="compiler-") as directory:
+        source = os.path.join(directory, "program.c")
+        with open(source, "w") as file:
+            file.write(program)
+        path = os.path.join(directory, "server.sock")
+        environment = {**os.environ, client.SOCKET_VARIABLE: path}
+        server = subprocess.Popen(
+            [sys.executable, "-m", "compiler.server", "--jobs", "1"],
+            env=environment,
+            stdout=subprocess.DEVNULL,
+        )
+        try:
+            with wait_for_server(path) as connection:
+                rows = measure(connection, source, program, edited, environment)
+                connection.shutdown()
+        finally:
+            server.wait(START_SECONDS)
+    bench_utils.print_table(["request", "median ms", "mean ms", "min ms"], rows)
+
+
+def measure(
+    connection: client.Client,
+    source: str,
+    program: str,
+    edited: str,
+    environment: dict[str, str],
+) -> list[list[object]]:
+    arguments = ["--jobs", "1", source]
+
+    def run(module: str) -> None:
+        subprocess.run(
+            [sys.executable, "-m", module, *arguments],
+            env=environment,
+            stdout=subprocess.DEVNULL,
+            check=True,
+        )
+
+    main_args = vars(compiler_arguments.get_args(arguments))
+    programs = iter([program, edited] * REPEAT)
+    rows = []
+    for name, function in [
+        ("cold main", lambda: run("compiler.main")),
+        ("cold client", lambda: run("compiler.client")),
+        (
+            "warm main",
+            lambda: connection.request({"command": "main", "args": main_args}),
+        ),
+        ("compile unchanged", lambda: connection.compile(program, file_name="a.c")),
+        (
+            "compile one edit",
+            lambda: connection.compile(next(programs), file_name="b.c"),
+        ),
+    ]:
+        timings = [seconds * 1e3 for seconds in latencies(function)]
+        rows.append(
+            [name, statistics.median(timings), statistics.fmean(timings), min(timings)]
+        )
+    return rows
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Compares the LLVM generated with stack slots for every value against SSA registers.
+
+Run with `python -m benchmark.ssa`. Execution times, which include compiling with clang, are skipped when clang is
+not installed.
+"""
+import shutil
+from benchmark import bench_utils
+from compiler.generate import llvm
+from compiler.parse import parse
+
+SIZES = [(500, 8), (2_000, 8), (100, 64)]
+
+
+def main() -> None:
+    rows = []
+    for statements, terms in SIZES:
+        tree = parse.parse_code(bench_utils.arithmetic_program(statements, terms))
+        for ssa in [False, True]:
+            seconds = bench_utils.best_time(lambda: llvm.generate(tree, ssa=ssa))
+            llvm_code = llvm.generate(tree, ssa=ssa)
+            execute_seconds = "-"
+            if shutil.which("clang"):
+                execute_seconds = bench_utils.best_time(
+                    lambda: llvm.execute(llvm_code), 1
+                )
+            rows.append(
+                [
+                    "ssa" if ssa else "stack",
+                    statements,
+                    terms,
+                    len(llvm_code.splitlines()),
+                    seconds,
+                    execute_seconds,
+                ]
+            )
+    bench_utils.print_table(
+        [
+            "mode",
+            "statements",
+            "terms",
+            "ir lines",
+            "generate seconds",
+            "execute seconds",
+        ],
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""Compares peak memory of parsing a file with parse_code() and with parse_stream().
+
+Run with `python -m benchmark.stream`.
+"""
+import io
+import tracemalloc
+from typing import Callable
+from benchmark import bench_utils
+from compiler.parse import parse
+
+STATEMENTS = 20_000
+
+
+def peak_memory(function: Callable[[], object]) -> int:
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def consume_stream(program: str) -> None:
+    for _ in parse.parse_stream(io.StringIO(program)):
+        pass
+
+
+def main() -> None:
+    program = bench_utils.arithmetic_program(STATEMENTS)
+    rows = [
+        ["parse_code", peak_memory(lambda: parse.parse_code(program))],
+        ["parse_stream", peak_memory(lambda: consume_stream(program))],
+    ]
+    bench_utils.print_table(["method", "peak bytes"], rows)
+
+
+if __name__ == "__main__":
+    main()
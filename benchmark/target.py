@@ -0,0 +1,54 @@
+"""Compares the run time of programs tuned for the x86-64 baseline against programs tuned for the host.
+
+Run with `python -m benchmark.target [compiler]`. The compiler defaults to clang, and is also used to detect the
+host. Caching is disabled, so every run compiles the program again.
+"""
+import shutil
+import sys
+from benchmark import bench_utils
+from compiler.generate import llvm, sandbox, target
+from compiler.parse import parse
+
+STATEMENTS = [1000, 10000]
+OPTIMIZATION = 2
+REPEAT = 5
+
+
+def main() -> None:
+    compiler = sys.argv[1] if len(sys.argv) > 1 else sandbox.DEFAULT_COMPILER
+    if shutil.which(compiler) is None:
+        print("{} is not installed".format(compiler))
+        return
+
+    native = target.detect(compiler)
+    print("native: cpu {}, features {}".format(native.cpu, native.features or "-"))
+    rows = []
+    for statements in STATEMENTS:
+        tree = parse.parse_code(bench_utils.arithmetic_program(statements))
+        for name, machine in [("baseline", target.BASELINE), ("native", native)]:
+            code = llvm.generate(
+                tree, ssa=True, optimization=OPTIMIZATION, target=machine
+            )
+            results = [
+                sandbox.run(
+                    code,
+                    flags=llvm.optimization_flags(OPTIMIZATION),
+                    compiler=compiler,
+                )
+                for _ in range(REPEAT)
+            ]
+            rows.append(
+                [
+                    statements,
+                    name,
+                    min(result.compile_seconds for result in results),
+                    min(result.run_seconds for result in results),
+                ]
+            )
+    bench_utils.print_table(
+        ["statements", "target", "compile seconds", "run seconds"], rows
+    )
+
+
+if __name__ == "__main__":
+    main()
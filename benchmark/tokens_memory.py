@@ -0,0 +1,32 @@
+"""Measures the memory used per token by lex.lex() and lex.lex_buffer() using tracemalloc.
+
+Run with `python -m benchmark.tokens_memory`.
+"""
+import tracemalloc
+from typing import Callable, Sized
+from benchmark import bench_utils
+from compiler.lex import lex
+
+STATEMENTS = 20_000
+
+
+def retained_memory(function: Callable[[], Sized]) -> tuple[int, int]:
+    """Returns the bytes still allocated by the result of function and the length of the result."""
+    tracemalloc.start()
+    result = function()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size, len(result)
+
+
+def main() -> None:
+    program = bench_utils.arithmetic_program(STATEMENTS)
+    rows = []
+    for name, function in [("lex", lex.lex), ("lex_buffer", lex.lex_buffer)]:
+        size, count = retained_memory(lambda: function(program))
+        rows.append([name, count, size, size / count])
+    bench_utils.print_table(["method", "tokens", "bytes", "bytes/token"], rows)
+
+
+if __name__ == "__main__":
+    main()
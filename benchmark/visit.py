@@ -0,0 +1,45 @@
+"""Compares node visits per second through accept() chains and through the cached dispatch tables.
+
+Run with `python -m benchmark.visit`.
+"""
+from typing import Self
+from benchmark import bench_utils
+from compiler.generate import python_visitor
+from compiler.parse import node, parse
+
+SIZES = [(2_000, 8), (500, 64)]
+
+
+class AcceptChainVisitor(python_visitor.PythonVisitor):
+    """Evaluates a tree by calling accept() on each node, as visitors did before dispatch tables."""
+
+    def visit(self, node: node.Node) -> Self:
+        stack: list[tuple[node.Node, bool]] = [(node, False)]
+        while stack:
+            current, expanded = stack.pop()
+            if expanded:
+                current.accept(self)
+                continue
+            stack.append((current, True))
+            stack.extend((child, False) for child in reversed(current.children()))
+        return self
+
+
+def main() -> None:
+    rows = []
+    for statements, terms in SIZES:
+        tree = parse.parse_code(bench_utils.arithmetic_program(statements, terms))
+        nodes = python_visitor.PythonVisitor().visit(tree).node_count
+        for name, visitor_type in [
+            ("accept chain", AcceptChainVisitor),
+            ("dispatch table", python_visitor.PythonVisitor),
+        ]:
+            seconds = bench_utils.best_time(lambda: visitor_type().visit(tree))
+            rows.append([name, statements, terms, nodes, seconds, nodes / seconds])
+    bench_utils.print_table(
+        ["dispatch", "statements", "terms", "nodes", "seconds", "nodes/second"], rows
+    )
+
+
+if __name__ == "__main__":
+    main()
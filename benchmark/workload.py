@@ -0,0 +1,89 @@
+"""Generates seeded programs of controllable size and shape, for benchmarking every stage of the pipeline."""
+import dataclasses
+import random
+
+OPERATORS = "+-*/"
+PRECEDENCE = {"+": 1, "-": 1, "*": 2, "/": 2}
+
+
+@dataclasses.dataclass(frozen=True)
+class Shape:
+    """Controls the programs generate() produces.
+
+    Attributes:
+        statements: The number of statements.
+        depth: The greatest nesting depth of an expression, counting each operation and call as one level.
+        operators: The relative weight of each of +, -, * and /.
+        call_density: The chance that an inner node of an expression is a call rather than an operation.
+        max_arguments: The most arguments a call has. Calls have between 0 and this many.
+        print_density: The chance that a statement is wrapped in print.
+        leaf_chance: The chance that a node above the greatest depth is an integer rather than an inner node.
+        max_integer: The greatest integer literal.
+        seed: Seeds the random choices, so the same shape always produces the same program.
+    """
+
+    statements: int = 100
+    depth: int = 4
+    operators: tuple[float, float, float, float] = (1.0, 1.0, 1.0, 1.0)
+    call_density: float = 0.1
+    max_arguments: int = 3
+    print_density: float = 0.5
+    leaf_chance: float = 0.2
+    max_integer: int = 999
+    seed: int = 0
+
+
+def generate(shape: Shape = Shape()) -> str:
+    """Returns a program with one statement per line, shaped by shape.
+
+    Each expression parses into a tree no deeper than shape.depth. The grammar has no grouping parentheses, so an
+    operation which would otherwise parse differently is grouped in a call to f instead. Every divisor is a positive
+    integer literal, so programs never divide by zero.
+    """
+    rng = random.Random(shape.seed)
+    lines = []
+    for _ in range(shape.statements):
+        expression = generate_expression(rng, shape, shape.depth)
+        if rng.random() < shape.print_density:
+            expression = "print({})".format(expression)
+        lines.append(expression + ";")
+    return "\n".join(lines) + "\n"
+
+
+def generate_expression(
+    rng: random.Random, shape: Shape, depth: int, precedence: int = 0
+) -> str:
+    """Returns an expression nested at most depth levels deep.
+
+    Args:
+        precedence: The precedence an operation at the top of the expression must have at least, so that it parses
+            as one operand of the enclosing operation.
+    """
+    if depth <= 1 or rng.random() < shape.leaf_chance:
+        return str(rng.randint(0, shape.max_integer))
+    if rng.random() < shape.call_density:
+        arguments = [
+            generate_expression(rng, shape, depth - 1)
+            for _ in range(rng.randint(0, shape.max_arguments))
+        ]
+        return "f({})".format(", ".join(arguments))
+    operator = rng.choices(OPERATORS, shape.operators)[0]
+    if PRECEDENCE[operator] >= precedence:
+        return generate_operation(rng, shape, depth, operator)
+    if depth == 2:
+        return str(rng.randint(0, shape.max_integer))
+    # A call evaluates to its last argument, so it groups the operation like parentheses
+    return "f({})".format(generate_operation(rng, shape, depth - 1, operator))
+
+
+def generate_operation(
+    rng: random.Random, shape: Shape, depth: int, operator: str
+) -> str:
+    """Returns an operation with operator at the top, nested at most depth levels deep."""
+    left = generate_expression(rng, shape, depth - 1, PRECEDENCE[operator])
+    if operator == "/":
+        right = str(rng.randint(1, shape.max_integer))
+    else:
+        # Operators associate to the left, so the right operand must bind more tightly
+        right = generate_expression(rng, shape, depth - 1, PRECEDENCE[operator] + 1)
+    return "{} {} {}".format(left, operator, right)
@@ -0,0 +1,52 @@
+"""Compares the peak memory and time of building LLVM as a string against writing it to a file as it is generated.
+
+Run with `python -m benchmark.write`.
+"""
+import os
+import tracemalloc
+from typing import Callable
+from benchmark import bench_utils
+from compiler.generate import llvm
+from compiler.parse import parse
+
+SIZES = [(2_000, 8), (10_000, 8)]
+
+
+def peak_memory(function: Callable[[], object]) -> int:
+    """Returns the most bytes allocated at once while running function."""
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def write(tree: parse.statement.Statements) -> None:
+    with open(os.devnull, "w") as stream:
+        llvm.write(tree, stream)
+
+
+def main() -> None:
+    rows = []
+    for statements, terms in SIZES:
+        tree = parse.parse_code(bench_utils.arithmetic_program(statements, terms))
+        for name, function in [
+            ("generate", lambda: llvm.generate(tree)),
+            ("write", lambda: write(tree)),
+        ]:
+            rows.append(
+                [
+                    name,
+                    statements,
+                    terms,
+                    bench_utils.best_time(function),
+                    peak_memory(function),
+                ]
+            )
+    bench_utils.print_table(
+        ["method", "statements", "terms", "seconds", "peak bytes"], rows
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""A thin client for the compile server, which runs builds without paying for Python startup and cold caches.
+
+Run `python -m compiler.client` with the same arguments as compiler.main. If no server is listening, the programs
+are compiled in this process instead, so the client can always stand in for compiler.main.
+
+Requests and responses are JSON objects sent one per line. A request names its command, and a response holds the
+command's result, or just an error:
+
+    {"command": "ping"} -> {"pid": 1234}
+    {"command": "compile", "source": "print(1);"} -> {"llvm": "...", "binary_path": null, "parsed": 1}
+    {"command": "execute", "source": "print(1);"} -> {"stdout": "1\\n", "returncode": 0, ...}
+    {"command": "main", "args": {...}} -> {"status": 0, "stdout": "...", "stderr": ""}
+    {"command": "shutdown"} -> {}
+    Any request which fails -> {"error": "..."}
+
+This module imports little besides the standard library and the argument parser, and none of the compiler's
+phases, so the client starts quickly.
+"""
+from __future__ import annotations
+import json
+import os
+import socket
+import stat
+import sys
+import tempfile
+from typing import Any, Sequence
+
+from compiler.utils import arguments
+
+# Overrides the path of the socket the server listens on and the client connects to
+SOCKET_VARIABLE = "ECCO_SOCKET"
+# A directory private to the user, which holds the socket by default
+RUNTIME_VARIABLE = "XDG_RUNTIME_DIR"
+SOCKET_NAME = "ecco.sock"
+
+
+def default_socket() -> str:
+    """Returns the path of the socket named by $ECCO_SOCKET, or else one in a directory only this user can use.
+
+    The directory is $XDG_RUNTIME_DIR, or else one created for this user in the temporary directory. Another user
+    could create the latter first, to answer this user's requests, so it must belong to this user and be closed to
+    everyone else.
+
+    throws:
+        PermissionError: If the directory in the temporary directory belongs to someone else or is open to others.
+    """
+    path = os.environ.get(SOCKET_VARIABLE)
+    if path:
+        return path
+    runtime = os.environ.get(RUNTIME_VARIABLE)
+    if runtime:
+        return os.path.join(runtime, SOCKET_NAME)
+    directory = os.path.join(tempfile.gettempdir(), "ecco-{}".format(os.getuid()))
+    try:
+        os.mkdir(directory, 0o700)
+    except FileExistsError:
+        pass
+    info = os.lstat(directory)
+    if (
+        not stat.S_ISDIR(info.st_mode)
+        or info.st_uid != os.getuid()
+        or info.st_mode & 0o077
+    ):
+        raise PermissionError(
+            "{} must be a directory which only this user can use".format(directory)
+        )
+    return os.path.join(directory, SOCKET_NAME)
+
+
+class Client:
+    """A connection to the compile server, which can send any number of requests in turn.
+
+    Not safe to share between threads; give each thread a client of its own.
+    """
+
+    def __init__(self, path: str | None = None, timeout: float | None = None) -> None:
+        """
+        Args:
+            path: The socket the server listens on, default_socket() by default.
+            timeout: The most seconds to wait to connect or for a response, or None for no limit.
+
+        throws:
+            OSError: If no server is listening on path.
+        """
+        self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.socket.settimeout(timeout)
+        try:
+            self.socket.connect(path or default_socket())
+        except OSError:
+            self.socket.close()
+            raise
+        self.file = self.socket.makefile("rwb")
+
+    def request(self, message: dict[str, Any]) -> dict[str, Any]:
+        """Sends message and returns the server's response.
+
+        throws:
+            ValueError: If the server could not carry out the request.
+            OSError: If the connection fails, or the server closes it without responding.
+        """
+        self.file.write(json.dumps(message).encode() + b"\n")
+        self.file.flush()
+        line = self.file.readline()
+        if not line:
+            raise ConnectionError("The compile server closed the connection")
+        response = json.loads(line)
+        if "error" in response:
+            raise ValueError(response["error"])
+        return response
+
+    def ping(self) -> int:
+        """Returns the process ID of the server."""
+        return self.request({"command": "ping"})["pid"]
+
+    def compile(self, source: str, **options: Any) -> dict[str, Any]:
+        """Compiles the program source to LLVM, and to a binary if the binary option names a path for it.
+
+        Args:
+            options: Any of file_name, ssa, optimize, optimization, cpu, features, triple, compiler, passes, opt and
+                binary.
+
+        Paths, such as binary, must be absolute, since the server has its own working directory.
+
+        Returns the LLVM as llvm, the path of the binary as binary_path, and the number of statements which had to be
+        parsed as parsed. The server reuses the work done for unchanged statements of the last program compiled
+        with the same file_name and options.
+        """
+        return self.request({"command": "compile", "source": source, **options})
+
+    def execute(self, source: str, **options: Any) -> dict[str, Any]:
+        """Compiles and runs the program source.
+
+        Args:
+            options: Any of the options of compile, and timeout.
+
+        Returns the fields of a sandbox.ExecutionResult.
+        """
+        return self.request({"command": "execute", "source": source, **options})
+
+    def shutdown(self) -> None:
+        """Stops the server once it has finished the requests it is handling."""
+        self.request({"command": "shutdown"})
+
+    def close(self) -> None:
+        try:
+            self.file.close()
+        except OSError:
+            # Closing flushes what is left of a request the connection failed to send
+            pass
+        finally:
+            self.socket.close()
+
+    def __enter__(self) -> Client:
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self.close()
+
+
+def resolve_program(program: str) -> str:
+    """Returns program as an absolute path if it is relative to the working directory, such as bin/clang.
+
+    A bare name, such as clang, is returned as it is, to be looked up on PATH.
+    """
+    if os.path.dirname(program):
+        return os.path.abspath(program)
+    return program
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Compiles the programs given on the command line on the server, like compiler.main.main.
+
+    Programs, and the compiler and opt if given as paths, are named by their absolute paths, since the server has
+    its own working directory. Phase timings are only recorded in this process, so --report and --trace compile here
+    rather than on the server. Programs are also compiled here if no server is listening, but a server which fails
+    partway through the build is reported as an error, rather than building again.
+
+    Returns the exit status, as for compiler.main.main.
+    """
+    args = arguments.get_args(argv)
+    if args.report is None and args.trace is None:
+        # The server resolves paths against its own working directory
+        args.PROGRAMS = [
+            os.path.join(os.getcwd(), pattern) for pattern in args.PROGRAMS
+        ]
+        args.compiler = resolve_program(args.compiler)
+        args.opt = resolve_program(args.opt)
+        try:
+            client = Client()
+        except OSError:
+            # No server is listening
+            pass
+        else:
+            with client:
+                try:
+                    response = client.request({"command": "main", "args": vars(args)})
+                except ValueError as error:
+                    print(error, file=sys.stderr)
+                    return 1
+                except OSError as error:
+                    print(
+                        "The compile server failed: {}".format(error), file=sys.stderr
+                    )
+                    return 1
+            sys.stdout.write(response["stdout"])
+            sys.stderr.write(response["stderr"])
+            return response["status"]
+
+    from compiler import main as compiler_main
+
+    return compiler_main.main(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,333 @@
+"""Compiles many source files in parallel, writing the LLVM for each next to it."""
+from __future__ import annotations
+import concurrent.futures
+import dataclasses
+import functools
+import glob
+import os
+import tempfile
+import time
+from typing import Callable, Iterable, Iterator, Sequence
+
+from compiler.generate import cache, llvm, sandbox, target as target_module
+from compiler.lex import lex
+from compiler.optimize import fold
+from compiler.parse import parse
+from compiler.utils import instrument
+
+LLVM_EXTENSION = ".ll"
+BINARY_EXTENSION = ".out"
+
+
+@dataclasses.dataclass
+class FileResult:
+    """The outcome of compiling one source file.
+
+    Attributes:
+        source: The path of the source file.
+        lines: The number of lines in the source file.
+        seconds: The time taken to compile the file, including reading and writing it.
+        llvm_path: The path the LLVM was written to, or None if compilation failed before it was written.
+        binary_path: The path the binary was written to, or None if no binary was requested or compilation failed.
+        error: Why compilation failed, or None if it succeeded.
+    """
+
+    source: str
+    lines: int
+    seconds: float
+    llvm_path: str | None = None
+    binary_path: str | None = None
+    error: str | None = None
+
+
+@dataclasses.dataclass
+class Report:
+    """The outcome of compiling many source files.
+
+    Attributes:
+        results: The result for each file, in the order the files were given.
+        seconds: The wall clock time taken to compile every file.
+    """
+
+    results: list[FileResult]
+    seconds: float
+
+    @property
+    def lines(self) -> int:
+        return sum(result.lines for result in self.results)
+
+    @property
+    def failures(self) -> list[FileResult]:
+        return [result for result in self.results if result.error is not None]
+
+    @property
+    def files_per_second(self) -> float:
+        return len(self.results) / self.seconds if self.seconds else 0.0
+
+    @property
+    def lines_per_second(self) -> float:
+        return self.lines / self.seconds if self.seconds else 0.0
+
+
+def expand(patterns: Iterable[str]) -> list[str]:
+    """Expands glob patterns into the files they match, in order and without duplicates.
+
+    ** matches any number of directories. A pattern without wildcards names a file, which must exist.
+
+    throws:
+        ValueError: If a pattern matches no files.
+    """
+    sources: dict[str, None] = {}
+    for pattern in patterns:
+        if glob.has_magic(pattern):
+            matches = sorted(
+                path
+                for path in glob.glob(pattern, recursive=True)
+                if os.path.isfile(path)
+            )
+        else:
+            matches = [pattern] if os.path.isfile(pattern) else []
+        if not matches:
+            raise ValueError("No files match: {}".format(pattern))
+        sources.update(dict.fromkeys(matches))
+    return list(sources)
+
+
+def output_path(source: str, extension: str) -> str:
+    """Returns the path next to source with its extension replaced, e.g. dir/a.c becomes dir/a.ll."""
+    return os.path.splitext(source)[0] + extension
+
+
+def compile_file(
+    source: str,
+    binary: bool = False,
+    compiler: str = sandbox.DEFAULT_COMPILER,
+    optimization: int = 0,
+    passes: str | None = None,
+    opt: str = sandbox.DEFAULT_OPT,
+    target: target_module.Target = target_module.BASELINE,
+) -> FileResult:
+    """Lexes, parses and folds source, writing its LLVM next to it and optionally compiling a binary.
+
+    Errors are returned in the result rather than raised, so one bad file does not stop the others.
+
+    Args:
+        binary: Whether to also compile and link a binary next to source with compiler.
+        compiler: The compiler to run, which must accept clang's arguments.
+        optimization: The level to generate and compile at, as for llvm.generate.
+        passes: A pipeline of passes for opt to run before compiling a binary, as for sandbox.run.
+        opt: The opt to run passes with.
+        target: The machine to tune for.
+    """
+    start = time.perf_counter()
+    result = FileResult(source, 0, 0.0)
+    try:
+        with instrument.span("compile_file"):
+            compile_phases(
+                source, result, binary, compiler, optimization, passes, opt, target
+            )
+    except (OSError, ValueError) as error:
+        result.error = str(error)
+    except Exception as error:
+        # A bug in one phase must not stop the other files either
+        result.error = "{}: {}".format(type(error).__name__, error)
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+def compile_phases(
+    source: str,
+    result: FileResult,
+    binary: bool,
+    compiler: str,
+    optimization: int,
+    passes: str | None,
+    opt: str,
+    target: target_module.Target,
+) -> None:
+    """Runs each phase of compile_file, timing each with instrument and filling in result as it goes."""
+    with open(source) as file:
+        program = file.read()
+    result.lines = len(program.splitlines())
+    instrument.count("lines", result.lines)
+    with instrument.span("lex"):
+        tokens = lex.lex(program)
+    instrument.count("tokens", len(tokens))
+    with instrument.span("parse"):
+        tree = parse.parse(tokens)
+    with instrument.span("optimize"):
+        node, _ = fold.fold(tree)
+    with instrument.span("generate"):
+        llvm_code = llvm.generate(
+            node,
+            os.path.basename(source),
+            ssa=True,
+            optimization=optimization,
+            target=target,
+        )
+    instrument.count("ir_lines", llvm_code.count("\n"))
+
+    llvm_path = output_path(source, LLVM_EXTENSION)
+    with open(llvm_path, "w") as file:
+        file.write(llvm_code)
+    result.llvm_path = llvm_path
+
+    if binary:
+        binary_path = output_path(source, BINARY_EXTENSION)
+        with tempfile.TemporaryDirectory(prefix="compiler-") as directory:
+            with instrument.span("compile"):
+                sandbox.compile_cached(
+                    llvm_code,
+                    os.path.abspath(binary_path),
+                    directory,
+                    flags=llvm.optimization_flags(optimization),
+                    compiler=compiler,
+                    cache=cache.default_cache(),
+                    passes=passes,
+                    opt=opt,
+                )
+        result.binary_path = binary_path
+
+
+def iter_compile(
+    sources: Sequence[str],
+    jobs: int | None = None,
+    chunksize: int = 1,
+    binary: bool = False,
+    compiler: str = sandbox.DEFAULT_COMPILER,
+    optimization: int = 0,
+    passes: str | None = None,
+    opt: str = sandbox.DEFAULT_OPT,
+    target: target_module.Target = target_module.BASELINE,
+    executor: concurrent.futures.Executor | None = None,
+) -> Iterator[FileResult]:
+    """Compiles each source with compile_file, yielding the results in the order of sources.
+
+    Args:
+        jobs: The number of worker processes, or None for one per CPU. With 1 job, files are compiled in this
+            process.
+        chunksize: The number of files sent to a worker at a time. Larger chunks cost less to send but
+            balance unevenly sized files worse.
+        binary: Whether to also compile and link a binary next to each source.
+        compiler: The compiler to run, which must accept clang's arguments.
+        optimization: The level to generate and compile at, as for llvm.generate.
+        passes: A pipeline of passes for opt to run before compiling each binary, as for sandbox.run.
+        opt: The opt to run passes with.
+        target: The machine to tune for. Resolve "native" once before calling, rather than in every worker.
+        executor: The process pool to compile in, instead of starting one with jobs workers. It is left running,
+            so a long running process can share one pool between calls.
+    """
+    function = functools.partial(
+        compile_file,
+        binary=binary,
+        compiler=compiler,
+        optimization=optimization,
+        passes=passes,
+        opt=opt,
+        target=target,
+    )
+    if jobs == 1 or len(sources) <= 1:
+        yield from map(function, sources)
+        return
+    if executor is None:
+        with concurrent.futures.ProcessPoolExecutor(jobs) as executor:
+            yield from map_compile(executor, function, sources, chunksize)
+        return
+    yield from map_compile(executor, function, sources, chunksize)
+
+
+def map_compile(
+    executor: concurrent.futures.Executor,
+    function: Callable[[str], FileResult],
+    sources: Sequence[str],
+    chunksize: int,
+) -> Iterator[FileResult]:
+    """Calls function on each source in executor, yielding the results in the order of sources."""
+    if not instrument.enabled():
+        yield from executor.map(function, sources, chunksize=chunksize)
+        return
+    # Each worker sends back what it recorded along with its result
+    recorded = functools.partial(compile_recorded, function)
+    for result, spans, counts in executor.map(recorded, sources, chunksize=chunksize):
+        instrument.merge(spans, counts)
+        yield result
+
+
+def compile_recorded(
+    function: Callable[[str], FileResult], source: str
+) -> tuple[FileResult, list[instrument.Span], dict[str, int]]:
+    """Calls function in a worker process with instrumentation enabled, returning what it recorded too.
+
+    The worker's instrumentation is restored afterwards, since a pool shared between calls may run uninstrumented
+    work next.
+    """
+    was_enabled = instrument.enabled()
+    instrument.enable()
+    instrument.reset()
+    try:
+        result = function(source)
+        return (result, *instrument.take())
+    finally:
+        if not was_enabled:
+            instrument.disable()
+        instrument.reset()
+
+
+def compile_files(
+    sources: Sequence[str],
+    jobs: int | None = None,
+    chunksize: int = 1,
+    binary: bool = False,
+    compiler: str = sandbox.DEFAULT_COMPILER,
+    optimization: int = 0,
+    passes: str | None = None,
+    opt: str = sandbox.DEFAULT_OPT,
+    target: target_module.Target = target_module.BASELINE,
+    callback: Callable[[FileResult], None] | None = None,
+    executor: concurrent.futures.Executor | None = None,
+) -> Report:
+    """Compiles each source in parallel, like iter_compile.
+
+    Args:
+        callback: Called with each result as soon as it and the results before it are ready.
+    """
+    start = time.perf_counter()
+    results = []
+    for result in iter_compile(
+        sources,
+        jobs,
+        chunksize,
+        binary,
+        compiler,
+        optimization,
+        passes,
+        opt,
+        target,
+        executor,
+    ):
+        results.append(result)
+        if callback is not None:
+            callback(result)
+    return Report(results, time.perf_counter() - start)
+
+
+def describe(result: FileResult) -> str:
+    """Returns a line describing the outcome of compiling one file."""
+    if result.error is not None:
+        return "{}: error: {}".format(result.source, result.error)
+    outputs = [result.llvm_path]
+    if result.binary_path is not None:
+        outputs.append(result.binary_path)
+    return "{} -> {}".format(result.source, ", ".join(outputs))
+
+
+def summarize(report: Report) -> str:
+    """Returns a line describing the throughput of a report."""
+    return "Compiled {} files ({} lines, {} failed) in {:.3f} seconds: {:.1f} files/second, {:.1f} lines/second".format(
+        len(report.results),
+        report.lines,
+        len(report.failures),
+        report.seconds,
+        report.files_per_second,
+        report.lines_per_second,
+    )
@@ -0,0 +1,130 @@
+"""Compiles many programs into one binary, so clang is started once for the whole batch."""
+from __future__ import annotations
+from typing import Sequence, TextIO
+
+from compiler.generate import cache, llvm, sandbox, target as target_module
+from compiler.parse import node
+
+# Printed on a line of its own after the output of each program
+SEPARATOR = "\x1e"
+
+
+def program_name(index: int) -> str:
+    return "program_{}".format(index)
+
+
+def generate(
+    nodes: Sequence[node.Node],
+    file_name: str = "batch.c",
+    ssa: bool = False,
+    optimization: int = 0,
+    target: target_module.Target = target_module.BASELINE,
+) -> str:
+    """Converts each Node into its own LLVM function, in one module whose main runs them all in order.
+
+    Args:
+        file_name: Used as a global identifier.
+        ssa: Whether to keep intermediate values in virtual registers rather than in stack slots.
+        optimization: The level the code will be compiled at, as for llvm.generate.
+        target: The machine to tune for.
+    """
+    return BatchLlvm(file_name, nodes, ssa, optimization, target).generate()
+
+
+def execute(
+    nodes: Sequence[node.Node],
+    ssa: bool = False,
+    optimization: int = 0,
+    target: target_module.Target = target_module.BASELINE,
+) -> list[str]:
+    """Executes each Node using a single clang invocation and a single process.
+
+    Returns the output of each program, like llvm.execute.
+
+    throws:
+        sandbox.CompileError: If clang fails.
+        ValueError: If a program crashes, which stops the programs after it, or optimization is not in
+            llvm.OPTIMIZATION_LEVELS.
+    """
+    result = sandbox.run(
+        BatchLlvm("batch.c", nodes, ssa, optimization, target),
+        flags=llvm.optimization_flags(optimization),
+        cache=cache.default_cache(),
+    )
+    outputs = split_output(result.stdout)
+    if len(outputs) != len(nodes):
+        raise ValueError(
+            "Program {} of the batch exited with status {}".format(
+                len(outputs), result.returncode
+            )
+        )
+    return outputs
+
+
+def split_output(stdout: str) -> list[str]:
+    """Splits the output of a batch into the output of each program which finished."""
+    outputs = stdout.split(SEPARATOR + "\n")
+    # Anything after the last separator is from a program which did not finish
+    return [output.strip() for output in outputs[:-1]]
+
+
+class BatchLlvm(llvm.Llvm):
+    """Generates a module with a function per program and a main which calls each, then prints SEPARATOR.
+
+    The functions share the module's format strings, printf declaration and attribute groups.
+    """
+
+    def __init__(
+        self,
+        file_name: str,
+        nodes: Sequence[node.Node],
+        ssa: bool = False,
+        optimization: int = 0,
+        target: target_module.Target = target_module.BASELINE,
+    ) -> None:
+        super().__init__(file_name, None, ssa, optimization, target)
+        self.nodes = nodes
+
+    def write(self, stream: TextIO) -> None:
+        stream.write(self.preamble())
+        for index, program in enumerate(self.nodes):
+            stream.write("\n")
+            self.write_function(stream, program_name(index), program)
+        stream.write("\n")
+        self.write_main(stream)
+        self.write_globals(stream)
+
+    def write_main(self, stream: TextIO) -> None:
+        """Writes a main which calls every program, printing SEPARATOR after each.
+
+        stdout is flushed after each separator, so the output of the programs before one which crashes is not lost
+        in the buffer.
+        """
+        self.declare_printf()
+        self.constants.append(
+            '@.separator = private unnamed_addr constant [3 x i8] c"\\1E\\0A\\00", align 1'
+        )
+        self.declarations.append(
+            "declare i32 @fflush(ptr noundef) #{}".format(
+                self.add_attribute(llvm.Attribute(target=self.target))
+            )
+        )
+        self.virtual_register_count = 1
+        stream.write(self.function_header("main"))
+        self.body = llvm.IndentedWriter(stream)
+        for index in range(len(self.nodes)):
+            self.body.extend(
+                [
+                    "%{} = call i32 @{}()".format(
+                        self.reserve_virtual_register(), program_name(index)
+                    ),
+                    "%{} = call i32 (ptr, ...) @printf(ptr noundef @.separator)".format(
+                        self.reserve_virtual_register()
+                    ),
+                    "%{} = call i32 @fflush(ptr noundef null)".format(
+                        self.reserve_virtual_register()
+                    ),
+                ]
+            )
+        self.body.append("ret i32 0")
+        stream.write("}\n")
@@ -0,0 +1,150 @@
+"""Compiles an AST into bytecode for a stack machine, which evaluates it like PythonVisitor.
+
+A program is compiled once and can then be run any number of times without walking the tree again.
+"""
+from __future__ import annotations
+import dataclasses
+from array import array
+
+from compiler.parse import expression, node, statement, visitor
+
+# Pushes constants[arg]
+CONST = 0
+# Pops the right then the left operand, pushing the result
+ADD = 1
+SUBTRACT = 2
+MULTIPLY = 3
+DIVIDE = 4
+# Combines the top of the stack with constants[arg] as the right operand, replacing a CONST followed by an operation
+ADD_CONST = 5
+SUBTRACT_CONST = 6
+MULTIPLY_CONST = 7
+DIVIDE_CONST = 8
+# Pops arg arguments, pushing the last one, or 0 if there are none
+CALL = 9
+# Pops the value of a statement, appending it to the results
+STATEMENT = 10
+
+# Maps each operation to its opcode
+OPCODES: dict[type[expression.BinaryOperation], int] = {
+    expression.Add: ADD,
+    expression.Subtract: SUBTRACT,
+    expression.Multiply: MULTIPLY,
+    expression.Divide: DIVIDE,
+}
+# The opcode which replaces a CONST followed by each operation
+CONST_OPCODES = {opcode: opcode + ADD_CONST - ADD for opcode in OPCODES.values()}
+
+
+@dataclasses.dataclass
+class Program:
+    """Bytecode for a stack machine.
+
+    Attributes:
+        opcodes: The instructions, run in order.
+        args: The argument of each instruction, or 0 if it takes none.
+        constants: The integer literals used by CONST and the *_CONST instructions.
+    """
+
+    opcodes: array[int] = dataclasses.field(default_factory=lambda: array("B"))
+    args: array[int] = dataclasses.field(default_factory=lambda: array("i"))
+    constants: list[int] = dataclasses.field(default_factory=list)
+
+    def run(self) -> list[int]:
+        """Runs the program, returning the value of each statement like PythonVisitor.results.
+
+        throws:
+            ZeroDivisionError: If the program divides by zero.
+        """
+        constants = self.constants
+        stack: list[int] = []
+        push = stack.append
+        pop = stack.pop
+        results: list[int] = []
+        for opcode, arg in zip(self.opcodes, self.args):
+            # Ordered by how common each instruction is in arithmetic programs
+            if opcode == CONST:
+                push(constants[arg])
+            elif opcode == ADD_CONST:
+                stack[-1] += constants[arg]
+            elif opcode == MULTIPLY_CONST:
+                stack[-1] *= constants[arg]
+            elif opcode == SUBTRACT_CONST:
+                stack[-1] -= constants[arg]
+            elif opcode == DIVIDE_CONST:
+                stack[-1] //= constants[arg]
+            elif opcode == ADD:
+                right = pop()
+                stack[-1] += right
+            elif opcode == MULTIPLY:
+                right = pop()
+                stack[-1] *= right
+            elif opcode == SUBTRACT:
+                right = pop()
+                stack[-1] -= right
+            elif opcode == DIVIDE:
+                right = pop()
+                stack[-1] //= right
+            elif opcode == STATEMENT:
+                results.append(pop())
+            elif opcode == CALL:
+                result = stack[-1] if arg else 0
+                del stack[len(stack) - arg :]
+                push(result)
+            else:
+                raise ValueError("Unknown opcode: {}".format(opcode))
+        return results
+
+
+def compile_node(tree: node.Node) -> Program:
+    """Compiles tree into a Program."""
+    return Compiler().visit(tree).program
+
+
+def evaluate(tree: node.Node) -> list[int]:
+    """Compiles and runs tree, returning the value of each statement."""
+    return compile_node(tree).run()
+
+
+class Compiler(visitor.PostOrderVisitor):
+    """Emits the instructions for each node after those of its children.
+
+    Equal constants share one entry in the constants table.
+    """
+
+    def __init__(self) -> None:
+        self.program = Program()
+        self.constant_indices: dict[int, int] = {}
+
+    def emit(self, opcode: int, arg: int = 0) -> None:
+        self.program.opcodes.append(opcode)
+        self.program.args.append(arg)
+
+    def visit_statement(self, node: statement.Statement) -> None:
+        self.emit(STATEMENT)
+
+    def visit_call(self, node: expression.Call) -> None:
+        self.emit(CALL, len(node.arguments))
+
+    def visit_integer_node(self, node: expression.IntegerNode) -> None:
+        index = self.constant_indices.get(node.value)
+        if index is None:
+            index = self.constant_indices[node.value] = len(self.program.constants)
+            self.program.constants.append(node.value)
+        self.emit(CONST, index)
+
+    def visit_id_node(self, node: expression.IdNode) -> None:
+        raise ValueError(
+            "Identifiers are not supported by the bytecode backend, got: {}".format(
+                node.value
+            )
+        )
+
+    def visit_binary_operation(self, node: expression.BinaryOperation) -> None:
+        opcode = OPCODES[type(node)]
+        opcodes = self.program.opcodes
+        # The right operand was emitted last, so a literal right operand is the last instruction
+        if opcodes[-1] == CONST:
+            opcodes[-1] = CONST_OPCODES[opcode]
+        else:
+            self.emit(opcode)
@@ -0,0 +1,181 @@
+"""An on-disk cache of compiled binaries, addressed by a hash of the LLVM, the compiler and its flags."""
+from __future__ import annotations
+import dataclasses
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+from typing import Sequence
+
+# Overrides the directory of the default cache. An empty value disables the default cache.
+CACHE_DIR_VARIABLE = "COMPILER_CACHE_DIR"
+DEFAULT_MAX_BYTES = 256 << 20
+
+
+@dataclasses.dataclass
+class CacheStats:
+    """Counts of cache lookups and the current contents of the cache."""
+
+    hits: int
+    misses: int
+    entries: int
+    size: int
+
+
+class Cache:
+    """Stores compiled binaries in a directory, evicting the least recently used once it grows past max_bytes.
+
+    Entries are written to a temporary file and renamed into place, so processes can share a directory without
+    ever seeing a partial binary. Each hit updates the modification time of its entry, which eviction uses as the
+    time it was last used.
+
+    Attributes:
+        directory: Where binaries are stored, one file per key.
+        max_bytes: The size the cache is trimmed to after each store.
+        hits: The number of lookups in this process which found a binary.
+        misses: The number of lookups in this process which did not.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def key(
+        self,
+        llvm_code: str,
+        flags: Sequence[str],
+        compiler: str,
+        opt: str | None = None,
+    ) -> str | None:
+        """Returns the key of the binary compiled from llvm_code, or None if the compiler or opt cannot be found.
+
+        The compiler is identified by the path, size and modification time of its executable rather than by running
+        it, so a lookup never starts the compiler. opt, which runs passes over llvm_code first if given, is
+        identified the same way, so upgrading either misses the binaries built by the old one.
+        """
+        parts = []
+        for program in [compiler] if opt is None else [compiler, opt]:
+            identity = identify(program)
+            if identity is None:
+                return None
+            parts.extend(identity)
+        digest = hashlib.sha256()
+        for part in [*parts, *flags]:
+            digest.update(part.encode())
+            digest.update(b"\0")
+        digest.update(llvm_code.encode())
+        return digest.hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def fetch(self, key: str, destination: str) -> bool:
+        """Links or copies the binary for key to destination.
+
+        Returns whether the binary was in the cache.
+        """
+        path = self.path(key)
+        try:
+            os.utime(path)
+            try:
+                os.link(path, destination)
+            except OSError:
+                shutil.copy2(path, destination)
+        except FileNotFoundError:
+            # Missing, or evicted by another process since it was touched
+            with self.lock:
+                self.misses += 1
+            return False
+        with self.lock:
+            self.hits += 1
+        return True
+
+    def store(self, key: str, binary: str) -> None:
+        """Adds a copy of binary to the cache under key, then evicts entries until the cache fits in max_bytes."""
+        file, temp_path = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        os.close(file)
+        try:
+            shutil.copy2(binary, temp_path)
+            os.replace(temp_path, self.path(key))
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        self.evict()
+
+    def entries(self) -> list[tuple[str, os.stat_result]]:
+        """Returns the path and stat of every entry, least recently used first."""
+        results = []
+        with os.scandir(self.directory) as scan:
+            for entry in scan:
+                if entry.name.startswith("."):
+                    continue
+                try:
+                    results.append((entry.path, entry.stat()))
+                except FileNotFoundError:
+                    continue
+        results.sort(key=lambda result: result[1].st_mtime_ns)
+        return results
+
+    def evict(self) -> None:
+        """Removes the least recently used entries until the cache fits in max_bytes."""
+        entries = self.entries()
+        size = sum(stat.st_size for _, stat in entries)
+        for path, stat in entries:
+            if size <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            size -= stat.st_size
+
+    def stats(self) -> CacheStats:
+        entries = self.entries()
+        return CacheStats(
+            self.hits,
+            self.misses,
+            len(entries),
+            sum(stat.st_size for _, stat in entries),
+        )
+
+
+def identify(program: str) -> list[str] | None:
+    """Returns the real path, size and modification time of the executable program, or None if it cannot be found."""
+    path = shutil.which(program)
+    if path is None:
+        return None
+    path = os.path.realpath(path)
+    stat = os.stat(path)
+    return [path, str(stat.st_size), str(stat.st_mtime_ns)]
+
+
+def default_directory() -> str | None:
+    """Returns the directory of the default cache, or None if it is disabled."""
+    directory = os.environ.get(CACHE_DIR_VARIABLE)
+    if directory is not None:
+        return directory or None
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(cache_home, "compiler")
+
+
+DEFAULT_CACHE: Cache | None = None
+DEFAULT_CACHE_LOCK = threading.Lock()
+
+
+def default_cache() -> Cache | None:
+    """Returns the cache shared by llvm.execute, creating it on first use, or None if it is disabled."""
+    global DEFAULT_CACHE
+    directory = default_directory()
+    if directory is None:
+        return None
+    with DEFAULT_CACHE_LOCK:
+        if DEFAULT_CACHE is None or DEFAULT_CACHE.directory != directory:
+            DEFAULT_CACHE = Cache(directory)
+        return DEFAULT_CACHE
@@ -0,0 +1,196 @@
+"""Recompiles a program to LLVM incrementally, regenerating only the statements which changed since the last build.
+
+The output is identical to generating the whole program with llvm.generate.
+"""
+from __future__ import annotations
+import dataclasses
+import io
+import re
+
+from compiler.generate import llvm, target as target_module
+from compiler.optimize import fold
+from compiler.parse import parse, statement
+
+# Matches a virtual register, capturing its number
+REGISTER_REGEX = re.compile(r"%(\d+)")
+
+
+@dataclasses.dataclass
+class Fragment:
+    """The instructions generated for one statement, with its virtual registers numbered from 1.
+
+    Attributes:
+        tree: The parsed statement.
+        text: The instructions.
+        pieces: The text between the register numbers in text.
+        numbers: Each register number in text.
+        registers: The number of virtual registers the statement reserves.
+        prints: Whether the statement calls print.
+    """
+
+    tree: statement.Statement
+    text: str
+    pieces: list[str]
+    numbers: list[int]
+    registers: int
+    prints: bool
+
+    def render(self, offset: int) -> str:
+        """Returns the instructions with offset added to every register number."""
+        if offset == 0:
+            return self.text
+        parts = [self.pieces[0]]
+        for number, piece in zip(self.numbers, self.pieces[1:]):
+            parts.append("%")
+            parts.append(str(number + offset))
+            parts.append(piece)
+        return "".join(parts)
+
+
+class IncrementalLlvm:
+    """Generates LLVM for successive versions of a program, reusing the work done for unchanged statements.
+
+    A program is split into its top level statements at each semicolon, which can only end a statement. Each
+    statement is keyed by its text, so an unchanged statement reuses its parsed tree and instructions. Its
+    instructions are only renumbered when the statements before it reserve a different number of registers.
+
+    A program which cannot be split this way, for example because it has a syntax error, is compiled in full,
+    so errors are the same as for a full build.
+
+    Attributes:
+        parsed: The number of statements parsed by the last build.
+        renumbered: The number of statements whose instructions were renumbered by the last build.
+    """
+
+    def __init__(
+        self,
+        file_name: str = "temp.c",
+        ssa: bool = False,
+        optimize: bool = False,
+        optimization: int = 0,
+        target: target_module.Target = target_module.BASELINE,
+    ) -> None:
+        """
+        Args:
+            file_name: Used as a global identifier.
+            ssa: Whether to keep intermediate values in virtual registers rather than in stack slots.
+            optimize: Whether to fold constants in each statement, like fold.fold.
+            optimization: The level the code will be compiled at, as for llvm.generate.
+            target: The machine to tune for.
+
+        throws:
+            ValueError: If optimization is not in llvm.OPTIMIZATION_LEVELS.
+        """
+        llvm.check_optimization(optimization)
+        self.file_name = file_name
+        self.ssa = ssa
+        self.optimize = optimize
+        self.optimization = optimization
+        self.target = target
+        self.fragments: dict[str, Fragment] = {}
+        # The instructions of each statement in the last build, by its key and register offset
+        self.rendered: dict[tuple[str, int], str] = {}
+        self.parsed = 0
+        self.renumbered = 0
+
+    def generate(self, program: str) -> str:
+        """Converts program into LLVM, like llvm.generate(parse.parse_code(program)).
+
+        throws:
+            ValueError: If program is malformed.
+        """
+        self.parsed = 0
+        self.renumbered = 0
+        keys = [chunk.strip() for chunk in program.split(";")]
+        if keys.pop():
+            # Text after the last semicolon is an incomplete statement
+            return self.generate_full(program)
+
+        fragments = {key: self.fragments.get(key) for key in keys}
+        missing = [key for key, fragment in fragments.items() if fragment is None]
+        if missing:
+            trees = self.parse_statements(missing)
+            if trees is None:
+                return self.generate_full(program)
+            fragments.update(zip(missing, self.make_fragments(trees)))
+            self.parsed = len(missing)
+        self.fragments = fragments
+
+        module = llvm.Llvm(
+            self.file_name, None, self.ssa, self.optimization, self.target
+        )
+        stream = io.StringIO()
+        stream.write(module.preamble())
+        stream.write("\n")
+        stream.write(module.function_header("main"))
+        rendered: dict[tuple[str, int], str] = {}
+        offset = 0
+        prints = False
+        for key in keys:
+            fragment = fragments[key]
+            text = self.rendered.get((key, offset))
+            if text is None:
+                text = fragment.render(offset)
+                self.renumbered += 1
+            rendered[key, offset] = text
+            stream.write(text)
+            offset += fragment.registers
+            prints = prints or fragment.prints
+        self.rendered = rendered
+        module.body = llvm.IndentedWriter(stream)
+        module.body.append("ret i32 0")
+        stream.write("}\n")
+
+        if prints:
+            module.declare_print_int()
+        module.write_globals(stream)
+        return stream.getvalue()
+
+    def parse_statements(self, keys: list[str]) -> list[statement.Statement] | None:
+        """Parses the statement with each text in keys together, or returns None if they are not all statements."""
+        try:
+            trees = parse.parse_code(";\n".join(keys) + ";").statements
+        except ValueError:
+            return None
+        # The lexer stops at an unknown character, which can hide the statements after it
+        if len(trees) != len(keys):
+            return None
+        if self.optimize:
+            trees = [fold.fold(tree)[0] for tree in trees]
+        return trees
+
+    def make_fragments(self, trees: list[statement.Statement]) -> list[Fragment]:
+        """Generates the instructions for each statement."""
+        scratch = llvm.Llvm(self.file_name, None, self.ssa)
+        visitor = scratch.make_visitor()
+        fragments = []
+        for tree in trees:
+            scratch.body = llvm.IndentedWriter(io.StringIO())
+            scratch.virtual_register_count = 1
+            scratch.print_int_called = False
+            visitor.visit(tree)
+            text = scratch.body.stream.getvalue()
+            pieces = REGISTER_REGEX.split(text)
+            fragments.append(
+                Fragment(
+                    tree,
+                    text,
+                    pieces[0::2],
+                    [int(number) for number in pieces[1::2]],
+                    scratch.virtual_register_count - 1,
+                    scratch.print_int_called,
+                )
+            )
+        return fragments
+
+    def generate_full(self, program: str) -> str:
+        """Generates program without reusing anything, clearing what was kept from earlier builds."""
+        self.fragments = {}
+        self.rendered = {}
+        tree = parse.parse_code(program)
+        if self.optimize:
+            tree, _ = fold.fold(tree)
+        self.parsed = len(tree.statements)
+        return llvm.generate(
+            tree, self.file_name, self.ssa, self.optimization, self.target
+        )
@@ -0,0 +1,173 @@
+"""Executes LLVM in this process with llvmlite, instead of compiling a binary with clang.
+
+llvmlite is optional: it is only imported when a Jit is created.
+"""
+from __future__ import annotations
+import collections
+import ctypes
+import hashlib
+import os
+import sys
+import tempfile
+import threading
+from typing import Any, Callable
+
+from compiler.generate import llvm
+
+DEFAULT_MAX_MODULES = 64
+
+# Programs print by writing to file descriptor 1, so only one program may run while it is redirected
+OUTPUT_LOCK = threading.Lock()
+INITIALIZE_LOCK = threading.Lock()
+initialized = False
+
+
+def binding() -> Any:
+    """Returns llvmlite.binding, initializing the native target the first time.
+
+    throws:
+        ImportError: If llvmlite is not installed.
+    """
+    global initialized
+    try:
+        from llvmlite import binding
+    except ImportError as error:
+        raise ImportError(
+            "The jit backend requires llvmlite to be installed"
+        ) from error
+    with INITIALIZE_LOCK:
+        if not initialized:
+            binding.initialize_native_target()
+            binding.initialize_native_asmprinter()
+            initialized = True
+    return binding
+
+
+def available() -> bool:
+    """Returns whether llvmlite is installed."""
+    try:
+        binding()
+    except ImportError:
+        return False
+    return True
+
+
+class Jit:
+    """Compiles LLVM modules in memory with MCJIT and runs their main function.
+
+    Compiled modules are kept, keyed by a hash of their code, so running the same code again skips compilation.
+    Once more than max_modules are kept, the least recently used is released.
+
+    Programs print to file descriptor 1, which run redirects for the whole process while a program runs. Anything
+    another thread writes to stdout meanwhile, through Python or C, is captured into the program's output instead of
+    being printed. Don't run programs while other threads are printing.
+
+    Attributes:
+        hits: The number of runs which reused a compiled module.
+        misses: The number of runs which compiled a module.
+    """
+
+    def __init__(self, max_modules: int = DEFAULT_MAX_MODULES) -> None:
+        self.binding = binding()
+        self.target = self.binding.Target.from_default_triple()
+        self.max_modules = max_modules
+        self.modules: collections.OrderedDict[
+            str, tuple[Any, Callable[[], int]]
+        ] = collections.OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def compile(self, llvm_code: str) -> tuple[Any, Callable[[], int]]:
+        """Returns the execution engine and main function of llvm_code, compiling it unless it was compiled before.
+
+        main points into code owned by the engine, which is freed once nothing refers to the engine. Keep the engine
+        until main returns, since another thread may release the module meanwhile.
+        """
+        key = hashlib.sha256(llvm_code.encode()).hexdigest()
+        with self.lock:
+            if key in self.modules:
+                self.modules.move_to_end(key)
+                self.hits += 1
+                return self.modules[key]
+            self.misses += 1
+
+            module = self.binding.parse_assembly(llvm_code)
+            module.verify()
+            # An engine owns its target machine and frees it with itself, so each needs its own
+            target_machine = self.target.create_target_machine()
+            # Generated code names a fixed data layout, which must match the target machine
+            module.data_layout = str(target_machine.target_data)
+            engine = self.binding.create_mcjit_compiler(module, target_machine)
+            engine.finalize_object()
+            main = ctypes.CFUNCTYPE(ctypes.c_int)(engine.get_function_address("main"))
+
+            self.modules[key] = (engine, main)
+            if len(self.modules) > self.max_modules:
+                self.modules.popitem(last=False)
+            return engine, main
+
+    def run(self, llvm_code: str | llvm.Llvm) -> tuple[str, int]:
+        """Runs the main function of llvm_code.
+
+        A program which crashes, for example by dividing by zero, takes this process down with it.
+
+        Returns the output of the program and the value main returned.
+        """
+        if not isinstance(llvm_code, str):
+            llvm_code = llvm_code.generate()
+        # Holding the engine keeps main's code alive even if its module is released
+        engine, main = self.compile(llvm_code)
+        with OUTPUT_LOCK:
+            return capture_output(main)
+
+
+def capture_output(function: Callable[[], int]) -> tuple[str, int]:
+    """Calls function with file descriptor 1 redirected to a temporary file, so output from C code is captured.
+
+    The redirection applies to every thread in the process, so their output is captured too.
+
+    Returns the captured output and the result of function.
+    """
+    libc = ctypes.CDLL(None)
+    sys.stdout.flush()
+    libc.fflush(None)
+    saved = os.dup(1)
+    with tempfile.TemporaryFile() as output:
+        os.dup2(output.fileno(), 1)
+        try:
+            result = function()
+            libc.fflush(None)
+        finally:
+            os.dup2(saved, 1)
+            os.close(saved)
+        output.seek(0)
+        return output.read().decode(), result
+
+
+DEFAULT_JIT: Jit | None = None
+DEFAULT_JIT_LOCK = threading.Lock()
+
+
+def default_jit() -> Jit:
+    """Returns the Jit shared by execute, creating it on first use.
+
+    throws:
+        ImportError: If llvmlite is not installed.
+    """
+    global DEFAULT_JIT
+    with DEFAULT_JIT_LOCK:
+        if DEFAULT_JIT is None:
+            DEFAULT_JIT = Jit()
+        return DEFAULT_JIT
+
+
+def execute(llvm_code: str | llvm.Llvm) -> str:
+    """Executes LLVM code in this process, like llvm.execute.
+
+    Returns the output of the program as a string.
+
+    throws:
+        ImportError: If llvmlite is not installed.
+    """
+    return default_jit().run(llvm_code)[0].strip()
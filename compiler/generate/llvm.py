@@ -1,52 +1,148 @@
 from __future__ import annotations
 
+from typing import Iterable, TextIO, TYPE_CHECKING
+
+from compiler.generate import target as target_module
 from compiler.parse import node
 from compiler.utils import str_utils
-import os
-import subprocess
+import io
+
+if TYPE_CHECKING:
+    from compiler.generate import llvm_visitor
 
+# The optimization levels clang accepts, as in -O0 to -O3
+OPTIMIZATION_LEVELS = range(4)
 
-def generate(node: node.Node, file_name: str = "temp.c") -> str:
+
+def generate(
+    node: node.Node,
+    file_name: str = "temp.c",
+    ssa: bool = False,
+    optimization: int = 0,
+    target: target_module.Target = target_module.BASELINE,
+) -> str:
     """
     Converts a Node into LLVM.
 
     Args:
         file_name: Used as a global identifier.
+        ssa: Whether to keep intermediate values in virtual registers rather than in stack slots.
+        optimization: The level the code will be compiled at. At 0 functions are marked optnone, so clang and opt
+            leave them alone even when asked to optimize.
+        target: The machine to tune for, e.g. target.detect() for the host.
+
+    throws:
+        ValueError: If optimization is not in OPTIMIZATION_LEVELS.
     """
-    return Llvm(file_name, node).generate()
+    return Llvm(file_name, node, ssa, optimization, target).generate()
 
 
-def execute(llvm_code: str) -> str:
+def write(
+    node: node.Node,
+    stream: TextIO,
+    file_name: str = "temp.c",
+    ssa: bool = False,
+    optimization: int = 0,
+    target: target_module.Target = target_module.BASELINE,
+) -> None:
+    """Converts a Node into LLVM, writing it to stream as it is generated.
+
+    Args:
+        file_name: Used as a global identifier.
+        ssa: Whether to keep intermediate values in virtual registers rather than in stack slots.
+        optimization: The level the code will be compiled at, as for generate.
+        target: The machine to tune for.
+
+    throws:
+        ValueError: If optimization is not in OPTIMIZATION_LEVELS.
     """
-    Executes LLVM code using clang.
+    Llvm(file_name, node, ssa, optimization, target).write(stream)
+
+
+def execute(
+    llvm_code: str | Llvm, optimization: int | None = None, passes: str | None = None
+) -> str:
+    """
+    Executes LLVM code using clang, in a temporary directory of its own.
+    Binaries are reused from cache.default_cache() when the same code was compiled before.
+
+    llvm_code may be an Llvm, in which case it is written straight to clang's stdin as it is generated.
+    Use sandbox.run for timeouts and the exit code and timings of the program.
+
+    Args:
+        optimization: The level to compile at. Defaults to the level of llvm_code if it is an Llvm, otherwise 0.
+            Code generated at level 0 is not optimized at any level.
+        passes: A pipeline of passes for opt to run before clang, such as "mem2reg,instcombine".
 
     Returns the piped output of the program as a string.
+
+    throws:
+        sandbox.CompileError: If clang or opt fails.
+        ValueError: If optimization is not in OPTIMIZATION_LEVELS.
     """
-    subprocess.run(
-        ["clang", "-x", "ir", "-o", "temp.out", "-"],
-        input=llvm_code.encode(),
-    )
-    return subprocess.run(
-        ["./temp.out"],
-        capture_output=True,
-        text=True,
+    from compiler.generate import cache, sandbox
+
+    if optimization is None:
+        optimization = llvm_code.optimization if isinstance(llvm_code, Llvm) else 0
+    return sandbox.run(
+        llvm_code,
+        flags=optimization_flags(optimization),
+        cache=cache.default_cache(),
+        passes=passes,
     ).stdout.strip()
 
 
+def optimization_flags(optimization: int) -> list[str]:
+    """Returns the clang arguments which compile at an optimization level.
+
+    throws:
+        ValueError: If optimization is not in OPTIMIZATION_LEVELS.
+    """
+    check_optimization(optimization)
+    return ["-O{}".format(optimization)]
+
+
+def check_optimization(optimization: int) -> None:
+    """Checks that optimization is a level clang accepts.
+
+    throws:
+        ValueError: If optimization is not in OPTIMIZATION_LEVELS.
+    """
+    if optimization not in OPTIMIZATION_LEVELS:
+        raise ValueError(
+            "Optimization level must be one of {}, got: {}".format(
+                list(OPTIMIZATION_LEVELS), optimization
+            )
+        )
+
+
 class Llvm:
-    def __init__(self, file_name: str, node: node.Node) -> None:
+    def __init__(
+        self,
+        file_name: str,
+        node: node.Node,
+        ssa: bool = False,
+        optimization: int = 0,
+        target: target_module.Target = target_module.BASELINE,
+    ) -> None:
+        check_optimization(optimization)
         self.file_name = file_name
         self.node = node
+        self.ssa = ssa
+        self.optimization = optimization
+        self.target = target
 
         self.print_int_called = False
+        self.printf_declared = False
 
         self.virtual_register_count = 1
 
         self.constants: list[str] = []
-        self.body: list[str] = []
+        self.body = IndentedWriter(io.StringIO())
 
         self.attr_index = 0
         self.attributes: list[Attribute] = []
+        self.function_attribute: int | None = None
 
         self.declarations: list[str] = []
 
@@ -64,54 +160,78 @@ class Llvm:
         return index
 
     def generate(self) -> str:
-        from compiler.generate import llvm_visitor
+        stream = io.StringIO()
+        self.write(stream)
+        return stream.getvalue()
 
-        llvm_visitor.LlvmVisitor(self).visit(self.node)
+    def write(self, stream: TextIO) -> None:
+        """Writes the LLVM program to stream.
 
-        # Body should come first to ensure state is ready for generation
-        body = self.make_body()
+        Instructions are written as they are generated, so the body of main is never held in memory.
+        Globals, declarations and attributes are only known once the body has been generated, so they follow main.
+        """
+        stream.write(self.preamble())
+        stream.write("\n")
+        self.write_function(stream, "main", self.node)
+        self.write_globals(stream)
 
-        return "\n".join(
-            [
-                self.preamble(),
-                self.make_constants(),
-                self.main(body),
-                self.make_declarations(),
-                self.make_attributes(),
-                self.postamble(),
-            ]
-        )
+    def make_visitor(self) -> llvm_visitor.LlvmVisitor:
+        """Returns a visitor which appends the instructions for the nodes it visits to body."""
+        from compiler.generate import llvm_visitor
+
+        if self.ssa:
+            return llvm_visitor.SsaLlvmVisitor(self)
+        return llvm_visitor.LlvmVisitor(self)
+
+    def write_function(self, stream: TextIO, name: str, node: node.Node) -> None:
+        """Writes a function called name which runs node and returns 0."""
+        self.virtual_register_count = 1
+        stream.write(self.function_header(name))
+        self.body = IndentedWriter(stream)
+        self.make_visitor().visit(node)
+        self.body.append("ret i32 0")
+        stream.write("}\n")
+
+    def write_globals(self, stream: TextIO) -> None:
+        """Writes the constants, declarations and attributes used by the functions written so far."""
+        for section in [
+            self.make_constants(),
+            self.make_declarations(),
+            self.make_attributes(),
+            self.postamble(),
+        ]:
+            stream.write("\n")
+            stream.write(section)
 
     def preamble(self) -> str:
         """Generates the preamble of the LLVM program"""
         return str_utils.end_join(
             "; ModuleID = '{}'".format(self.file_name),
             'source_filename = "{}"'.format(self.file_name),
-            'target datalayout = "e-m:e-p270:32:32-p271:32:32-p272:64:64-i64:64-f80:128-n8:16:32:64-S128"',
-            'target triple = "x86_64-pc-linux-gnu"',
+            'target datalayout = "{}"'.format(self.target.datalayout),
+            'target triple = "{}"'.format(self.target.triple),
         )
 
     def make_constants(self) -> str:
         return str_utils.end_join(*self.constants)
 
-    def main(self, body: str, add_return: bool = True) -> str:
-        """Generates code for the main function.
+    def function_header(self, name: str) -> str:
+        """Generates the start of a function, up to its body. All functions share one attribute group.
 
-        Args:
-            body: The body of the function.
-            add_return: Whether to append a return statement to body.
+        Unless optimizing, functions are marked noinline and optnone, like clang does at -O0.
         """
-        if add_return:
-            body = body + "ret i32 0"
-
-        args = ["noinline", "nounwind", "optnone", "uwtable"]
-        index = self.add_attribute(Attribute(args, {"min-legal-vector-width": "0"}))
+        if self.optimization == 0:
+            args = ["noinline", "nounwind", "optnone", "uwtable"]
+        else:
+            args = ["nounwind", "uwtable"]
+        if self.function_attribute is None:
+            self.function_attribute = self.add_attribute(
+                Attribute(args, {"min-legal-vector-width": "0"}, target=self.target)
+            )
 
         return str_utils.end_join(
             "; Function Attrs: {}".format(" ".join(args)),
-            "define dso_local i32 @main() #{} {{".format(index),
-            str_utils.indent(body),
-            "}",
+            "define dso_local i32 @{}() #{} {{".format(name, self.function_attribute),
         )
 
     def make_attributes(self) -> str:
@@ -134,30 +254,60 @@ class Llvm:
         )
 
     def print_int(self, register: int) -> str:
-        if not self.print_int_called:
-            index = self.add_attribute(Attribute())
-
-            self.constants.append(
-                '@.str = private unnamed_addr constant [4 x i8] c"%d\\0A\\00", align 1',
-            )
-
-            self.declarations.append(
-                "declare i32 @printf(ptr noundef, ...) #{}".format(index)
-            )
-            self.print_int_called = True
+        """Returns code printing the i32 stored at the pointer in register."""
         temp_register = self.reserve_virtual_register()
-        out_register = self.reserve_virtual_register()
         return "\n".join(
             [
                 "%{} = load i32, ptr %{}, align 4".format(temp_register, register),
-                "%{} = call i32 (ptr, ...) @printf(ptr noundef @.str, i32 noundef %{})".format(
-                    out_register, temp_register
-                ),
+                self.print_int_value("%{}".format(temp_register)),
             ]
         )
 
-    def make_body(self) -> str:
-        return str_utils.end_join(*self.body)
+    def print_int_value(self, value: str) -> str:
+        """Returns code printing value, an i32 register such as %3 or an immediate."""
+        self.declare_print_int()
+        out_register = self.reserve_virtual_register()
+        return "%{} = call i32 (ptr, ...) @printf(ptr noundef @.str, i32 noundef {})".format(
+            out_register, value
+        )
+
+    def declare_print_int(self) -> None:
+        """Declares printf and the format string used to print integers, once."""
+        if self.print_int_called:
+            return
+        self.declare_printf()
+        self.constants.append(
+            '@.str = private unnamed_addr constant [4 x i8] c"%d\\0A\\00", align 1',
+        )
+        self.print_int_called = True
+
+    def declare_printf(self) -> None:
+        """Declares printf, once."""
+        if self.printf_declared:
+            return
+        index = self.add_attribute(Attribute(target=self.target))
+        self.declarations.append(
+            "declare i32 @printf(ptr noundef, ...) #{}".format(index)
+        )
+        self.printf_declared = True
+
+
+class IndentedWriter:
+    """Writes lines of a function body to a stream, indenting each one."""
+
+    def __init__(self, stream: TextIO) -> None:
+        self.stream = stream
+
+    def append(self, line: str) -> None:
+        """Writes line, which may contain several lines separated by newlines."""
+        self.stream.write("  ")
+        self.stream.write(line.replace("\n", "\n  "))
+        self.stream.write("\n")
+
+    def extend(self, lines: Iterable[str]) -> None:
+        """Writes each line."""
+        for line in lines:
+            self.append(line)
 
 
 class Attribute:
@@ -165,9 +315,6 @@ class Attribute:
         "stack-protector-buffer-size": "8",
         "frame-pointer": "all",
         "no-trapping-math": "true",
-        "target-cpu": "x86-64",
-        "target-features": "+cmov,+cx8,+fxsr,+mmx,+sse,+sse2,+x87",
-        "tune-cpu": "generic",
     }
 
     def __init__(
@@ -175,12 +322,19 @@ class Attribute:
         args: list[str] = [],
         pairs: dict[str, str] = {},
         add_default_pairs: bool = True,
+        target: target_module.Target | None = target_module.BASELINE,
     ) -> None:
+        """
+        Args:
+            target: The machine whose CPU and features are added to the pairs, or None to add neither.
+        """
         self.index = None
         self.args = args
-        self.pairs = pairs
+        self.pairs = dict(pairs)
         if add_default_pairs:
             self.pairs.update(Attribute.DEFAULT_PAIRS)
+        if target is not None:
+            self.pairs.update(target.attribute_pairs())
 
     def set_index(self, index: int) -> None:
         self.index = index
@@ -1,37 +1,77 @@
-from compiler.parse import visitor, expression
+from compiler.parse import statement, visitor, expression
 from compiler.generate import llvm
 
 
-class LlvmVisitor(visitor.Visitor):
+def check_print(node: expression.Call) -> None:
+    """Checks that node, a call of print, has a value to print.
+
+    throws:
+        ValueError: If node has no arguments.
+    """
+    if not node.arguments:
+        raise ValueError("print requires an argument")
+
+
+class LlvmVisitor(visitor.PostOrderVisitor):
+    """Generates LLVM for each node after its children.
+
+    The register holding the value of each visited expression is kept on a stack.
+    Calls evaluate to their last argument, or 0 if they have no arguments.
+    """
+
     def __init__(self, llvm: llvm.Llvm) -> None:
         self.llvm = llvm
-        self.out_register = 0
+        self.registers: list[int] = []
 
     def visit_call(self, node: expression.Call) -> None:
-        # Print the last register... kinda dubious
+        count = len(node.arguments)
+        registers = self.registers[len(self.registers) - count :]
+        del self.registers[len(self.registers) - count :]
+
+        # Print the first argument... kinda dubious
         if node.id.value == "print":
-            register = self.visit(node.arguments[0]).out_register
-            self.llvm.body.append(self.llvm.print_int(register))
+            check_print(node)
+            self.llvm.body.append(self.llvm.print_int(registers[0]))
+
+        if registers:
+            self.registers.append(registers[-1])
+        else:
+            self.registers.append(self.alloca_constant(0))
+
+    def visit_statement(self, node: statement.Statement) -> None:
+        self.registers.pop()
 
     def visit_integer_node(self, node: expression.IntegerNode) -> None:
-        self.out_register = self.llvm.reserve_virtual_register()
+        self.registers.append(self.alloca_constant(node.value))
+
+    def visit_id_node(self, node: expression.IdNode) -> None:
+        raise ValueError(
+            "Identifiers are not supported by the llvm backend, got: {}".format(
+                node.value
+            )
+        )
+
+    def alloca_constant(self, value: int) -> int:
+        """Stores value in a new stack slot, returning its register."""
+        register = self.llvm.reserve_virtual_register()
         self.llvm.body.extend(
             [
-                "%{} = alloca i32, align 4".format(self.out_register),
-                "store i32 {}, ptr %{}, align 4".format(node.value, self.out_register),
+                "%{} = alloca i32, align 4".format(register),
+                "store i32 {}, ptr %{}, align 4".format(value, register),
             ]
         )
+        return register
 
     def visit_op_helper(
         self, node: expression.BinaryOperation, op_name: str, nsw: bool = True
     ) -> None:
-        left_register = self.visit(node.left).out_register
-        right_register = self.visit(node.right).out_register
+        right_register = self.registers.pop()
+        left_register = self.registers.pop()
 
         temp_left_register = self.llvm.reserve_virtual_register()
         temp_right_register = self.llvm.reserve_virtual_register()
         op_register = self.llvm.reserve_virtual_register()
-        self.out_register = self.llvm.reserve_virtual_register()
+        out_register = self.llvm.reserve_virtual_register()
 
         self.llvm.body.extend(
             [
@@ -48,12 +88,11 @@ class LlvmVisitor(visitor.Visitor):
                     temp_left_register,
                     temp_right_register,
                 ),
-                "%{} = alloca i32, align 4".format(self.out_register),
-                "store i32 %{}, ptr %{}, align 4".format(
-                    op_register, self.out_register
-                ),
+                "%{} = alloca i32, align 4".format(out_register),
+                "store i32 %{}, ptr %{}, align 4".format(op_register, out_register),
             ]
         )
+        self.registers.append(out_register)
 
     def visit_add(self, node: expression.Add) -> None:
         self.visit_op_helper(node, "add")
@@ -66,3 +105,46 @@ class LlvmVisitor(visitor.Visitor):
 
     def visit_divide(self, node: expression.Divide) -> None:
         self.visit_op_helper(node, "udiv", False)
+
+
+class SsaLlvmVisitor(LlvmVisitor):
+    """Generates LLVM which keeps intermediate values in virtual registers instead of stack slots.
+
+    Integer literals are used as immediates and the result of each operation is passed directly to its user,
+    so each operation is a single instruction. The value of each visited expression is kept on a stack, as an
+    operand such as %3 or 5.
+    """
+
+    def __init__(self, llvm: llvm.Llvm) -> None:
+        super().__init__(llvm)
+        self.values: list[str] = []
+
+    def visit_call(self, node: expression.Call) -> None:
+        count = len(node.arguments)
+        values = self.values[len(self.values) - count :]
+        del self.values[len(self.values) - count :]
+
+        if node.id.value == "print":
+            check_print(node)
+            self.llvm.body.append(self.llvm.print_int_value(values[0]))
+
+        self.values.append(values[-1] if values else "0")
+
+    def visit_statement(self, node: statement.Statement) -> None:
+        self.values.pop()
+
+    def visit_integer_node(self, node: expression.IntegerNode) -> None:
+        self.values.append(str(node.value))
+
+    def visit_op_helper(
+        self, node: expression.BinaryOperation, op_name: str, nsw: bool = True
+    ) -> None:
+        right = self.values.pop()
+        left = self.values.pop()
+        register = self.llvm.reserve_virtual_register()
+        self.llvm.body.append(
+            "%{} = {} {}i32 {}, {}".format(
+                register, op_name, "nsw " if nsw else "", left, right
+            )
+        )
+        self.values.append("%{}".format(register))
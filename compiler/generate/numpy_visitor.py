@@ -0,0 +1,120 @@
+"""Evaluates a program over many bindings of its identifiers at once, using NumPy arrays.
+
+NumPy is optional: it is only imported when a NumpyVisitor is created.
+"""
+from __future__ import annotations
+from typing import Any, Mapping, Sequence
+
+from compiler.parse import expression, node, statement, visitor
+
+
+def numpy() -> Any:
+    """Returns the numpy module.
+
+    throws:
+        ImportError: If NumPy is not installed.
+    """
+    try:
+        import numpy
+    except ImportError as error:
+        raise ImportError(
+            "Vectorized evaluation requires NumPy to be installed"
+        ) from error
+    return numpy
+
+
+def available() -> bool:
+    """Returns whether NumPy is installed."""
+    try:
+        numpy()
+    except ImportError:
+        return False
+    return True
+
+
+def evaluate(tree: node.Node, columns: Mapping[str, Sequence[int]]) -> list[Any]:
+    """Evaluates tree once for each row of columns, returning an int64 array of the values of each statement.
+
+    throws:
+        ValueError: If the columns have different lengths, or an identifier has no column.
+        ZeroDivisionError: If any row divides by zero.
+    """
+    return NumpyVisitor(columns).visit(tree).results
+
+
+class NumpyVisitor(visitor.PostOrderVisitor):
+    """Evaluates each statement over whole columns of bindings, appending an array of its values to results.
+
+    Identifiers evaluate to their column, so row i of each result is the value PythonVisitor gives with the bindings
+    in row i. Values are int64 arrays, with these semantics:
+        - Add, Subtract and Multiply wrap around on overflow, where PythonVisitor's results would grow instead.
+        - Divide is floor division, rounding towards negative infinity like Python's //.
+        - Dividing by zero in any row raises ZeroDivisionError, like PythonVisitor.
+        - Calls evaluate to their last argument, or 0 if they have no arguments.
+
+    Attributes:
+        columns: The value of each identifier in each row, as int64 arrays.
+        rows: The number of rows.
+        results: The values of each statement, one int64 array of length rows per statement.
+    """
+
+    def __init__(self, columns: Mapping[str, Sequence[int]]) -> None:
+        self.np = numpy()
+        self.columns = {
+            name: self.np.asarray(column, dtype=self.np.int64)
+            for name, column in columns.items()
+        }
+        lengths = {len(column) for column in self.columns.values()}
+        if len(lengths) > 1:
+            raise ValueError(
+                "Columns must have the same length, got lengths: {}".format(
+                    sorted(lengths)
+                )
+            )
+        self.rows = lengths.pop() if lengths else 1
+        self.results: list[Any] = []
+        # Literals are kept as int64 scalars, which broadcast against columns
+        self.values: list[Any] = []
+
+    def visit(self, node: node.Node) -> NumpyVisitor:
+        # Operations on int64 scalars warn when they overflow, rather than wrapping silently like arrays
+        with self.np.errstate(over="ignore"):
+            return super().visit(node)
+
+    def visit_statement(self, node: statement.Statement) -> None:
+        value = self.values.pop()
+        self.results.append(
+            self.np.broadcast_to(value, (self.rows,)).astype(self.np.int64)
+        )
+
+    def visit_call(self, node: expression.Call) -> None:
+        count = len(node.arguments)
+        result = self.values[-1] if count else self.np.int64(0)
+        del self.values[len(self.values) - count :]
+        self.values.append(result)
+
+    def visit_integer_node(self, node: expression.IntegerNode) -> None:
+        self.values.append(self.np.int64(node.value))
+
+    def visit_id_node(self, node: expression.IdNode) -> None:
+        if node.value not in self.columns:
+            raise ValueError("Unbound identifier: {}".format(node.value))
+        self.values.append(self.columns[node.value])
+
+    def visit_add(self, node: expression.Add) -> None:
+        right = self.values.pop()
+        self.values.append(self.np.add(self.values.pop(), right))
+
+    def visit_subtract(self, node: expression.Subtract) -> None:
+        right = self.values.pop()
+        self.values.append(self.np.subtract(self.values.pop(), right))
+
+    def visit_multiply(self, node: expression.Multiply) -> None:
+        right = self.values.pop()
+        self.values.append(self.np.multiply(self.values.pop(), right))
+
+    def visit_divide(self, node: expression.Divide) -> None:
+        right = self.values.pop()
+        if not self.np.all(right):
+            raise ZeroDivisionError("integer division by zero")
+        self.values.append(self.np.floor_divide(self.values.pop(), right))
@@ -0,0 +1,158 @@
+"""Generates Python source from an AST and compiles it with CPython, evaluating like PythonVisitor."""
+from __future__ import annotations
+import functools
+import types
+from typing import Callable
+
+from compiler.parse import expression, node, statement, visitor
+
+# Expressions nested deeper than this are assigned to temporaries, keeping CPython's parser and compiler from
+# recursing too deeply
+MAX_DEPTH = 50
+CODE_CACHE_SIZE = 128
+FUNCTION_NAME = "program"
+
+# Maps each operation to its Python operator
+OPERATORS: dict[type[expression.BinaryOperation], str] = {
+    expression.Add: "+",
+    expression.Subtract: "-",
+    expression.Multiply: "*",
+    expression.Divide: "//",
+}
+
+
+def generate(tree: node.Node) -> str:
+    """Returns the source of a Python function which evaluates tree.
+
+    The function takes print, which is called with the arguments of each print call and returns the last one,
+    and append, which is called with the value of each statement.
+    """
+    return PythonCodegen().visit(tree).source()
+
+
+@functools.lru_cache(maxsize=CODE_CACHE_SIZE)
+def compile_source(source: str) -> types.CodeType:
+    """Compiles source, reusing the code object when the same source was compiled before."""
+    return compile(source, "<program>", "exec")
+
+
+def compile_node(tree: node.Node) -> CompiledProgram:
+    """Generates and compiles the Python function which evaluates tree."""
+    namespace: dict[str, object] = {}
+    exec(compile_source(generate(tree)), namespace)
+    return CompiledProgram(namespace[FUNCTION_NAME])
+
+
+def evaluate(tree: node.Node) -> list[int]:
+    """Compiles and runs tree, returning the value of each statement like PythonVisitor.results."""
+    return compile_node(tree).run()
+
+
+class CompiledProgram:
+    """A program compiled to a Python function, which can be run any number of times."""
+
+    def __init__(self, function: Callable[..., None]) -> None:
+        self.function = function
+
+    def run(self, output: list[int] | None = None) -> list[int]:
+        """Runs the program, returning the value of each statement.
+
+        Args:
+            output: Collects the value printed by each print call, if given.
+
+        throws:
+            ZeroDivisionError: If the program divides by zero.
+        """
+        results: list[int] = []
+        printed = output if output is not None else []
+
+        def print_values(*values: int) -> int:
+            printed.append(values[0])
+            return values[-1]
+
+        self.function(print_values, results.append)
+        return results
+
+
+class PythonCodegen(visitor.PostOrderVisitor):
+    """Generates the source of each expression after those of its children.
+
+    Each pending expression is kept on a stack with its nesting depth and whether it is trivial, meaning a literal
+    or temporary which can be evaluated at any time. When an expression gets too deep it is assigned to a
+    temporary, after first assigning every non-trivial expression pending before it, so expressions are still
+    evaluated in the same order.
+    """
+
+    def __init__(self) -> None:
+        self.lines: list[str] = ["def {}(print, append):".format(FUNCTION_NAME)]
+        self.expressions: list[tuple[str, int, bool]] = []
+        # Every expression below this index is trivial
+        self.trivial_height = 0
+        self.temporary_count = 0
+
+    def source(self) -> str:
+        return "\n    ".join(self.lines) + "\n    pass\n"
+
+    def push(self, source: str, depth: int) -> None:
+        if depth <= MAX_DEPTH:
+            self.expressions.append((source, depth, False))
+            return
+        for index in range(self.trivial_height, len(self.expressions)):
+            pending, _, trivial = self.expressions[index]
+            if not trivial:
+                self.expressions[index] = (self.assign(pending), 1, True)
+        self.expressions.append((self.assign(source), 1, True))
+        self.trivial_height = len(self.expressions)
+
+    def assign(self, source: str) -> str:
+        """Assigns source to a new temporary, returning its name."""
+        name = "t{}".format(self.temporary_count)
+        self.temporary_count += 1
+        self.lines.append("{} = {}".format(name, source))
+        return name
+
+    def pop(self, count: int) -> tuple[list[str], int]:
+        """Pops the top count expressions, returning their sources and greatest depth."""
+        height = len(self.expressions) - count
+        entries = self.expressions[height:]
+        del self.expressions[height:]
+        self.trivial_height = min(self.trivial_height, height)
+        return [entry[0] for entry in entries], max(
+            (entry[1] for entry in entries), default=0
+        )
+
+    def visit_statement(self, node: statement.Statement) -> None:
+        (source,), _ = self.pop(1)
+        self.lines.append("append({})".format(source))
+
+    def visit_call(self, node: expression.Call) -> None:
+        if len(node.arguments) == 1 and node.id.value != "print":
+            # The call evaluates to its argument, which is already on the stack
+            return
+        arguments, depth = self.pop(len(node.arguments))
+        if not arguments:
+            self.expressions.append(("0", 1, True))
+        elif node.id.value == "print":
+            self.push("print({})".format(", ".join(arguments)), depth + 1)
+        else:
+            # Every argument is evaluated, and the call evaluates to the last one
+            self.push("({})[-1]".format(", ".join(arguments)), depth + 1)
+
+    def visit_integer_node(self, node: expression.IntegerNode) -> None:
+        self.expressions.append((str(node.value), 1, True))
+
+    def visit_id_node(self, node: expression.IdNode) -> None:
+        raise ValueError(
+            "Identifiers are not supported by the python_codegen backend, got: {}".format(
+                node.value
+            )
+        )
+
+    def visit_binary_operation(self, node: expression.BinaryOperation) -> None:
+        right, right_depth, _ = self.expressions.pop()
+        left, left_depth, _ = self.expressions.pop()
+        self.trivial_height = min(self.trivial_height, len(self.expressions))
+        self.push(
+            "({} {} {})".format(left, OPERATORS[type(node)], right),
+            max(left_depth, right_depth) + 1,
+        )
@@ -2,33 +2,52 @@
 from compiler.parse import statement, visitor, node, expression
 
 
-class PythonVisitor(visitor.Visitor):
-    def __init__(self) -> None:
+class PythonVisitor(visitor.PostOrderVisitor):
+    """Evaluates each statement, appending its value to results.
+
+    Nodes are visited after their children, so intermediate values are kept on a stack rather than in recursive calls.
+    Calls evaluate to their last argument, or 0 if they have no arguments.
+    Identifiers evaluate to their value in bindings.
+    """
+
+    def __init__(self, bindings: dict[str, int] | None = None) -> None:
+        self.bindings = bindings or {}
         self.node_count = 0
         self.results: list[int] = []
+        self.values: list[int] = []
 
     def visit_node(self, _: node.Node) -> None:
         self.node_count += 1
 
     def visit_statement(self, node: statement.Statement) -> None:
-        self.result = 0
-        self.results.append(self.visit(node.expression).result)
+        self.results.append(self.values.pop())
+
+    def visit_call(self, node: expression.Call) -> None:
+        count = len(node.arguments)
+        result = self.values[-1] if count else 0
+        del self.values[len(self.values) - count :]
+        self.values.append(result)
 
     def visit_integer_node(self, node: expression.IntegerNode) -> None:
-        self.result = node.value
+        self.values.append(node.value)
 
-    # # override binary operation to prevent default behavior
-    def visit_binary_operation(self, node: expression.BinaryOperation) -> None:
-        ...
+    def visit_id_node(self, node: expression.IdNode) -> None:
+        if node.value not in self.bindings:
+            raise ValueError("Unbound identifier: {}".format(node.value))
+        self.values.append(self.bindings[node.value])
 
     def visit_add(self, node: expression.Add) -> None:
-        self.result = self.visit(node.left).result + self.visit(node.right).result
+        right = self.values.pop()
+        self.values.append(self.values.pop() + right)
 
     def visit_subtract(self, node: expression.Subtract) -> None:
-        self.result = self.visit(node.left).result - self.visit(node.right).result
+        right = self.values.pop()
+        self.values.append(self.values.pop() - right)
 
     def visit_multiply(self, node: expression.Multiply) -> None:
-        self.result = self.visit(node.left).result * self.visit(node.right).result
+        right = self.values.pop()
+        self.values.append(self.values.pop() * right)
 
     def visit_divide(self, node: expression.Divide) -> None:
-        self.result = self.visit(node.left).result // self.visit(node.right).result
+        right = self.values.pop()
+        self.values.append(self.values.pop() // right)
@@ -0,0 +1,288 @@
+"""Compiles LLVM with clang and runs the result in a private directory, so many programs can run at once."""
+from __future__ import annotations
+import dataclasses
+import io
+import os
+import subprocess
+import tempfile
+import threading
+import time
+from typing import IO, Sequence, TYPE_CHECKING
+
+from compiler.generate import cache as cache_module
+from compiler.utils import instrument
+
+if TYPE_CHECKING:
+    from compiler.generate import llvm
+
+DEFAULT_COMPILER = "clang"
+DEFAULT_OPT = "opt"
+BINARY_NAME = "program"
+
+
+class CompileError(ValueError):
+    """Raised when the compiler or opt fails or times out.
+
+    Attributes:
+        returncode: The exit code of the compiler, or None if it timed out.
+        stderr: The error output of the compiler.
+    """
+
+    def __init__(self, message: str, returncode: int | None, stderr: str) -> None:
+        super().__init__(message)
+        self.returncode = returncode
+        self.stderr = stderr
+
+
+@dataclasses.dataclass
+class ExecutionResult:
+    """The outcome of compiling and running a program.
+
+    Attributes:
+        stdout: The output of the program.
+        stderr: The error output of the program.
+        returncode: The exit code of the program, negative if it was killed by a signal, or None if it timed out.
+        compile_seconds: The time taken to compile and link the program.
+        run_seconds: The time taken to run the program.
+    """
+
+    stdout: str
+    stderr: str
+    returncode: int | None
+    compile_seconds: float
+    run_seconds: float
+
+    @property
+    def timed_out(self) -> bool:
+        return self.returncode is None
+
+
+def run(
+    llvm_code: str | llvm.Llvm,
+    timeout: float | None = None,
+    compile_timeout: float | None = None,
+    flags: Sequence[str] = (),
+    compiler: str = DEFAULT_COMPILER,
+    cache: cache_module.Cache | None = None,
+    passes: str | None = None,
+    opt: str = DEFAULT_OPT,
+) -> ExecutionResult:
+    """Compiles llvm_code and runs it, each job in its own temporary directory.
+
+    Nothing is shared between calls, so run is safe to call from many threads or processes at once.
+
+    Args:
+        llvm_code: The program. An Llvm is written straight to the compiler's stdin as it is generated.
+        timeout: The most seconds the program may run for before it is killed, or None for no limit.
+        compile_timeout: The most seconds the compiler may run for, or None for no limit.
+        flags: Extra arguments for the compiler.
+        compiler: The compiler to run, which must accept clang's arguments.
+        cache: Where to look up the binary before compiling and store it after. An Llvm is generated in full
+            before compiling when a cache is given, since the key is a hash of the code.
+        passes: A pipeline of passes for opt to run on llvm_code before compiling it, in the syntax of
+            opt -passes, or None to skip opt. Passes skip functions marked optnone, which Llvm marks at level 0.
+        opt: The opt to run passes with.
+
+    throws:
+        CompileError: If the compiler or opt exits with an error or times out.
+    """
+    with tempfile.TemporaryDirectory(prefix="compiler-") as directory:
+        binary = os.path.join(directory, BINARY_NAME)
+        start = time.perf_counter()
+        with instrument.span("compile"):
+            compile_cached(
+                llvm_code,
+                binary,
+                directory,
+                compile_timeout,
+                flags,
+                compiler,
+                cache,
+                passes,
+                opt,
+            )
+        compile_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        try:
+            with instrument.span("run"):
+                process = subprocess.run(
+                    [binary],
+                    capture_output=True,
+                    text=True,
+                    timeout=timeout,
+                    cwd=directory,
+                )
+        except subprocess.TimeoutExpired as error:
+            return ExecutionResult(
+                decode(error.stdout),
+                decode(error.stderr),
+                None,
+                compile_seconds,
+                time.perf_counter() - start,
+            )
+        return ExecutionResult(
+            process.stdout,
+            process.stderr,
+            process.returncode,
+            compile_seconds,
+            time.perf_counter() - start,
+        )
+
+
+def compile_cached(
+    llvm_code: str | llvm.Llvm,
+    binary: str,
+    directory: str,
+    timeout: float | None = None,
+    flags: Sequence[str] = (),
+    compiler: str = DEFAULT_COMPILER,
+    cache: cache_module.Cache | None = None,
+    passes: str | None = None,
+    opt: str = DEFAULT_OPT,
+) -> None:
+    """Fetches the binary for llvm_code from cache into binary, or runs passes and compiles it and adds it to cache.
+
+    The pipeline and the opt which runs it are part of the key, so a hit skips opt as well as the compiler.
+
+    throws:
+        CompileError: If the compiler or opt exits with an error or times out.
+    """
+    if cache is None:
+        if passes is not None:
+            llvm_code = run_passes(llvm_code, passes, timeout, opt)
+        compile_binary(llvm_code, binary, directory, timeout, flags, compiler)
+        return
+    if not isinstance(llvm_code, str):
+        llvm_code = llvm_code.generate()
+    key_flags = list(flags)
+    if passes is not None:
+        key_flags.append("-passes=" + passes)
+    key = cache.key(llvm_code, key_flags, compiler, opt if passes is not None else None)
+    if key is not None and cache.fetch(key, binary):
+        instrument.count("cache_hits")
+        return
+    instrument.count("cache_misses")
+    if passes is not None:
+        llvm_code = run_passes(llvm_code, passes, timeout, opt)
+    compile_binary(llvm_code, binary, directory, timeout, flags, compiler)
+    if key is not None:
+        cache.store(key, binary)
+
+
+def compile_binary(
+    llvm_code: str | llvm.Llvm,
+    binary: str,
+    directory: str,
+    timeout: float | None = None,
+    flags: Sequence[str] = (),
+    compiler: str = DEFAULT_COMPILER,
+) -> None:
+    """Compiles and links llvm_code into binary.
+
+    The compiler's output and error output are written to a file in directory rather than pipes, so they cannot
+    block while llvm_code is still being written to its stdin, and never reach the caller's stdout. llvm_code is
+    written from another thread, so timeout covers the whole call, even if the compiler stops reading its input.
+
+    throws:
+        CompileError: If the compiler exits with an error or times out.
+    """
+    command = [compiler, "-x", "ir", *flags, "-o", binary, "-"]
+    with open(os.path.join(directory, "compiler.stderr"), "w+") as stderr:
+        with subprocess.Popen(
+            command, stdin=subprocess.PIPE, stdout=stderr, stderr=stderr, cwd=directory
+        ) as process:
+            failures: list[BaseException] = []
+            writer = threading.Thread(
+                target=write_input, args=(process.stdin, llvm_code, failures)
+            )
+            writer.start()
+            try:
+                returncode = process.wait(timeout)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+                returncode = None
+            writer.join()
+        stderr.seek(0)
+        errors = stderr.read()
+
+    if failures:
+        # Generating llvm_code failed
+        raise failures[0]
+    if returncode is None:
+        raise CompileError(
+            "{} timed out after {} seconds".format(compiler, timeout), None, errors
+        )
+    if returncode != 0:
+        raise CompileError(
+            "{} exited with status {}:\n{}".format(compiler, returncode, errors),
+            returncode,
+            errors,
+        )
+
+
+def write_input(
+    stdin: IO[bytes], llvm_code: str | llvm.Llvm, failures: list[BaseException]
+) -> None:
+    """Writes llvm_code to the compiler's stdin and closes it, adding any error other than a broken pipe to
+    failures."""
+    from compiler.generate import llvm
+
+    try:
+        with io.TextIOWrapper(stdin) as text:
+            if isinstance(llvm_code, llvm.Llvm):
+                llvm_code.write(text)
+            else:
+                text.write(llvm_code)
+    except BrokenPipeError:
+        # The compiler exited early, its error output says why
+        pass
+    except BaseException as error:
+        failures.append(error)
+
+
+def run_passes(
+    llvm_code: str | llvm.Llvm,
+    passes: str,
+    timeout: float | None = None,
+    opt: str = DEFAULT_OPT,
+) -> str:
+    """Runs a pipeline of passes over llvm_code with opt, returning the optimized LLVM.
+
+    throws:
+        CompileError: If opt exits with an error or times out.
+    """
+    if not isinstance(llvm_code, str):
+        llvm_code = llvm_code.generate()
+    try:
+        with instrument.span("opt"):
+            process = subprocess.run(
+                [opt, "-S", "-passes=" + passes],
+                input=llvm_code,
+                capture_output=True,
+                text=True,
+                timeout=timeout,
+            )
+    except subprocess.TimeoutExpired as error:
+        raise CompileError(
+            "{} timed out after {} seconds".format(opt, timeout),
+            None,
+            decode(error.stderr),
+        ) from None
+    if process.returncode != 0:
+        raise CompileError(
+            "{} exited with status {}:\n{}".format(
+                opt, process.returncode, process.stderr
+            ),
+            process.returncode,
+            process.stderr,
+        )
+    return process.stdout
+
+
+def decode(output: bytes | str | None) -> str:
+    """Returns the partial output of a process which timed out as a string."""
+    if isinstance(output, bytes):
+        return output.decode(errors="replace")
+    return output or ""
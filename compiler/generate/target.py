@@ -0,0 +1,175 @@
+"""Describes the machine generated code is tuned for, which can be a fixed baseline, the host, or an explicit CPU of
+the baseline's or another triple."""
+from __future__ import annotations
+import dataclasses
+import functools
+import re
+import subprocess
+
+from compiler.generate import sandbox
+
+# Passed to clang to find out what it targets
+PROBE_PROGRAM = "int main(void) { return 0; }\n"
+DATALAYOUT_REGEX = re.compile(r'^target datalayout = "([^"]*)"', re.MULTILINE)
+TRIPLE_REGEX = re.compile(r'^target triple = "([^"]*)"', re.MULTILINE)
+CPU_REGEX = re.compile(r'"target-cpu"="([^"]*)"')
+FEATURES_REGEX = re.compile(r'"target-features"="([^"]*)"')
+TUNE_CPU_REGEX = re.compile(r'"tune-cpu"="([^"]*)"')
+
+
+@dataclasses.dataclass(frozen=True)
+class Target:
+    """The triple, data layout, CPU and features written into a module.
+
+    Attributes:
+        triple: The target triple, e.g. x86_64-pc-linux-gnu.
+        datalayout: The data layout string for the triple.
+        cpu: The CPU instructions may be selected for, e.g. x86-64 or skylake.
+        features: The features enabled on top of those of cpu, e.g. +avx2,+fma, or "" for none.
+        tune_cpu: The CPU instructions are scheduled for.
+    """
+
+    triple: str
+    datalayout: str
+    cpu: str
+    features: str
+    tune_cpu: str = "generic"
+
+    def attribute_pairs(self) -> dict[str, str]:
+        """Returns the function attributes which select this target."""
+        pairs = {"target-cpu": self.cpu}
+        if self.features:
+            pairs["target-features"] = self.features
+        pairs["tune-cpu"] = self.tune_cpu
+        return pairs
+
+
+# The x86-64 baseline every 64-bit x86 machine supports
+BASELINE = Target(
+    "x86_64-pc-linux-gnu",
+    "e-m:e-p270:32:32-p271:32:32-p272:64:64-i64:64-f80:128-n8:16:32:64-S128",
+    "x86-64",
+    "+cmov,+cx8,+fxsr,+mmx,+sse,+sse2,+x87",
+)
+
+
+def explicit(cpu: str, features: str = "", base: Target = BASELINE) -> Target:
+    """Returns base tuned for cpu, with features enabled on top of those cpu has.
+
+    cpu must belong to the architecture of base's triple, which is x86-64 for BASELINE. Use for_triple to get a
+    base for another architecture.
+    """
+    return dataclasses.replace(base, cpu=cpu, features=features, tune_cpu=cpu)
+
+
+@functools.lru_cache(maxsize=None)
+def detect(compiler: str = sandbox.DEFAULT_COMPILER) -> Target:
+    """Returns the host, as clang -march=native sees it.
+
+    A tiny C program is compiled to LLVM, which names the host's triple, data layout, CPU and features. The result
+    is kept for each compiler, so clang is only run once.
+
+    throws:
+        sandbox.CompileError: If the compiler fails or does not name a target.
+    """
+    return probe(compiler, ["-march=native"])
+
+
+@functools.lru_cache(maxsize=None)
+def for_triple(triple: str, compiler: str = sandbox.DEFAULT_COMPILER) -> Target:
+    """Returns the default target of triple, e.g. aarch64-unknown-linux-gnu, with the data layout compiler uses
+    for it.
+
+    The result is kept for each triple and compiler, so clang is only run once.
+
+    throws:
+        sandbox.CompileError: If the compiler fails, for example because it cannot target triple, or does not name
+            a target.
+    """
+    return probe(compiler, ["--target=" + triple])
+
+
+def probe(compiler: str, flags: list[str]) -> Target:
+    """Compiles a tiny C program to LLVM with compiler and flags, returning the target the LLVM names.
+
+    throws:
+        sandbox.CompileError: If the compiler fails or does not name a target.
+    """
+    command = [compiler, *flags, "-S", "-emit-llvm", "-x", "c", "-o", "-", "-"]
+    try:
+        process = subprocess.run(
+            command, input=PROBE_PROGRAM, capture_output=True, text=True
+        )
+    except OSError as error:
+        raise sandbox.CompileError(
+            "Could not run {}: {}".format(compiler, error), None, ""
+        ) from None
+    if process.returncode != 0:
+        raise sandbox.CompileError(
+            "{} exited with status {}:\n{}".format(
+                compiler, process.returncode, process.stderr
+            ),
+            process.returncode,
+            process.stderr,
+        )
+    return parse_target(process.stdout, compiler)
+
+
+def parse_target(llvm_code: str, compiler: str) -> Target:
+    """Reads the target from LLVM generated by compiler.
+
+    throws:
+        sandbox.CompileError: If llvm_code does not name a triple, data layout and CPU.
+    """
+    matches = [
+        regex.search(llvm_code) for regex in [TRIPLE_REGEX, DATALAYOUT_REGEX, CPU_REGEX]
+    ]
+    if not all(matches):
+        raise sandbox.CompileError(
+            "{} did not report its target".format(compiler), 0, llvm_code
+        )
+    triple, datalayout, cpu = [match.group(1) for match in matches]
+    features = FEATURES_REGEX.search(llvm_code)
+    tune_cpu = TUNE_CPU_REGEX.search(llvm_code)
+    return Target(
+        triple,
+        datalayout,
+        cpu,
+        features.group(1) if features else "",
+        tune_cpu.group(1) if tune_cpu else cpu,
+    )
+
+
+def resolve(
+    cpu: str | None = None,
+    features: str | None = None,
+    compiler: str = sandbox.DEFAULT_COMPILER,
+    triple: str | None = None,
+) -> Target:
+    """Returns the target named by command line style options.
+
+    Args:
+        cpu: None for the default CPU of the triple, "native" to detect the host with compiler, or the name of a CPU
+            of the triple's architecture.
+        features: Features to enable instead of those the target otherwise has, or None to keep them.
+        triple: The triple to generate code for, with its data layout found by asking compiler, or None for
+            BASELINE's x86-64 triple.
+
+    throws:
+        ValueError: If cpu is "native" and a triple is given, since the host decides the triple.
+        sandbox.CompileError: If the host or triple cannot be probed with compiler.
+    """
+    if cpu == "native":
+        if triple is not None:
+            raise ValueError(
+                "The native CPU cannot be combined with a triple, got: {}".format(
+                    triple
+                )
+            )
+        result = detect(compiler)
+    else:
+        base = BASELINE if triple is None else for_triple(triple, compiler)
+        result = base if cpu is None else explicit(cpu, base=base)
+    if features is not None:
+        result = dataclasses.replace(result, features=features)
+    return result
@@ -0,0 +1,206 @@
+from __future__ import annotations
+from array import array
+from collections import deque
+from typing import Iterator
+from compiler.lex import position, token, token_types
+
+# The shared instance of each literal token, indexed by KIND, or None for other tokens
+LITERALS = [
+    token_type() if issubclass(token_type, token.LiteralToken) else None
+    for token_type in token_types.TOKENS
+]
+
+
+class ProgramTokens:
+    """A mixin for token sequences lexed from a program held in memory.
+
+    Attributes:
+        program: The program the tokens were lexed from.
+        line_index: An index of the lines in program, built the first time a line or column is needed.
+    """
+
+    program: str
+    line_index: position.LineIndex | None
+
+    def line_column(self, offset: int) -> tuple[int, int]:
+        """Returns the one-based line and column of offset in program."""
+        if self.line_index is None:
+            self.line_index = position.LineIndex.from_program(self.program)
+        return self.line_index.line_column(offset)
+
+
+class TokenDeque(ProgramTokens, deque[token.Token]):
+    """A deque of tokens which also records the start and end offset of each token.
+
+    Indexing and popping are inherited from deque, so they are as fast as for a plain deque.
+
+    Attributes:
+        starts: The offset of the first character of each token ever appended. Offsets are limited to 32 bits.
+        ends: The offset after the last character of each token ever appended.
+    """
+
+    def __init__(self, program: str = "") -> None:
+        super().__init__()
+        self.program = program
+        self.line_index = None
+        self.starts = array("I")
+        self.ends = array("I")
+
+    def append_token(self, tok: token.Token, start: int, end: int) -> None:
+        self.append(tok)
+        self.starts.append(start)
+        self.ends.append(end)
+
+    def span(self, index: int = 0) -> tuple[int, int]:
+        """Returns the start and end offsets of the token index places ahead.
+
+        span(-1) is the span of the most recently popped token.
+        """
+        position = len(self.starts) - len(self) + index
+        return (self.starts[position], self.ends[position])
+
+    def start(self, index: int = 0) -> int:
+        """Returns the start offset of the token index places ahead.
+
+        start(-1) is the start of the most recently popped token.
+        """
+        return self.starts[len(self.starts) - len(self) + index]
+
+    def end(self, index: int = 0) -> int:
+        """Returns the end offset of the token index places ahead.
+
+        end(-1) is the end of the most recently popped token.
+        """
+        return self.ends[len(self.ends) - len(self) + index]
+
+
+class TokenBuffer(ProgramTokens):
+    """A compact, columnar sequence of tokens.
+
+    Rather than storing a token object per token, the buffer stores parallel arrays of kind codes (see token.Token.KIND),
+    start offsets and values. Tokens are materialized on access, so the buffer can be passed anywhere the result
+    of lex.lex() is expected, at the cost of slower access. Popping tokens advances a cursor rather than shrinking the arrays.
+    End offsets aren't stored; they are found by matching the token again in program.
+
+    Attributes:
+        kinds: The KIND of each token.
+        starts: The offset of the first character of each token in the program. Offsets are limited to 32 bits.
+        values: The value of each Integer token which fits in 31 bits, or the bitwise inverse of an index into objects for
+            other tokens with a value. Unused (0) for literal tokens.
+        objects: Values which aren't stored inline in values, such as identifiers and large integers.
+            Each distinct value is stored once.
+        index: The index of the first token which hasn't been popped.
+    """
+
+    def __init__(self, program: str = "") -> None:
+        self.program = program
+        self.kinds = array("B")
+        self.starts = array("I")
+        self.values = array("i")
+        self.objects: list[object] = []
+        self.object_indices: dict[tuple[int, object], int] = {}
+        self.index = 0
+        self.line_index = None
+
+    def append(self, kind: int, start: int, value: object = None) -> None:
+        """Appends a token. value should be None for literal tokens."""
+        self.kinds.append(kind)
+        self.starts.append(start)
+        self.values.append(0 if value is None else self.encode(kind, value))
+
+    def encode(self, kind: int, value: object) -> int:
+        """Returns the entry in values representing value."""
+        if type(value) is int and 0 <= value < 1 << 31:
+            return value
+        return ~self.intern(kind, value)
+
+    def intern(self, kind: int, value: object) -> int:
+        """Returns the index of value in objects, adding it if necessary."""
+        key = (kind, value)
+        index = self.object_indices.get(key)
+        if index is None:
+            index = self.object_indices[key] = len(self.objects)
+            self.objects.append(value)
+        return index
+
+    def kind(self, index: int = 0) -> int:
+        """Returns the KIND of the token index places ahead of the cursor."""
+        return self.kinds[self.index + index]
+
+    def span(self, index: int = 0) -> tuple[int, int]:
+        """Returns the start and end offsets of the token index places ahead of the cursor.
+
+        span(-1) is the span of the most recently popped token.
+        """
+        start = self.starts[self.index + index]
+        return (start, token_types.TOKEN_REGEX.match(self.program, start).end())
+
+    def start(self, index: int = 0) -> int:
+        """Returns the start offset of the token index places ahead of the cursor.
+
+        start(-1) is the start of the most recently popped token.
+        """
+        return self.starts[self.index + index]
+
+    def end(self, index: int = 0) -> int:
+        """Returns the end offset of the token index places ahead of the cursor.
+
+        end(-1) is the end of the most recently popped token.
+        """
+        return self.span(index)[1]
+
+    def value(self, index: int = 0) -> object:
+        """Returns the value of the token index places ahead of the cursor."""
+        return self.value_at(self.index + index)
+
+    def value_at(self, position: int) -> object:
+        literal = LITERALS[self.kinds[position]]
+        if literal:
+            return literal.value
+        value = self.values[position]
+        return value if value >= 0 else self.objects[~value]
+
+    def token_at(self, position: int) -> token.Token:
+        """Materializes the token at the given absolute position."""
+        kind = self.kinds[position]
+        literal = LITERALS[kind]
+        if literal:
+            return literal
+        value = self.values[position]
+        return token_types.TOKENS[kind](value if value >= 0 else self.objects[~value])
+
+    def __getitem__(self, index: int) -> token.Token:
+        """Returns the token index places ahead of the cursor without consuming it.
+
+        throws:
+            An IndexError if there is no such token.
+        """
+        position = self.index + index
+        kind = self.kinds[position]
+        literal = LITERALS[kind]
+        if literal:
+            return literal
+        value = self.values[position]
+        return token_types.TOKENS[kind](value if value >= 0 else self.objects[~value])
+
+    def __len__(self) -> int:
+        return len(self.kinds) - self.index
+
+    def __iter__(self) -> Iterator[token.Token]:
+        """Iterates over the remaining tokens without consuming them."""
+        return map(self.token_at, range(self.index, len(self.kinds)))
+
+    def popleft(self) -> token.Token:
+        """Consumes and returns the next token.
+
+        throws:
+            An IndexError if the buffer is exhausted.
+        """
+        position = self.index
+        kind = self.kinds[position]
+        self.index = position + 1
+        literal = LITERALS[kind]
+        if literal:
+            return literal
+        value = self.values[position]
+        return token_types.TOKENS[kind](value if value >= 0 else self.objects[~value])
@@ -1,20 +1,129 @@
-from collections import deque
-from typing import Iterable
-from compiler.lex import token, token_types
+from typing import Iterable, Protocol
+from compiler.lex import buffer, token, token_types
 
 
-def lex(program: str) -> deque[token.Token]:
+class Tokens(Protocol):
+    """A sequence of tokens consumed by the parser, such as a buffer.TokenDeque, a buffer.TokenBuffer or a stream.TokenStream.
+
+    Indices are relative to the next token which hasn't been popped.
+    """
+
+    def __getitem__(self, index: int) -> token.Token:
+        ...
+
+    def __bool__(self) -> bool:
+        ...
+
+    def popleft(self) -> token.Token:
+        ...
+
+    def span(self, index: int = 0) -> tuple[int, int]:
+        """Returns the start and end offsets of a token. span(-1) is the span of the most recently popped token."""
+        ...
+
+    def start(self, index: int = 0) -> int:
+        """Returns the start offset of a token. start(-1) is the start of the most recently popped token."""
+        ...
+
+    def end(self, index: int = 0) -> int:
+        """Returns the end offset of a token. end(-1) is the end of the most recently popped token."""
+        ...
+
+    def line_column(self, offset: int) -> tuple[int, int]:
+        """Returns the one-based line and column of an offset."""
+        ...
+
+
+def lex(program: str) -> buffer.TokenDeque:
     """Lexes the given program into a set of strings representing atomic tokens.
 
     Generally speaking, a token is a contiguous string which doesn't include any whitespace.
+    The start and end offset of each token is recorded alongside it.
     """
-    return deque(get_tokens(program))
+    skip_whitespace = token_types.WHITESPACE_REGEX.match
+    match_token = token_types.TOKEN_REGEX.match
+    # Maps each token name to its type, or to its shared instance for literal tokens
+    factories = {
+        name: token_type() if issubclass(token_type, token.LiteralToken) else token_type
+        for name, token_type in token_types.TOKEN_TYPES.items()
+    }
 
+    tokens = buffer.TokenDeque(program)
+    append_token = tokens.append
+    append_start = tokens.starts.append
+    append_end = tokens.ends.append
+    position = 0
+    while True:
+        position = skip_whitespace(program, position).end()
+        match = match_token(program, position)
+        if not match:
+            break
+        factory = factories[match.lastgroup]
+        if isinstance(factory, token.Token):
+            append_token(factory)
+        else:
+            append_token(factory(factory.convert(match.group())))
+        end = match.end()
+        append_start(position)
+        append_end(end)
+        position = end
+    return tokens
 
-def get_tokens(program: str) -> Iterable[token.Token]:
+
+def lex_buffer(program: str) -> buffer.TokenBuffer:
+    """Lexes the given program into a columnar buffer.TokenBuffer.
+
+    Uses far less memory than lex(), since no token objects are created.
+    """
+    skip_whitespace = token_types.WHITESPACE_REGEX.match
+    match_token = token_types.TOKEN_REGEX.match
+    # Maps each token name to its kind and converter, or None for literal tokens
+    converters = {
+        name: (
+            token_type.KIND,
+            None if issubclass(token_type, token.LiteralToken) else token_type.convert,
+        )
+        for name, token_type in token_types.TOKEN_TYPES.items()
+    }
+
+    tokens = buffer.TokenBuffer(program)
+    # Append to the columns directly, since TokenBuffer.append() is comparatively slow
+    append_kind = tokens.kinds.append
+    append_start = tokens.starts.append
+    append_value = tokens.values.append
+    position = 0
     while True:
-        tok, program = token_types.extract_token(program)
-        if tok:
-            yield tok
+        position = skip_whitespace(program, position).end()
+        match = match_token(program, position)
+        if not match:
+            break
+        kind, convert = converters[match.lastgroup]
+        append_kind(kind)
+        append_start(position)
+        if convert:
+            append_value(tokens.encode(kind, convert(match.group())))
         else:
+            append_value(0)
+        position = match.end()
+    return tokens
+
+
+def get_tokens(program: str) -> Iterable[token.Token]:
+    """Yields each token in program.
+
+    The program is walked once using a position cursor, so lexing is linear in the size of the program.
+    Lexing stops at the first character which doesn't begin a token.
+    """
+    skip_whitespace = token_types.WHITESPACE_REGEX.match
+    match_token = token_types.TOKEN_REGEX.match
+    token_types_by_name = token_types.TOKEN_TYPES
+    make_token = token.make_token
+
+    position = 0
+    while True:
+        position = skip_whitespace(program, position).end()
+        match = match_token(program, position)
+        if not match:
             break
+        yield make_token(token_types_by_name[match.lastgroup], match.group())
+        position = match.end()
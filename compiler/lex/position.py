@@ -0,0 +1,31 @@
+from __future__ import annotations
+from array import array
+from bisect import bisect_right
+
+
+class LineIndex:
+    """Converts character offsets into line and column numbers.
+
+    Stores the offset at which each line starts, so a lookup is a binary search rather than a scan of the program.
+    """
+
+    def __init__(self) -> None:
+        self.line_starts = array("q", [0])
+
+    @staticmethod
+    def from_program(program: str) -> LineIndex:
+        line_index = LineIndex()
+        line_index.extend(program)
+        return line_index
+
+    def extend(self, text: str, offset: int = 0) -> None:
+        """Records the lines starting in text, which begins at the given offset in the program."""
+        newline = text.find("\n")
+        while newline != -1:
+            self.line_starts.append(offset + newline + 1)
+            newline = text.find("\n", newline + 1)
+
+    def line_column(self, offset: int) -> tuple[int, int]:
+        """Returns the one-based line and column of offset."""
+        line = bisect_right(self.line_starts, offset)
+        return (line, offset - self.line_starts[line - 1] + 1)
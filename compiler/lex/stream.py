@@ -0,0 +1,131 @@
+from __future__ import annotations
+from collections import deque
+from typing import Iterable, Iterator, TextIO
+from compiler.lex import position, token, token_types
+
+DEFAULT_CHUNK_SIZE = 1 << 16
+
+
+class TokenStream:
+    """A lazily lexed sequence of tokens read from a file object or an iterable of chunks.
+
+    Supports the subset of the deque interface used by the parser (indexing, popleft() and truthiness),
+    so it can be passed anywhere the result of lex.lex() is expected.
+    Only the current chunk, the tokens which have been peeked but not popped and an index of line start offsets
+    are held in memory.
+    """
+
+    def __init__(
+        self, source: TextIO | Iterable[str], chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> None:
+        """
+        Args:
+            source: A file object, which is read chunk_size characters at a time, or an iterable of strings.
+            chunk_size: The number of characters to read from a file object at once.
+        """
+        if hasattr(source, "read"):
+            self.chunks = iter(lambda: source.read(chunk_size), "")
+        else:
+            self.chunks = iter(source)
+
+        self.buffer = ""
+        self.position = 0
+        # The offset of the start of buffer in the program
+        self.offset = 0
+        self.eof = False
+        self.lookahead: deque[token.Token] = deque()
+        # The start and end offsets of each token in lookahead
+        self.spans: deque[tuple[int, int]] = deque()
+        # The span of the most recently popped token
+        self.last_span = (0, 0)
+        self.line_index = position.LineIndex()
+
+    def __getitem__(self, index: int) -> token.Token:
+        """Returns the token index places ahead without consuming it.
+
+        throws:
+            An IndexError if the stream ends before the given token.
+        """
+        self.fill(index)
+        return self.lookahead[index]
+
+    def fill(self, index: int) -> None:
+        """Lexes tokens into lookahead until it contains the token index places ahead."""
+        while len(self.lookahead) <= index:
+            self.lookahead.append(self.next_token())
+
+    def span(self, index: int = 0) -> tuple[int, int]:
+        """Returns the start and end offsets of the token index places ahead.
+
+        span(-1) is the span of the most recently popped token.
+        """
+        if index == -1:
+            return self.last_span
+        self.fill(index)
+        return self.spans[index]
+
+    def start(self, index: int = 0) -> int:
+        """Returns the start offset of the token index places ahead."""
+        return self.span(index)[0]
+
+    def end(self, index: int = 0) -> int:
+        """Returns the end offset of the token index places ahead."""
+        return self.span(index)[1]
+
+    def line_column(self, offset: int) -> tuple[int, int]:
+        """Returns the one-based line and column of offset."""
+        return self.line_index.line_column(offset)
+
+    def __bool__(self) -> bool:
+        try:
+            self[0]
+        except IndexError:
+            return False
+        return True
+
+    def __iter__(self) -> Iterator[token.Token]:
+        """Consumes the stream, yielding each remaining token."""
+        while self:
+            yield self.popleft()
+
+    def popleft(self) -> token.Token:
+        """Consumes and returns the next token.
+
+        throws:
+            An IndexError if the stream is exhausted.
+        """
+        self.fill(0)
+        self.last_span = self.spans.popleft()
+        return self.lookahead.popleft()
+
+    def next_token(self) -> token.Token:
+        """Lexes the next token from the buffer, reading more chunks as needed, and records its span.
+
+        A match which reaches the end of the buffer may continue in the next chunk, so it is retried after reading more input.
+        """
+        while True:
+            self.position = token_types.skip_whitespace(self.buffer, self.position)
+            match = token_types.TOKEN_REGEX.match(self.buffer, self.position)
+            if not self.eof and (match is None or match.end() == len(self.buffer)):
+                self.read_chunk()
+                continue
+            if not match:
+                raise IndexError("No more tokens in stream")
+            self.position = match.end()
+            self.spans.append(
+                (self.offset + match.start(), self.offset + self.position)
+            )
+            return token.make_token(
+                token_types.TOKEN_TYPES[match.lastgroup], match.group()
+            )
+
+    def read_chunk(self) -> None:
+        """Appends the next non-empty chunk to the unconsumed part of the buffer."""
+        for chunk in self.chunks:
+            if chunk:
+                self.line_index.extend(chunk, self.offset + len(self.buffer))
+                self.offset += self.position
+                self.buffer = self.buffer[self.position :] + chunk
+                self.position = 0
+                return
+        self.eof = True
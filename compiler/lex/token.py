@@ -12,16 +12,26 @@ class Token(Generic[T]):
 
     """Represents an atomic token.
 
+    Subclasses should declare empty __slots__ so instances stay compact.
+
     Attributes:
-        PATTERN: A string used alongside the default implemention of match() method to match instances of the token.
+        PATTERN: A regex used to match instances of the token. See regex().
+        KIND: A small integer identifying the token class. Assigned to each of token_types.TOKENS.
         type: The name of the token. Defaults to the name of the class.
         value: The lexeme representing an instance of the class.
     """
 
+    __slots__ = ("value",)
+
     PATTERN: str
+    KIND: int
+    type: str
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        cls.type = cls.__name__
 
     def __init__(self, value: T) -> None:
-        self.type = token_type(type(self))
         self.value = value
 
     def __repr__(self) -> str:
@@ -30,13 +40,22 @@ class Token(Generic[T]):
     def __eq__(self, other: Self) -> bool:
         return self.type == other.type and self.value == other.value
 
+    @classmethod
+    def regex(cls) -> str:
+        """Returns the regex source used to match instances of this token.
+
+        The pattern must not contain capturing groups, since it is combined with the patterns of other tokens.
+        The default implementation returns PATTERN.
+        """
+        return cls.PATTERN
+
     @classmethod
     def match(cls, program: str) -> str | None:
         """Returns the part of the program matching this token or None.
 
-        The default implementation returns the result of passing PATTERN to re.match().
+        The default implementation returns the result of passing regex() to re.match().
         """
-        match = re.match(cls.PATTERN, program)
+        match = re.match(cls.regex(), program)
         return match.group(0) if match else None
 
     @staticmethod
@@ -47,6 +66,8 @@ class Token(Generic[T]):
 
 
 class StrToken(Token[str]):
+    __slots__ = ()
+
     @staticmethod
     def convert(match: str) -> str:
         return match
@@ -56,14 +77,29 @@ class LiteralToken(StrToken):
     """Represents a literal token.
 
     Unlike a regular token, PATTERN is matched directly rather than being interpreted as regex.
+    Literal tokens carry no data, so each subclass has a single shared instance.
     """
 
+    __slots__ = ()
+
+    instance: Self | None
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        cls.instance = None
+
+    def __new__(cls) -> Self:
+        if cls.instance is None:
+            cls.instance = super().__new__(cls)
+            cls.instance.value = cls.PATTERN
+        return cls.instance
+
     def __init__(self) -> None:
-        super().__init__(self.PATTERN)
+        pass
 
     @classmethod
-    def match(cls, program: str) -> str | None:
-        return cls.PATTERN if program.startswith(cls.PATTERN) else None
+    def regex(cls) -> str:
+        return re.escape(cls.PATTERN)
 
 
 class ReservedToken(LiteralToken):
@@ -72,15 +108,18 @@ class ReservedToken(LiteralToken):
     Unlike a literal token, the entire LiteralToken must match, and no other ID characters are allowed to follow.
     """
 
+    __slots__ = ()
+
     @classmethod
-    def match(cls, program: str) -> str | None:
-        match = re.match(cls.PATTERN + r"(?!\w)", program)
-        return match.group(0) if match else None
+    def regex(cls) -> str:
+        return super().regex() + r"(?!\w)"
 
 
 class OperatorToken(LiteralToken):
     """A token which corresponds to a mathematical operation."""
 
+    __slots__ = ()
+
     PRECEDENCE: int
 
 
@@ -2,64 +2,79 @@ import re
 from compiler.lex import token
 
 
-def extract_token(program: str) -> tuple[token.Token | None, str]:
-    """Extracts the next token from program.
+def extract_token(program: str, position: int = 0) -> tuple[token.Token | None, int]:
+    """Extracts the next token from program, starting at position.
 
-    Returns a tuple containing the token that was extracted (or None) and the program with the token removed.
+    Returns a tuple containing the token that was extracted (or None) and the position after the token.
     """
-    program = skip_whitespace(program)
-    for token_type in TOKENS:
-        match = token_type.match(program)
-        if match:
-            program = program.removeprefix(match)
-            return (token.make_token(token_type, match), program)
-    return (None, program)
+    position = skip_whitespace(program, position)
+    match = TOKEN_REGEX.match(program, position)
+    if not match:
+        return (None, position)
+    token_type = TOKEN_TYPES[match.lastgroup]
+    return (token.make_token(token_type, match.group()), match.end())
 
 
-def skip_whitespace(program: str) -> str:
-    """Skips to the next non-whitespace character."""
-    while program and program[0] in " \t\n":
-        program = program[1:]
-    return program
+def skip_whitespace(program: str, position: int = 0) -> int:
+    """Returns the position of the next non-whitespace character at or after position."""
+    return WHITESPACE_REGEX.match(program, position).end()
 
 
 class Plus(token.OperatorToken):
+    __slots__ = ()
+
     PATTERN = "+"
     PRECEDENCE = 13
 
 
 class Minus(token.OperatorToken):
+    __slots__ = ()
+
     PATTERN = "-"
     PRECEDENCE = 13
 
 
 class Times(token.OperatorToken):
+    __slots__ = ()
+
     PATTERN = "*"
     PRECEDENCE = 14
 
 
 class Divide(token.OperatorToken):
+    __slots__ = ()
+
     PATTERN = "/"
     PRECEDENCE = 14
 
 
 class LeftParens(token.LiteralToken):
+    __slots__ = ()
+
     PATTERN = "("
 
 
 class RightParens(token.LiteralToken):
+    __slots__ = ()
+
     PATTERN = ")"
 
 
 class Semicolon(token.LiteralToken):
+    __slots__ = ()
+
     PATTERN = ";"
 
 
 class Comma(token.LiteralToken):
+    __slots__ = ()
+
     PATTERN = ","
 
 
 class Integer(token.Token[int]):
+    __slots__ = ()
+
     PATTERN = r"[0-9]+"
     # Set convert function to int constructor
     convert = int
@@ -68,6 +83,8 @@ class Integer(token.Token[int]):
 class Id(token.StrToken):
     """Matches a user specified program identifier."""
 
+    __slots__ = ()
+
     PATTERN = r"[_a-zA-Z]\w*"
 
     # @classmethod
@@ -79,26 +96,29 @@ class Id(token.StrToken):
 
 
 class Float(token.Token[float]):
-    @classmethod
-    def match(cls, program: str) -> str | None:
-        match = re.match(r"[0-9]*\.[0-9]+", program) or re.match(
-            r"[0-9]+\.[0-9]*", program
-        )
-        return match.group(0) if match else None
+    __slots__ = ()
+
+    PATTERN = r"[0-9]*\.[0-9]+|[0-9]+\.[0-9]*"
 
     # Set convert function to float constructor
     convert = float
 
 
 class For(token.ReservedToken):
+    __slots__ = ()
+
     PATTERN = "for"
 
 
 class While(token.ReservedToken):
+    __slots__ = ()
+
     PATTERN = "while"
 
 
 class If(token.ReservedToken):
+    __slots__ = ()
+
     PATTERN = "if"
 
 
@@ -119,3 +139,18 @@ TOKENS = [
     *RESERVED_TOKENS,
     Id,
 ]
+
+for kind, token_type in enumerate(TOKENS):
+    token_type.KIND = kind
+
+WHITESPACE_REGEX = re.compile(r"[ \t\n]*")
+
+# Alternation tries each group in order, so the first matching token in TOKENS wins
+TOKEN_REGEX = re.compile(
+    "|".join(
+        "(?P<{}>{})".format(token.token_type(token_type), token_type.regex())
+        for token_type in TOKENS
+    )
+)
+
+TOKEN_TYPES = {token.token_type(token_type): token_type for token_type in TOKENS}
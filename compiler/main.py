@@ -1,19 +1,109 @@
-from compiler.lex import lex
-from compiler.parse import parse
-from compiler.generate import llvm
+import argparse
+import concurrent.futures
+import functools
+import sys
+from typing import Sequence, TextIO
 
-# from compiler.utils import arguments
+from compiler import driver
+from compiler.generate import target
+from compiler.utils import arguments, instrument
 
 
-def main():
-    """The entrypoint for the compiler."""
-    program = "print(3 + 2 * 2); print(2 + 1);"
+def main(argv: Sequence[str] | None = None) -> int:
+    """The entrypoint for the compiler.
 
-    tokens = lex.lex(program)
-    node = parse.parse(tokens)
-    llvm_code = llvm.generate(node)
-    print(llvm.execute(llvm_code))
+    Compiles each program given on the command line, writing an .ll file next to it.
+
+    Returns the exit status: 1 if any program failed to compile, otherwise 0.
+    """
+    args = arguments.get_args(argv)
+    if args.report is None and args.trace is None:
+        return compile_programs(args)
+    instrument.reset()
+    instrument.enable()
+    try:
+        with instrument.span("main"):
+            status = compile_programs(args)
+        if args.report is not None:
+            instrument.write_report(args.report)
+        if args.trace is not None:
+            instrument.write_trace(args.trace)
+    finally:
+        # Leave a caller in this process as it was, rather than recording everything it does next
+        instrument.disable()
+        instrument.reset()
+    return status
+
+
+def compile_programs(
+    args: argparse.Namespace,
+    stdout: TextIO | None = None,
+    stderr: TextIO | None = None,
+    executor: concurrent.futures.Executor | None = None,
+) -> int:
+    """Compiles the programs named by args, printing the outcome of each and a summary.
+
+    Args:
+        stdout: Where to print the outcome of each program and the summary, sys.stdout by default.
+        stderr: Where to print errors, sys.stderr by default.
+        executor: The process pool to compile in, as for driver.compile_files.
+
+    Returns the exit status, as for main.
+    """
+    stdout = sys.stdout if stdout is None else stdout
+    stderr = sys.stderr if stderr is None else stderr
+    try:
+        check_passes(args)
+        sources = driver.expand(args.PROGRAMS)
+        machine = target.resolve(args.cpu, args.features, args.compiler, args.triple)
+    except ValueError as error:
+        print(error, file=stderr)
+        return 2
+
+    report = driver.compile_files(
+        sources,
+        args.jobs,
+        args.chunksize,
+        args.binary,
+        args.compiler,
+        args.optimization,
+        args.passes,
+        args.opt,
+        machine,
+        callback=functools.partial(print_result, stdout=stdout, stderr=stderr),
+        executor=executor,
+    )
+    print(driver.summarize(report), file=stdout)
+    return 1 if report.failures else 0
+
+
+def check_passes(args: argparse.Namespace) -> None:
+    """Checks that the pipeline args.passes, if given, would change what is compiled.
+
+    throws:
+        ValueError: If passes are given without --binary, since they only run on binaries, or at -O0, where every
+            function is marked optnone and passes skip it.
+    """
+    if args.passes is None:
+        return
+    if not args.binary:
+        raise ValueError("--passes only runs when compiling binaries, add --binary")
+    if args.optimization == 0:
+        raise ValueError(
+            "--passes has no effect at -O0, where every function is optnone, choose -O1 or higher"
+        )
+
+
+def print_result(
+    result: driver.FileResult,
+    stdout: TextIO | None = None,
+    stderr: TextIO | None = None,
+) -> None:
+    print(
+        driver.describe(result),
+        file=(stdout or sys.stdout) if result.error is None else (stderr or sys.stderr),
+    )
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,178 @@
+"""Folds constant arithmetic in an AST and simplifies algebraic identities before code generation."""
+from __future__ import annotations
+from typing import Callable
+
+from compiler.parse import expression, node, statement, visitor
+from compiler.utils import instrument
+
+# Results wrap to signed 32 bit integers, like the i32 values generated by the llvm backend
+INT32_MODULUS = 1 << 32
+INT32_MIN = -(1 << 31)
+
+
+def wrap(value: int) -> int:
+    """Returns value wrapped to a signed 32 bit integer."""
+    return (value - INT32_MIN) % INT32_MODULUS + INT32_MIN
+
+
+def unsigned(value: int) -> int:
+    """Returns the unsigned 32 bit integer with the same bits as value."""
+    return value % INT32_MODULUS
+
+
+def divide(left: int, right: int) -> int:
+    """Divides like the llvm backend's udiv, treating both operands as unsigned 32 bit integers.
+
+    throws:
+        ZeroDivisionError: If right is 0 modulo 2^32.
+    """
+    return wrap(unsigned(left) // unsigned(right))
+
+
+# Maps each operation to a function computing its result
+OPERATIONS: dict[type[expression.BinaryOperation], Callable[[int, int], int]] = {
+    expression.Add: lambda left, right: wrap(left + right),
+    expression.Subtract: lambda left, right: wrap(left - right),
+    expression.Multiply: lambda left, right: wrap(left * right),
+    expression.Divide: divide,
+}
+
+# Maps each operation to the value x can be combined with on the right to leave x unchanged
+IDENTITIES: dict[type[expression.BinaryOperation], int] = {
+    expression.Add: 0,
+    expression.Subtract: 0,
+    expression.Multiply: 1,
+    expression.Divide: 1,
+}
+
+
+def fold(tree: node.Node) -> tuple[node.Node, int]:
+    """Folds constants in tree.
+
+    Folding follows the 32 bit arithmetic of the llvm backend. A tree with identifiers can only be evaluated by
+    PythonVisitor or NumpyVisitor, whose integers do not wrap to 32 bits, so it is returned unchanged.
+
+    Returns the folded tree and the number of nodes removed. tree itself is not modified.
+    """
+    folder = ConstantFolder().visit(tree)
+    instrument.count("nodes", folder.node_count)
+    if folder.identifiers:
+        return tree, 0
+    instrument.count("nodes_removed", folder.removed())
+    return folder.result(), folder.removed()
+
+
+class ConstantFolder(visitor.PostOrderVisitor):
+    """Builds a copy of a tree with constant arithmetic folded into IntegerNodes.
+
+    Operations on two integers are replaced by their result, except for division by zero, which is left to fail at
+    runtime. The identities x + 0, 0 + x, x - 0, x * 1, 1 * x and x / 1 are replaced by x, and x * 0 and 0 * x by 0
+    when x is pure, meaning evaluating it can neither print nor divide by zero.
+
+    Each folded node is kept on a stack along with whether it is pure and its number of nodes.
+
+    Attributes:
+        identifiers: Whether the tree has an identifier, in which case fold discards the result.
+    """
+
+    def __init__(self) -> None:
+        self.node_count = 0
+        self.identifiers = False
+        self.nodes: list[tuple[node.Node, bool, int]] = []
+
+    def result(self) -> node.Node:
+        """Returns the folded tree."""
+        return self.nodes[-1][0]
+
+    def removed(self) -> int:
+        """Returns how many fewer nodes the folded tree has than the visited one."""
+        return self.node_count - self.nodes[-1][2]
+
+    def pop(self, count: int) -> tuple[list[node.Node], bool, int]:
+        """Pops the top count folded nodes, returning them, whether all are pure and their total size."""
+        entries = self.nodes[len(self.nodes) - count :]
+        del self.nodes[len(self.nodes) - count :]
+        return (
+            [entry[0] for entry in entries],
+            all(entry[1] for entry in entries),
+            sum(entry[2] for entry in entries),
+        )
+
+    def visit_node(self, _: node.Node) -> None:
+        self.node_count += 1
+
+    def visit_statements(self, node: statement.Statements) -> None:
+        statements, pure, size = self.pop(len(node.statements))
+        self.nodes.append((statement.Statements(*statements), pure, size + 1))
+
+    def visit_statement(self, node: statement.Statement) -> None:
+        (folded,), pure, size = self.pop(1)
+        result = statement.Statement(folded)
+        result.end = node.end
+        self.nodes.append((result, pure, size + 1))
+
+    def visit_call(self, node: expression.Call) -> None:
+        arguments, _, size = self.pop(len(node.arguments))
+        result = expression.Call(node.id, *arguments)
+        result.start, result.end = node.start, node.end
+        self.nodes.append((result, False, size + 1))
+
+    def visit_integer_node(self, node: expression.IntegerNode) -> None:
+        self.nodes.append((node, True, 1))
+
+    def visit_id_node(self, node: expression.IdNode) -> None:
+        self.identifiers = True
+        self.nodes.append((node, True, 1))
+
+    def visit_binary_operation(self, node: expression.BinaryOperation) -> None:
+        right = self.nodes.pop()
+        left = self.nodes.pop()
+        simplified = self.simplify(node, left, right)
+        if simplified is None:
+            result = type(node)(left[0], right[0])
+            # A division which was not folded may divide by zero
+            pure = left[1] and right[1] and not isinstance(node, expression.Divide)
+            simplified = (result, pure, left[2] + right[2] + 1)
+        self.nodes.append(simplified)
+
+    def simplify(
+        self,
+        node: expression.BinaryOperation,
+        left: tuple[node.Node, bool, int],
+        right: tuple[node.Node, bool, int],
+    ) -> tuple[node.Node, bool, int] | None:
+        """Returns the folded entry replacing node given its folded operands, or None if it cannot be simplified."""
+        operation = type(node)
+        left_value = constant(left[0])
+        right_value = constant(right[0])
+        if left_value is not None and right_value is not None:
+            if operation is expression.Divide and unsigned(right_value) == 0:
+                return None
+            return constant_entry(node, OPERATIONS[operation](left_value, right_value))
+        if operation is expression.Multiply and (
+            (left_value == 0 and right[1]) or (right_value == 0 and left[1])
+        ):
+            return constant_entry(node, 0)
+        if operation in (expression.Add, expression.Multiply) and left_value == (
+            IDENTITIES[operation]
+        ):
+            return right
+        if right_value == IDENTITIES[operation]:
+            return left
+        return None
+
+
+def constant_entry(
+    node: expression.BinaryOperation, value: int
+) -> tuple[node.Node, bool, int]:
+    """Returns the folded entry for an IntegerNode with value replacing node."""
+    result = expression.IntegerNode(value)
+    result.start, result.end = node.start, node.end
+    return (result, True, 1)
+
+
+def constant(node: node.Node) -> int | None:
+    """Returns the value of node wrapped to 32 bits if it is an IntegerNode, otherwise None."""
+    if isinstance(node, expression.IntegerNode):
+        return wrap(node.value)
+    return None
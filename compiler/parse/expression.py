@@ -1,11 +1,10 @@
 from __future__ import annotations
 from abc import ABC
 
-from collections import deque
 from typing import Generic, TypeVar
 
 from compiler.parse import node, visitor, parse_utils
-from compiler.lex import token, token_types
+from compiler.lex import lex, token, token_types
 
 
 class Expression(node.Node, ABC):
@@ -14,29 +13,98 @@ class Expression(node.Node, ABC):
         visitor.visit_expression(self)
 
 
-def get_precedence(tok: token.Token) -> int:
-    return parse_utils.assert_token(tok, token.OperatorToken).PRECEDENCE
+def parse_expression(tokens: lex.Tokens) -> Expression:
+    """Parses an expression.
+
+    Uses precedence climbing with explicit stacks rather than recursion, so arbitrarily long or deeply nested
+    expressions can be parsed.
+    """
+    return parse_operations(tokens, False)
 
 
-def parse_expression(
-    tokens: deque[token.Token], previous_precedence: int = 0
-) -> Expression:
-    """Parses an expression."""
-    if can_parse_call(tokens):
-        left = parse_call(tokens)
-    # handle id case
-    else:
-        left = make_integer_node(tokens.popleft())
+def parse_operations(tokens: lex.Tokens, call_only: bool) -> Expression:
+    """Parses an expression using explicit operand, operator and call stacks.
 
-    while (
-        isinstance(tokens[0], token.OperatorToken)
-        and get_precedence(tokens[0]) > previous_precedence
-    ):
-        op_token = tokens.popleft()
-        right = parse_expression(tokens, get_precedence(op_token))
-        left = make_binary_operation(left, right, op_token)
+    Tokens are dispatched on their KIND, and operators are looked up in OPERATIONS.
 
-    return left
+    Args:
+        call_only: Whether to stop after the first call closes, rather than at the end of the expression.
+    """
+    integer_kind = token_types.Integer.KIND
+    id_kind = token_types.Id.KIND
+    left_parens_kind = token_types.LeftParens.KIND
+    right_parens_kind = token_types.RightParens.KIND
+    comma_kind = token_types.Comma.KIND
+    operations = OPERATIONS
+
+    operands: list[Expression] = []
+    # The precedence and constructor of each pending operator
+    operators: list[tuple[int, type[BinaryOperation]]] = []
+    # Each open call is stored as its id, start offset, and the heights of operands and operators when it was opened
+    calls: list[tuple[token_types.Id, int, int, int]] = []
+
+    expect_operand = True
+    while True:
+        if expect_operand:
+            tok = tokens[0]
+            kind = tok.KIND
+            if kind == integer_kind:
+                tokens.popleft()
+                operand = IntegerNode(tok.value)
+                operand.start, operand.end = tokens.span(-1)
+                operands.append(operand)
+            elif kind == id_kind and tokens[1].KIND == left_parens_kind:
+                tokens.popleft()
+                start = tokens.start(-1)
+                tokens.popleft()
+                calls.append((tok, start, len(operands), len(operators)))
+                if tokens[0].KIND != right_parens_kind:
+                    continue
+            elif kind == id_kind:
+                tokens.popleft()
+                operand = IdNode(tok.value)
+                operand.start, operand.end = tokens.span(-1)
+                operands.append(operand)
+            else:
+                # Raises an appropriate error
+                parse_utils.next_token(tokens, token_types.Integer)
+            expect_operand = False
+
+        operator_floor = calls[-1][3] if calls else 0
+        operation = operations[tokens[0].KIND]
+        if operation:
+            # Operators of equal precedence are applied first, so operations are left associative
+            precedence = operation[0]
+            while len(operators) > operator_floor and operators[-1][0] >= precedence:
+                right = operands.pop()
+                operands[-1] = operators.pop()[1](operands[-1], right)
+            tokens.popleft()
+            operators.append(operation)
+            expect_operand = True
+            continue
+
+        while len(operators) > operator_floor:
+            right = operands.pop()
+            operands[-1] = operators.pop()[1](operands[-1], right)
+        if not calls:
+            return operands.pop()
+
+        kind = tokens[0].KIND
+        if kind == comma_kind:
+            tokens.popleft()
+            if tokens[0].KIND != right_parens_kind:
+                expect_operand = True
+                continue
+        parse_utils.next_token(tokens, token_types.RightParens)
+
+        id, start, operand_floor, _ = calls.pop()
+        result = Call(id, *operands[operand_floor:])
+        del operands[operand_floor:]
+        result.start = start
+        result.end = tokens.end(-1)
+        if call_only and not calls:
+            return result
+        operands.append(result)
 
 
 T = TypeVar("T")
@@ -77,6 +145,20 @@ def make_integer_node(tok: token.Token) -> IntegerNode:
     return IntegerNode(tok.value)
 
 
+def parse_integer_node(tokens: lex.Tokens) -> IntegerNode:
+    result = IntegerNode(parse_utils.next_token(tokens, token_types.Integer).value)
+    result.start, result.end = tokens.span(-1)
+    return result
+
+
+class IdNode(TerminalNode[str], Expression):
+    """Represents a node which corresponds to an identifier, whose value is bound when the program is evaluated."""
+
+    def accept(self, visitor: visitor.Visitor) -> None:
+        super().accept(visitor)
+        visitor.visit_id_node(self)
+
+
 class Call(Expression):
     """Represents a function call."""
 
@@ -91,32 +173,34 @@ class Call(Expression):
     def accept_children(self, visitor: visitor.Visitor) -> None:
         visitor.visit_all(*self.arguments)
 
+    def children(self) -> tuple[node.Node, ...]:
+        return self.arguments
+
     def __eq__(self, other: Call) -> bool:
         return self.id == other.id and self.arguments == other.arguments
 
 
-def can_parse_call(tokens: deque[token.Token]) -> bool:
-    return isinstance(tokens[0], token_types.Id) and isinstance(
-        tokens[1], token_types.LeftParens
+def can_parse_call(tokens: lex.Tokens) -> bool:
+    return (
+        tokens[0].KIND == token_types.Id.KIND
+        and tokens[1].KIND == token_types.LeftParens.KIND
     )
 
 
-def parse_call(tokens: deque[token.Token]) -> Call:
-    id = parse_utils.assert_token(tokens.popleft(), token_types.Id)
-    parse_utils.assert_token(tokens.popleft(), token_types.LeftParens)
-    arguments = []
-    while not isinstance(tokens[0], token_types.RightParens):
-        arguments.append(parse_expression(tokens))
-        if not parse_utils.try_next_token(tokens, token_types.Comma):
-            break
-    parse_utils.assert_token(tokens.popleft(), token_types.RightParens)
-    return Call(id, *arguments)
+def parse_call(tokens: lex.Tokens) -> Call:
+    parse_utils.assert_token(tokens[0], token_types.Id)
+    parse_utils.assert_token(tokens[1], token_types.LeftParens)
+    return parse_operations(tokens, True)
 
 
 class BinaryOperation(Expression, ABC):
+    """Represents a binary operation. The operation spans from the start of left to the end of right."""
+
     def __init__(self, left: Expression, right: Expression):
         self.left = left
         self.right = right
+        self.start = left.start
+        self.end = right.end
 
     def accept(self, visitor: visitor.Visitor) -> None:
         super().accept(visitor)
@@ -125,6 +209,9 @@ class BinaryOperation(Expression, ABC):
     def accept_children(self, visitor: visitor.Visitor) -> None:
         visitor.visit_all(self.left, self.right)
 
+    def children(self) -> tuple[node.Node, ...]:
+        return (self.left, self.right)
+
     def __eq__(self, other: BinaryOperation) -> bool:
         return self.left == other.left and self.right == other.right
 
@@ -132,18 +219,10 @@ class BinaryOperation(Expression, ABC):
 def make_binary_operation(
     left: Expression, right: Expression, tok: token.Token
 ) -> BinaryOperation:
-    if isinstance(tok, token_types.Plus):
-        constructor = Add
-    elif isinstance(tok, token_types.Minus):
-        constructor = Subtract
-    elif isinstance(tok, token_types.Times):
-        constructor = Multiply
-    elif isinstance(tok, token_types.Divide):
-        constructor = Divide
-    else:
-        raise ValueError("Unexpected token - expected Operator, got: {}".format(token))
-
-    return constructor(left, right)
+    operation = OPERATIONS[tok.KIND]
+    if not operation:
+        raise ValueError("Unexpected token - expected Operator, got: {}".format(tok))
+    return operation[1](left, right)
 
 
 class Add(BinaryOperation):
@@ -168,3 +247,20 @@ class Divide(BinaryOperation):
     def accept(self, visitor: visitor.Visitor) -> None:
         super().accept(visitor)
         visitor.visit_divide(self)
+
+
+# Maps each operator token to the operation it creates
+OPERATION_TYPES: dict[type[token.OperatorToken], type[BinaryOperation]] = {
+    token_types.Plus: Add,
+    token_types.Minus: Subtract,
+    token_types.Times: Multiply,
+    token_types.Divide: Divide,
+}
+
+# The precedence and constructor of the operation created by each token, indexed by KIND, or None for non-operators
+OPERATIONS: list[tuple[int, type[BinaryOperation]] | None] = [
+    (token_type.PRECEDENCE, OPERATION_TYPES[token_type])
+    if token_type in OPERATION_TYPES
+    else None
+    for token_type in token_types.TOKENS
+]
@@ -5,7 +5,15 @@ from compiler.parse import visitor
 
 
 class Node(ABC):
-    """Represents a node in an AST."""
+    """Represents a node in an AST.
+
+    Attributes:
+        start: The offset of the first character of the node in the program, or None if unknown.
+        end: The offset after the last character of the node in the program, or None if unknown.
+    """
+
+    start: int | None = None
+    end: int | None = None
 
     def accept(self, visitor: visitor.Visitor) -> None:
         """Accepts a given visitor, executing the appropriate method."""
@@ -14,3 +22,7 @@ class Node(ABC):
     def accept_children(self, visitor: visitor.Visitor) -> None:
         """Accepts a given visitor for the children of the node."""
         ...
+
+    def children(self) -> tuple[Node, ...]:
+        """Returns the children of the node, in evaluation order."""
+        return ()
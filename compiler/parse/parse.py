@@ -1,9 +1,9 @@
-from collections import deque
+from typing import Iterable, Iterator, TextIO
 from compiler.parse import statement
-from compiler.lex import token, lex
+from compiler.lex import lex, stream
 
 
-def parse(tokens: deque[token.Token]) -> statement.Statements:
+def parse(tokens: lex.Tokens) -> statement.Statements:
     """Parses tokens into a Node AST."""
     return statement.parse_statements(tokens)
 
@@ -11,3 +11,10 @@ def parse(tokens: deque[token.Token]) -> statement.Statements:
 def parse_code(code: str) -> statement.Statements:
     """Parses a code into a Node AST."""
     return parse(lex.lex(code))
+
+
+def parse_stream(
+    source: TextIO | Iterable[str], chunk_size: int = stream.DEFAULT_CHUNK_SIZE
+) -> Iterator[statement.Statement]:
+    """Lazily parses a file object or iterable of code chunks, yielding each statement as it is parsed."""
+    return statement.iter_statements(stream.TokenStream(source, chunk_size))
@@ -1,6 +1,5 @@
-from collections import deque
 from typing import Type, TypeVar
-from compiler.lex import token
+from compiler.lex import lex, token
 
 T = TypeVar("T", bound=token.Token)
 
@@ -20,7 +19,23 @@ def assert_token(tok: token.Token, token_type: Type[T]) -> T:
     return tok
 
 
-def try_next_token(tokens: deque[token.Token], token_type: Type[T]) -> T | None:
+def next_token(tokens: lex.Tokens, token_type: Type[T]) -> T:
+    """Pops the next token in tokens, asserting it is of the given token_type.
+
+    throws:
+        A ValueError including the location of the token if it does not match the given type.
+    """
+    tok = tokens[0]
+    if not isinstance(tok, token_type):
+        raise ValueError(
+            "Unexpected token at {} - Expected token of type {}, got {}".format(
+                describe_location(tokens, tokens.start()), token_type.__name__, tok.type
+            )
+        )
+    return tokens.popleft()
+
+
+def try_next_token(tokens: lex.Tokens, token_type: Type[T]) -> T | None:
     """If the next token in tokens is of token_type, pops the token and returns it. Else, returns None."""
     token = tokens[0]
     if isinstance(token, token_type):
@@ -28,3 +43,8 @@ def try_next_token(tokens: deque[token.Token], token_type: Type[T]) -> T | None:
         tokens.popleft()
         return token
     return None
+
+
+def describe_location(tokens: lex.Tokens, offset: int) -> str:
+    """Returns a human readable description of an offset in the program tokens were lexed from."""
+    return "line {}, column {}".format(*tokens.line_column(offset))
@@ -0,0 +1,223 @@
+"""A compact, array backed representation of an AST."""
+from __future__ import annotations
+from array import array
+from typing import Iterator
+
+from compiler.parse import expression, node, statement, visitor
+
+# The node types which can be stored in a pool. A node's kind is its index in this list.
+NODE_TYPES: list[type[node.Node]] = [
+    statement.Statements,
+    statement.Statement,
+    expression.Call,
+    expression.IntegerNode,
+    expression.Add,
+    expression.Subtract,
+    expression.Multiply,
+    expression.Divide,
+    expression.IdNode,
+]
+NODE_KINDS = {node_type: kind for kind, node_type in enumerate(NODE_TYPES)}
+
+STATEMENTS_KIND = NODE_KINDS[statement.Statements]
+STATEMENT_KIND = NODE_KINDS[statement.Statement]
+CALL_KIND = NODE_KINDS[expression.Call]
+INTEGER_NODE_KIND = NODE_KINDS[expression.IntegerNode]
+ID_NODE_KIND = NODE_KINDS[expression.IdNode]
+
+INT64_MIN = -(1 << 63)
+INT64_MAX = (1 << 63) - 1
+
+
+class NodePool:
+    """Stores the nodes of an AST in parallel arrays, referring to each node by an integer id.
+
+    A node's children always have smaller ids than the node itself. Nodes with a variable number of children
+    (Statements and Call) store the ids of their children in a contiguous run of child_ids.
+
+    Attributes:
+        kinds: The kind of each node, an index into NODE_TYPES.
+        lefts: The id of the left child of a BinaryOperation, the expression of a Statement, or the index of the first child
+            in child_ids for Statements and Call.
+        rights: The id of the right child of a BinaryOperation, or the number of children of Statements and Call.
+            For an IntegerNode, 1 if its value is stored in objects rather than values.
+        values: The value of an IntegerNode, or the index in objects of a Call's id token or an IdNode's name.
+        starts: The start offset of each node, or -1 if unknown.
+        ends: The end offset of each node, or -1 if unknown.
+        child_ids: The children of Statements and Call nodes.
+        objects: Values which don't fit in the arrays, such as the ids of calls.
+        root: The id of the root node.
+    """
+
+    def __init__(self) -> None:
+        self.kinds = array("B")
+        self.lefts = array("i")
+        self.rights = array("i")
+        self.values = array("q")
+        self.starts = array("i")
+        self.ends = array("i")
+        self.child_ids = array("i")
+        self.objects: list[object] = []
+        self.root = -1
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def add(
+        self,
+        kind: int,
+        left: int = -1,
+        right: int = -1,
+        value: int = 0,
+        start: int | None = None,
+        end: int | None = None,
+    ) -> int:
+        """Adds a node, returning its id."""
+        id = len(self.kinds)
+        self.kinds.append(kind)
+        self.lefts.append(left)
+        self.rights.append(right)
+        self.values.append(value)
+        self.starts.append(-1 if start is None else start)
+        self.ends.append(-1 if end is None else end)
+        self.root = id
+        return id
+
+    def add_object(self, value: object) -> int:
+        """Stores value in objects, returning its index."""
+        self.objects.append(value)
+        return len(self.objects) - 1
+
+    def children(self, id: int) -> tuple[int, ...]:
+        """Returns the ids of the children of the node with the given id, in evaluation order."""
+        kind = self.kinds[id]
+        if kind == STATEMENTS_KIND or kind == CALL_KIND:
+            first = self.lefts[id]
+            return tuple(self.child_ids[first : first + self.rights[id]])
+        if kind == STATEMENT_KIND:
+            return (self.lefts[id],)
+        if kind == INTEGER_NODE_KIND or kind == ID_NODE_KIND:
+            return ()
+        return (self.lefts[id], self.rights[id])
+
+    def post_order(self, id: int | None = None) -> Iterator[int]:
+        """Yields the id of each node in the tree rooted at id after its children, without recursion.
+
+        Defaults to the root of the pool.
+        """
+        # Each entry is a node and whether its children have already been pushed
+        stack = [(self.root if id is None else id, False)]
+        while stack:
+            current, expanded = stack.pop()
+            if expanded:
+                yield current
+                continue
+            stack.append((current, True))
+            stack.extend((child, False) for child in reversed(self.children(current)))
+
+    def to_node(self, id: int | None = None) -> node.Node:
+        """Converts the tree rooted at id (by default, the root of the pool) back into Node objects.
+
+        The result can be visited by any Visitor.
+        """
+        nodes: dict[int, node.Node] = {}
+        for current in self.post_order(id):
+            nodes[current] = self.make_node(current, nodes)
+        return nodes[self.root if id is None else id]
+
+    def make_node(self, id: int, nodes: dict[int, node.Node]) -> node.Node:
+        """Creates the node with the given id, whose children have already been created in nodes."""
+        kind = self.kinds[id]
+        node_type = NODE_TYPES[kind]
+        if kind == INTEGER_NODE_KIND:
+            value = self.values[id]
+            result = expression.IntegerNode(
+                self.objects[value] if self.rights[id] == 1 else value
+            )
+        elif kind == ID_NODE_KIND:
+            result = expression.IdNode(self.objects[self.values[id]])
+        elif kind == CALL_KIND:
+            result = expression.Call(
+                self.objects[self.values[id]],
+                *(nodes.pop(child) for child in self.children(id)),
+            )
+        else:
+            result = node_type(*(nodes.pop(child) for child in self.children(id)))
+
+        if self.starts[id] != -1:
+            result.start = self.starts[id]
+        if self.ends[id] != -1:
+            result.end = self.ends[id]
+        return result
+
+
+def from_node(root: node.Node) -> NodePool:
+    """Converts a tree of Node objects into a NodePool."""
+    return PoolBuilder().visit(root).pool
+
+
+class PoolBuilder(visitor.PostOrderVisitor):
+    """Adds each visited node to a NodePool.
+
+    The ids of visited nodes are kept on a stack until their parent is added.
+    """
+
+    def __init__(self) -> None:
+        self.pool = NodePool()
+        self.ids: list[int] = []
+        # The index in objects of each call id, by name
+        self.call_ids: dict[str, int] = {}
+        # The index in objects of each identifier name
+        self.names: dict[str, int] = {}
+
+    def add(
+        self, target: node.Node, left: int = -1, right: int = -1, value: int = 0
+    ) -> None:
+        self.ids.append(
+            self.pool.add(
+                NODE_KINDS[type(target)], left, right, value, target.start, target.end
+            )
+        )
+
+    def pop_children(self, count: int) -> int:
+        """Moves the ids of the last count visited nodes into child_ids, returning the index of the first."""
+        first = len(self.pool.child_ids)
+        self.pool.child_ids.extend(self.ids[len(self.ids) - count :])
+        del self.ids[len(self.ids) - count :]
+        return first
+
+    def visit_node(self, node: node.Node) -> None:
+        if type(node) not in NODE_KINDS:
+            raise ValueError(
+                "Unsupported node type for NodePool: {}".format(type(node).__name__)
+            )
+
+    def visit_statements(self, node: statement.Statements) -> None:
+        count = len(node.statements)
+        self.add(node, self.pop_children(count), count)
+
+    def visit_statement(self, node: statement.Statement) -> None:
+        self.add(node, self.ids.pop())
+
+    def visit_call(self, node: expression.Call) -> None:
+        index = self.call_ids.get(node.id.value)
+        if index is None:
+            index = self.call_ids[node.id.value] = self.pool.add_object(node.id)
+        count = len(node.arguments)
+        self.add(node, self.pop_children(count), count, index)
+
+    def visit_integer_node(self, node: expression.IntegerNode) -> None:
+        if INT64_MIN <= node.value <= INT64_MAX:
+            self.add(node, value=node.value)
+        else:
+            self.add(node, right=1, value=self.pool.add_object(node.value))
+
+    def visit_id_node(self, node: expression.IdNode) -> None:
+        index = self.names.get(node.value)
+        if index is None:
+            index = self.names[node.value] = self.pool.add_object(node.value)
+        self.add(node, value=index)
+
+    def visit_binary_operation(self, node: expression.BinaryOperation) -> None:
+        right = self.ids.pop()
+        self.add(node, self.ids.pop(), right)
@@ -1,6 +1,6 @@
 from __future__ import annotations
-from collections import deque
-from compiler.lex import token, token_types
+from typing import Iterator
+from compiler.lex import lex, token_types
 
 from compiler.parse import expression, node, visitor, parse_utils
 
@@ -18,20 +18,29 @@ class Statements(node.Node):
     def accept_children(self, visitor: visitor.Visitor) -> None:
         visitor.visit_all(*self.statements)
 
+    def children(self) -> tuple[node.Node, ...]:
+        return self.statements
+
     def __eq__(self, other: Statements) -> bool:
         return self.statements == other.statements
 
 
-def parse_statements(tokens: deque[token.Token]) -> Statements:
+def parse_statements(tokens: lex.Tokens) -> Statements:
     """Recursively parses tokens into a list of statements.
 
     Currently terminates at eof.
     In the future, statements will also terminate at the end of a block (}).
     """
-    statements = []
+    return Statements(*iter_statements(tokens))
+
+
+def iter_statements(tokens: lex.Tokens) -> Iterator[Statement]:
+    """Lazily parses tokens into statements, yielding each statement as soon as it is parsed.
+
+    When tokens is a stream.TokenStream, memory use is bounded by the parser's lookahead rather than the size of the program.
+    """
     while tokens:
-        statements.append(parse_statement(tokens))
-    return Statements(*statements)
+        yield parse_statement(tokens)
 
 
 class Statement(node.Node):
@@ -39,6 +48,7 @@ class Statement(node.Node):
 
     def __init__(self, expression: expression.Expression) -> None:
         self.expression = expression
+        self.start = expression.start
 
     def accept(self, visitor: visitor.Visitor) -> None:
         super().accept(visitor)
@@ -47,11 +57,28 @@ class Statement(node.Node):
     def accept_children(self, visitor: visitor.Visitor) -> None:
         visitor.visit(self.expression)
 
+    def children(self) -> tuple[node.Node, ...]:
+        return (self.expression,)
+
     def __eq__(self, other: Statement) -> bool:
         return self.expression == other.expression
 
 
-def parse_statement(tokens: deque[token.Token]) -> Statement:
-    expr = expression.parse_expression(tokens)
-    parse_utils.assert_token(tokens.popleft(), token_types.Semicolon)
-    return Statement(expr)
+def parse_statement(tokens: lex.Tokens) -> Statement:
+    """Parses a single statement.
+
+    throws:
+        A ValueError including the location of the error if the statement is malformed or incomplete.
+    """
+    try:
+        expr = expression.parse_expression(tokens)
+        parse_utils.next_token(tokens, token_types.Semicolon)
+    except IndexError:
+        raise ValueError(
+            "Unexpected end of input at {}".format(
+                parse_utils.describe_location(tokens, tokens.end(-1))
+            )
+        ) from None
+    result = Statement(expr)
+    result.end = tokens.end(-1)
+    return result
@@ -1,15 +1,49 @@
 from __future__ import annotations
+import re
 from abc import ABC
-from typing import Self, TYPE_CHECKING
+from typing import Callable, Self, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from compiler.parse import node, expression, statement
 
+Handler = Callable[["Visitor", "node.Node"], None]
+
+
+def no_op(hook: Callable) -> Callable:
+    """Marks a visitor hook which does nothing, so dispatch can skip it unless a subclass overrides it."""
+    hook.no_op = True
+    return hook
+
+
+def hook_name(node_type: type) -> str:
+    """Returns the name of the visitor hook for a node class, e.g. visit_binary_operation for BinaryOperation."""
+    return "visit_" + re.sub(r"(?<!^)(?=[A-Z])", "_", node_type.__name__).lower()
+
+
+def hook_names(node_type: type) -> list[str] | None:
+    """Returns the hooks the accept() chain of a node class calls, in the order it calls them.
+
+    Each class in the MRO which defines accept() calls its hook after super().accept(), so the hooks are in reverse
+    MRO order. Returns None if any hook does not follow the naming convention, in which case accept() must be used.
+    """
+    names = [
+        hook_name(cls) for cls in reversed(node_type.__mro__) if "accept" in vars(cls)
+    ]
+    return names if all(hasattr(Visitor, name) for name in names) else None
+
+
+def accept(visitor: Visitor, node: node.Node) -> None:
+    """Dispatches a node through its accept() chain, for node classes whose hooks cannot be looked up by name."""
+    node.accept(visitor)
+
 
 class Visitor(ABC):
     """A class which can be used to visit each node in an AST.
 
     Note that the default implementations do not visit any nodes in the tree recursively.
+
+    Nodes are dispatched through a table built once per visitor class, which maps each node class to the hooks its
+    accept() chain would call. Hooks marked no_op which a subclass has not overridden are left out of the table.
     """
 
     def visit(self, node: node.Node) -> Self:
@@ -17,9 +51,29 @@ class Visitor(ABC):
 
         Returns this Visitor.
         """
-        node.accept(self)
+        for handler in self.handlers(type(node)):
+            handler(self, node)
         return self
 
+    @classmethod
+    def handlers(cls, node_type: type) -> tuple[Handler, ...]:
+        """Returns the hooks to call for a node of the given class, in order, building them on first use."""
+        table = DISPATCH_TABLES.setdefault(cls, {})
+        try:
+            return table[node_type]
+        except KeyError:
+            pass
+        names = hook_names(node_type)
+        if names is None:
+            handlers = (accept,)
+        else:
+            hooks = [getattr(cls, name) for name in names]
+            handlers = tuple(
+                hook for hook in hooks if not getattr(hook, "no_op", False)
+            )
+        table[node_type] = handlers
+        return handlers
+
     def visit_all(self, *nodes: node.Node) -> None:
         """Visits each node."""
         all(map(self.visit, nodes))
@@ -28,6 +82,7 @@ class Visitor(ABC):
         node.accept_children(self)
         return self
 
+    @no_op
     def visit_node(self, node: node.Node) -> None:
         ...
 
@@ -37,30 +92,91 @@ class Visitor(ABC):
     def visit_statement(self, node: statement.Statement) -> None:
         self.visit(node.expression)
 
+    @no_op
     def visit_expression(self, node: expression.Expression) -> None:
         ...
 
     def visit_call(self, node: expression.Call) -> None:
         self.visit_all(*node.arguments)
 
+    @no_op
     def visit_terminal_node(self, node: expression.TerminalNode) -> None:
         ...
 
+    @no_op
     def visit_integer_node(self, node: expression.IntegerNode) -> None:
         ...
 
+    @no_op
+    def visit_id_node(self, node: expression.IdNode) -> None:
+        ...
+
     def visit_binary_operation(self, node: expression.BinaryOperation) -> None:
         self.visit(node.left)
         self.visit(node.right)
 
+    @no_op
     def visit_add(self, node: expression.Add) -> None:
         ...
 
+    @no_op
     def visit_multiply(self, node: expression.Multiply) -> None:
         ...
 
+    @no_op
     def visit_subtract(self, node: expression.Subtract) -> None:
         ...
 
+    @no_op
     def visit_divide(self, node: expression.Divide) -> None:
         ...
+
+
+# Maps each visitor class to its dispatch table, from node class to the hooks to call
+DISPATCH_TABLES: dict[type[Visitor], dict[type, tuple[Handler, ...]]] = {}
+
+
+class PostOrderVisitor(Visitor):
+    """A visitor which visits each node in a tree after its children, without recursion.
+
+    visit() walks the whole tree using an explicit stack, so trees of any depth can be visited.
+    Each node is dispatched to its hooks once its children have been visited, so hooks must not visit children themselves;
+    the default implementations which recurse into children do nothing.
+    """
+
+    def visit(self, node: node.Node) -> Self:
+        """Invokes this visitor on every node in the tree rooted at node.
+
+        Returns this Visitor.
+        """
+        table = DISPATCH_TABLES.setdefault(type(self), {})
+        # Each entry is a node and whether its children have already been pushed
+        stack: list[tuple[node.Node, bool]] = [(node, False)]
+        while stack:
+            current, expanded = stack.pop()
+            if expanded:
+                handlers = table.get(type(current))
+                if handlers is None:
+                    handlers = self.handlers(type(current))
+                for handler in handlers:
+                    handler(self, current)
+                continue
+            stack.append((current, True))
+            stack.extend((child, False) for child in reversed(current.children()))
+        return self
+
+    @no_op
+    def visit_statements(self, node: statement.Statements) -> None:
+        ...
+
+    @no_op
+    def visit_statement(self, node: statement.Statement) -> None:
+        ...
+
+    @no_op
+    def visit_call(self, node: expression.Call) -> None:
+        ...
+
+    @no_op
+    def visit_binary_operation(self, node: expression.BinaryOperation) -> None:
+        ...
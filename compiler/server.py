@@ -0,0 +1,310 @@
+"""Serves compile requests on a Unix socket, so repeated builds skip interpreter startup and reuse warm caches.
+
+Run with `python -m compiler.server`, and send requests with compiler.client, which describes the protocol. Each
+connection is handled on a thread of its own, so requests from many clients are served at once.
+
+Between requests the server keeps the imported compiler, a pool of worker processes forked from it, the targets it
+has resolved, and the statements of the last program compiled under each file name, so that only the statements
+which changed are compiled again.
+"""
+from __future__ import annotations
+import argparse
+import collections
+import concurrent.futures
+import dataclasses
+import io
+import json
+import os
+import socket
+import socketserver
+import sys
+import tempfile
+import threading
+import traceback
+from typing import Any, Callable, Sequence
+
+from compiler import client, main as compiler_main
+from compiler.generate import cache, incremental, llvm, sandbox, target
+from compiler.utils import arguments
+
+DEFAULT_MAX_BUILDERS = 64
+
+
+class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """A compile server listening on a Unix socket.
+
+    Attributes:
+        executor: The worker processes shared by every main request, or None to compile in the handling thread.
+        builders: The incremental builder for each file name and set of options, with a lock for each. Once more
+            than max_builders are kept, the least recently used is dropped, along with the statements it kept.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        path: str,
+        jobs: int | None = None,
+        max_builders: int = DEFAULT_MAX_BUILDERS,
+    ) -> None:
+        """
+        Args:
+            path: The socket to listen on. A socket left behind by a server which has stopped is replaced.
+            jobs: The number of worker processes, or None for one per CPU. With 1 job, files are compiled in the
+                thread handling the request.
+            max_builders: The most builders to keep, each of which holds the statements of a file.
+
+        throws:
+            ValueError: If a server is already listening on path.
+        """
+        remove_stale_socket(path)
+        self.executor = None
+        if jobs != 1:
+            self.executor = concurrent.futures.ProcessPoolExecutor(jobs)
+            # Fork the workers now, while no other thread is running
+            list(self.executor.map(int, range(jobs or os.cpu_count() or 1)))
+        self.max_builders = max_builders
+        self.builders: collections.OrderedDict[
+            tuple, tuple[incremental.IncrementalLlvm, threading.Lock]
+        ] = collections.OrderedDict()
+        self.builders_lock = threading.Lock()
+        self.commands: dict[str, Callable[[dict[str, Any]], dict[str, Any]]] = {
+            "ping": self.ping,
+            "compile": self.compile,
+            "execute": self.execute,
+            "main": self.main,
+            "shutdown": self.stop,
+        }
+        try:
+            super().__init__(path, Handler)
+        except OSError:
+            self.close_executor()
+            raise
+
+    def respond(self, line: bytes) -> dict[str, Any]:
+        """Carries out the request on line, returning the response, which holds an error if the request failed.
+
+        Unexpected exceptions are printed to stderr as well.
+        """
+        try:
+            message = json.loads(line)
+            command = self.commands.get(message.get("command"))
+            if command is None:
+                raise ValueError("Unknown command: {}".format(message.get("command")))
+            return command(message)
+        except (AttributeError, KeyError, TypeError) as error:
+            return {"error": "Malformed request: {!r}".format(error)}
+        except (OSError, ValueError) as error:
+            return {"error": str(error)}
+        except Exception as error:
+            # A bug must not take the connection down, or the client could not tell it from a missing server
+            traceback.print_exc()
+            return {"error": "{}: {}".format(type(error).__name__, error)}
+
+    def ping(self, _: dict[str, Any]) -> dict[str, Any]:
+        return {"pid": os.getpid()}
+
+    def compile(self, message: dict[str, Any]) -> dict[str, Any]:
+        """Generates the LLVM for message["source"], reusing the statements unchanged since the last request for the
+        same file name and options, and compiles it to message["binary"] if given.
+
+        throws:
+            ValueError: If a path in message is relative to the working directory.
+        """
+        check_path("binary", message.get("binary"))
+        check_program("compiler", message.get("compiler"))
+        check_program("opt", message.get("opt"))
+        machine = target.resolve(
+            message.get("cpu"),
+            message.get("features"),
+            message.get("compiler", sandbox.DEFAULT_COMPILER),
+            message.get("triple"),
+        )
+        builder, lock = self.builder(
+            message.get("file_name", "temp.c"),
+            message.get("ssa", False),
+            message.get("optimize", False),
+            message.get("optimization", 0),
+            machine,
+        )
+        with lock:
+            llvm_code = builder.generate(message["source"])
+            parsed = builder.parsed
+        binary = message.get("binary")
+        if binary is not None:
+            with tempfile.TemporaryDirectory(prefix="compiler-") as directory:
+                sandbox.compile_cached(
+                    llvm_code,
+                    binary,
+                    directory,
+                    flags=llvm.optimization_flags(builder.optimization),
+                    compiler=message.get("compiler", sandbox.DEFAULT_COMPILER),
+                    cache=cache.default_cache(),
+                    passes=message.get("passes"),
+                    opt=message.get("opt", sandbox.DEFAULT_OPT),
+                )
+        return {"llvm": llvm_code, "binary_path": binary, "parsed": parsed}
+
+    def execute(self, message: dict[str, Any]) -> dict[str, Any]:
+        """Compiles and runs message["source"], returning the fields of its sandbox.ExecutionResult."""
+        llvm_code = self.compile({**message, "binary": None})["llvm"]
+        result = sandbox.run(
+            llvm_code,
+            timeout=message.get("timeout"),
+            flags=llvm.optimization_flags(message.get("optimization", 0)),
+            compiler=message.get("compiler", sandbox.DEFAULT_COMPILER),
+            cache=cache.default_cache(),
+            passes=message.get("passes"),
+            opt=message.get("opt", sandbox.DEFAULT_OPT),
+        )
+        return dataclasses.asdict(result)
+
+    def main(self, message: dict[str, Any]) -> dict[str, Any]:
+        """Runs compiler.main on the parsed arguments message["args"], returning its status and output.
+
+        throws:
+            ValueError: If a path in the arguments is relative to the working directory.
+        """
+        args = argparse.Namespace(**message["args"])
+        for pattern in args.PROGRAMS:
+            check_path("PROGRAMS", pattern)
+        check_program("compiler", args.compiler)
+        check_program("opt", args.opt)
+        stdout = io.StringIO()
+        stderr = io.StringIO()
+        status = compiler_main.compile_programs(args, stdout, stderr, self.executor)
+        return {
+            "status": status,
+            "stdout": stdout.getvalue(),
+            "stderr": stderr.getvalue(),
+        }
+
+    def stop(self, _: dict[str, Any]) -> dict[str, Any]:
+        # shutdown waits for serve_forever to return, so it must not block the thread handling this request
+        threading.Thread(target=self.shutdown).start()
+        return {}
+
+    def builder(
+        self,
+        file_name: str,
+        ssa: bool,
+        optimize: bool,
+        optimization: int,
+        machine: target.Target,
+    ) -> tuple[incremental.IncrementalLlvm, threading.Lock]:
+        """Returns the builder kept for file_name and the options, and the lock to hold while using it.
+
+        A thread still using a builder which is dropped meanwhile finishes with it, but its work is not reused.
+        """
+        key = (file_name, ssa, optimize, optimization, machine)
+        with self.builders_lock:
+            entry = self.builders.get(key)
+            if entry is not None:
+                self.builders.move_to_end(key)
+                return entry
+            entry = (
+                incremental.IncrementalLlvm(
+                    file_name, ssa, optimize, optimization, machine
+                ),
+                threading.Lock(),
+            )
+            self.builders[key] = entry
+            if len(self.builders) > self.max_builders:
+                self.builders.popitem(last=False)
+            return entry
+
+    def close_executor(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    def server_close(self) -> None:
+        super().server_close()
+        self.close_executor()
+        try:
+            os.unlink(self.server_address)
+        except FileNotFoundError:
+            pass
+
+
+class Handler(socketserver.StreamRequestHandler):
+    """Answers each request on a connection in turn, until the client closes it."""
+
+    server: Server
+
+    def handle(self) -> None:
+        try:
+            for line in self.rfile:
+                response = self.server.respond(line)
+                self.wfile.write(json.dumps(response).encode() + b"\n")
+        except ConnectionError:
+            # The client went away before reading its response
+            pass
+
+
+def check_path(name: str, path: str | None) -> None:
+    """Checks that path, if given, is absolute, since the server's working directory is not the client's.
+
+    throws:
+        ValueError: If path is relative.
+    """
+    if path is not None and not os.path.isabs(path):
+        raise ValueError(
+            "{} must be an absolute path, since the server has its own working directory, got: {}".format(
+                name, path
+            )
+        )
+
+
+def check_program(name: str, program: str | None) -> None:
+    """Checks that program, if given, is an absolute path or a bare name looked up on PATH.
+
+    throws:
+        ValueError: If program is a relative path, such as bin/clang.
+    """
+    if program is not None and os.path.dirname(program):
+        check_path(name, program)
+
+
+def remove_stale_socket(path: str) -> None:
+    """Removes the socket at path if no server is listening on it.
+
+    throws:
+        ValueError: If a server is listening on path.
+    """
+    if not os.path.exists(path):
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except OSError:
+        os.unlink(path)
+    else:
+        raise ValueError("A server is already listening on {}".format(path))
+    finally:
+        probe.close()
+
+
+def serve(argv: Sequence[str] | None = None) -> int:
+    """The entrypoint for the compile server, which serves until it is interrupted or sent shutdown.
+
+    Returns the exit status: 2 if the server could not start, otherwise 0.
+    """
+    args = arguments.get_server_args(argv)
+    try:
+        path = args.socket or client.default_socket()
+        server = Server(path, args.jobs)
+    except (OSError, ValueError) as error:
+        print(error, file=sys.stderr)
+        return 2
+    with server:
+        print("Listening on {}".format(path), flush=True)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(serve())
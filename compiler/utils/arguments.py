@@ -1,12 +1,25 @@
 # import pkg_resources
 from argparse import ArgumentParser, Namespace
+from typing import Sequence
 
+from compiler.generate import llvm, sandbox
 
-def get_args() -> Namespace:
+
+def positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise ValueError("must be at least 1")
+    return number
+
+
+def get_args(argv: Sequence[str] | None = None) -> Namespace:
     """Parse and return arguments
 
+    Args:
+        argv: The arguments to parse, or None for sys.argv.
+
     Returns:
-        Namespace: Parsed argu
+        Namespace: Parsed arguments
     """
     distribution = "0.1"  # pkg_resources.get_distribution("ecco")
 
@@ -15,7 +28,101 @@ def get_args() -> Namespace:
         description="An Educational C COmpiler written in Python",
     )
 
-    parser.add_argument("PROGRAM", type=str, help="Filename of input program")
+    parser.add_argument(
+        "PROGRAMS",
+        type=str,
+        nargs="+",
+        help="Filenames or glob patterns of input programs, ** matching any number of directories",
+    )
+
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=positive_int,
+        default=None,
+        help="Number of worker processes, one per CPU by default",
+    )
+
+    parser.add_argument(
+        "--chunksize",
+        type=positive_int,
+        default=1,
+        help="Number of files sent to a worker at a time",
+    )
+
+    parser.add_argument(
+        "--binary",
+        "-b",
+        action="store_true",
+        help="Also compile a binary next to each program",
+    )
+
+    parser.add_argument(
+        "--compiler",
+        type=str,
+        default=sandbox.DEFAULT_COMPILER,
+        help="Compiler used to build binaries, which must accept clang's arguments",
+    )
+
+    parser.add_argument(
+        "-O",
+        dest="optimization",
+        type=int,
+        choices=llvm.OPTIMIZATION_LEVELS,
+        default=0,
+        help="Optimization level, from {} to {}".format(
+            llvm.OPTIMIZATION_LEVELS[0], llvm.OPTIMIZATION_LEVELS[-1]
+        ),
+    )
+
+    parser.add_argument(
+        "--passes",
+        type=str,
+        default=None,
+        help="Pipeline of passes for opt to run before compiling binaries, e.g. mem2reg,instcombine",
+    )
+
+    parser.add_argument(
+        "--opt",
+        type=str,
+        default=sandbox.DEFAULT_OPT,
+        help="opt used to run --passes",
+    )
+
+    parser.add_argument(
+        "--cpu",
+        type=str,
+        default=None,
+        help="CPU to tune for, or native to detect the host with --compiler. Defaults to the x86-64 baseline, and must be a CPU of the --triple architecture",
+    )
+
+    parser.add_argument(
+        "--triple",
+        type=str,
+        default=None,
+        help="Target triple to generate code for, e.g. aarch64-unknown-linux-gnu, with its data layout found with --compiler. Defaults to x86_64-pc-linux-gnu",
+    )
+
+    parser.add_argument(
+        "--features",
+        type=str,
+        default=None,
+        help="Target features to enable instead of those of --cpu, e.g. +avx2,+fma",
+    )
+
+    parser.add_argument(
+        "--report",
+        type=str,
+        default=None,
+        help="Write the time spent in each phase and counts of what each handled to this JSON file",
+    )
+
+    parser.add_argument(
+        "--trace",
+        type=str,
+        default=None,
+        help="Write each timed phase to this file in the Chrome trace event format",
+    )
 
     parser.add_argument(
         "--version",
@@ -24,4 +131,36 @@ def get_args() -> Namespace:
         version=f"{parser.prog} {distribution}",
     )
 
-    return parser.parse_args()
+    return parser.parse_args(argv)
+
+
+def get_server_args(argv: Sequence[str] | None = None) -> Namespace:
+    """Parse and return the arguments of the compile server
+
+    Args:
+        argv: The arguments to parse, or None for sys.argv.
+
+    Returns:
+        Namespace: Parsed arguments
+    """
+    parser = ArgumentParser(
+        prog="ecco-server",
+        description="Serve compile requests on a Unix socket, keeping the compiler and its caches warm",
+    )
+
+    parser.add_argument(
+        "--socket",
+        type=str,
+        default=None,
+        help="Path of the socket to listen on. Defaults to $ECCO_SOCKET, or ecco.sock in $XDG_RUNTIME_DIR or a private directory in the temporary directory",
+    )
+
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=positive_int,
+        default=None,
+        help="Number of worker processes shared by every request, one per CPU by default",
+    )
+
+    return parser.parse_args(argv)
@@ -0,0 +1,220 @@
+import concurrent.futures
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+from compiler import driver, main
+from compiler.optimize import fold
+from compiler.utils import instrument
+from test_compiler import test_generate
+
+
+def setUpModule():
+    test_generate.isolate_cache()
+
+
+class TestDriver(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.sources = [
+            self.write("a.c", "print(1 + 2);\nprint(3);\n"),
+            self.write("nested/b.c", "4 * 5;\n"),
+            self.write("nested/deeper/c.c", "6 - 7;\n8;\n9;\n"),
+        ]
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, name: str, program: str) -> str:
+        path = os.path.join(self.directory.name, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as file:
+            file.write(program)
+        return path
+
+    def test_expand(self):
+        pattern = os.path.join(self.directory.name, "**", "*.c")
+        self.assertListEqual(driver.expand([pattern]), sorted(self.sources))
+        self.assertListEqual(
+            driver.expand([self.sources[1], pattern]),
+            [self.sources[1], self.sources[0], self.sources[2]],
+        )
+        with self.assertRaisesRegex(ValueError, "No files match"):
+            driver.expand([os.path.join(self.directory.name, "*.h")])
+
+    def test_compile_files(self):
+        bad = self.write("bad.c", "1 +;\n")
+        empty = self.write("empty.c", "print();\n")
+        sources = self.sources + [bad, empty]
+        for jobs, chunksize in [(1, 1), (2, 1), (2, 3)]:
+            with self.subTest(jobs=jobs, chunksize=chunksize):
+                seen = []
+                report = driver.compile_files(
+                    sources, jobs, chunksize, callback=seen.append
+                )
+                self.assertListEqual(
+                    [result.source for result in report.results], sources
+                )
+                self.assertListEqual(seen, report.results)
+                self.assertEqual(report.lines, 8)
+                self.assertListEqual(
+                    [result.source for result in report.failures], [bad, empty]
+                )
+                self.assertIn("Unexpected", report.failures[0].error)
+                self.assertEqual(report.failures[1].error, "print requires an argument")
+                for source in self.sources:
+                    with open(driver.output_path(source, ".ll")) as file:
+                        self.assertIn('source_filename = "', file.read())
+                self.assertFalse(os.path.exists(driver.output_path(bad, ".ll")))
+
+    def test_unexpected_error(self):
+        with mock.patch.object(fold, "fold", side_effect=IndexError("oops")):
+            result = driver.compile_file(self.sources[0])
+        self.assertEqual(result.error, "IndexError: oops")
+        self.assertIsNone(result.llvm_path)
+
+    def test_binary(self):
+        compiler = test_generate.make_script(
+            self.directory.name, "fake", test_generate.FAKE_COMPILER
+        )
+        result = driver.compile_file(self.sources[0], binary=True, compiler=compiler)
+        self.assertIsNone(result.error)
+        self.assertEqual(
+            result.binary_path, driver.output_path(self.sources[0], ".out")
+        )
+        with open(result.binary_path) as binary, open(result.llvm_path) as llvm_file:
+            self.assertEqual(binary.read(), llvm_file.read())
+
+    def test_main(self):
+        pattern = os.path.join(self.directory.name, "**", "*.c")
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            self.assertEqual(main.main([pattern, "-j", "2"]), 0)
+        lines = stdout.getvalue().splitlines()
+        self.assertListEqual(
+            lines[:-1],
+            [
+                "{} -> {}".format(s, driver.output_path(s, ".ll"))
+                for s in sorted(self.sources)
+            ],
+        )
+        self.assertRegex(lines[-1], r"^Compiled 3 files \(6 lines, 0 failed\)")
+
+        self.write("bad.c", "1 +;\n")
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(
+            io.StringIO()
+        ):
+            self.assertEqual(main.main([pattern]), 1)
+
+        for flags, message in [
+            (["--passes", "mem2reg", "-O2"], "add --binary"),
+            (["--passes", "mem2reg", "--binary"], "no effect at -O0"),
+        ]:
+            stderr = io.StringIO()
+            with contextlib.redirect_stderr(stderr):
+                self.assertEqual(main.main([pattern, *flags]), 2)
+            self.assertIn(message, stderr.getvalue())
+
+
+class TestInstrument(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        instrument.reset()
+
+    def tearDown(self):
+        instrument.disable()
+        instrument.reset()
+        self.directory.cleanup()
+
+    def test_disabled(self):
+        with instrument.span("phase") as span:
+            instrument.count("things", 3)
+        self.assertIsNone(span)
+        self.assertEqual(instrument.report(), {"phases": {}, "counts": {}})
+
+    def test_nested_spans(self):
+        instrument.enable()
+        with instrument.span("outer") as outer:
+            instrument.count("things")
+            for _ in range(2):
+                with instrument.span("inner") as inner:
+                    instrument.count("things", 2)
+        self.assertEqual((outer.depth, inner.depth), (0, 1))
+        self.assertEqual(outer.counts, {"things": 1})
+        self.assertEqual(inner.counts, {"things": 2})
+        self.assertGreaterEqual(outer.wall, inner.wall)
+
+        report = instrument.report()
+        self.assertEqual(report["counts"], {"things": 5})
+        self.assertEqual(list(report["phases"]), ["inner", "outer"])
+        self.assertEqual(report["phases"]["inner"]["calls"], 2)
+
+        events = instrument.trace_events()
+        self.assertListEqual(
+            [event["name"] for event in events], ["outer", "inner", "inner"]
+        )
+        self.assertEqual(events[0]["ph"], "X")
+        self.assertEqual(events[1]["args"]["things"], 2)
+
+    def test_main(self):
+        source = os.path.join(self.directory.name, "a.c")
+        with open(source, "w") as file:
+            file.write("print(1 + 2 * 3);\nprint(4);\n")
+        report_path = os.path.join(self.directory.name, "report.json")
+        trace_path = os.path.join(self.directory.name, "trace.json")
+        for jobs in ["1", "2"]:
+            with self.subTest(jobs=jobs):
+                instrument.disable()
+                instrument.reset()
+                arguments = [
+                    source,
+                    source,
+                    "-j",
+                    jobs,
+                    "--report",
+                    report_path,
+                    "--trace",
+                    trace_path,
+                ]
+                with contextlib.redirect_stdout(io.StringIO()):
+                    self.assertEqual(main.main(arguments), 0)
+                with open(report_path) as file:
+                    report = json.load(file)
+                self.assertEqual(
+                    set(report["phases"]),
+                    {"main", "compile_file", "lex", "parse", "optimize", "generate"},
+                )
+                self.assertEqual(report["phases"]["lex"]["calls"], 1)
+                self.assertEqual(report["counts"]["lines"], 2)
+                self.assertEqual(report["counts"]["tokens"], 14)
+                self.assertEqual(report["counts"]["nodes"], 11)
+                self.assertEqual(report["counts"]["nodes_removed"], 4)
+                with open(trace_path) as file:
+                    events = json.load(file)["traceEvents"]
+                self.assertEqual(events[0]["name"], "main")
+                self.assertEqual(len(events), 6)
+                # Nothing is left recording once main returns
+                self.assertFalse(instrument.enabled())
+                self.assertEqual(instrument.report(), {"phases": {}, "counts": {}})
+
+    def test_shared_executor(self):
+        sources = [os.path.join(self.directory.name, name) for name in ["a.c", "b.c"]]
+        for source in sources:
+            with open(source, "w") as file:
+                file.write("print(1);\n")
+        with concurrent.futures.ProcessPoolExecutor(1) as executor:
+            # Start the worker before enabling, as the compile server does, so it does not inherit the setting
+            self.assertFalse(executor.submit(instrument.enabled).result())
+            instrument.enable()
+            report = driver.compile_files(sources, 2, executor=executor)
+            self.assertFalse(report.failures)
+            self.assertEqual(instrument.report()["phases"]["lex"]["calls"], 2)
+            # The worker stops recording once it has sent back what it recorded
+            self.assertFalse(executor.submit(instrument.enabled).result())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,37 @@
+import concurrent.futures
+import io
+import itertools
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
 import unittest
-from compiler.parse import parse
-from compiler.generate import python_visitor, llvm
+from unittest import mock
+from compiler.parse import parse, pool
+from compiler.generate import batch, bytecode, cache, incremental, jit, llvm, sandbox
+from compiler.generate import target
+from compiler.generate import numpy_visitor, python_codegen, python_visitor
 from compiler.lex import lex
+from compiler.optimize import fold
+
+
+def setUpModule():
+    isolate_cache()
+
+
+def isolate_cache() -> None:
+    """Points the default binary cache at a temporary directory until the calling module's tests finish.
+
+    llvm.execute and batch.execute use the default cache, which would otherwise be the developer's own.
+    """
+    directory = unittest.enterModuleContext(
+        tempfile.TemporaryDirectory(prefix="compiler-test-")
+    )
+    unittest.enterModuleContext(
+        mock.patch.dict(os.environ, {cache.CACHE_DIR_VARIABLE: directory})
+    )
 
 
 class TestPythonVisitor(unittest.TestCase):
@@ -15,6 +45,196 @@ class TestPythonVisitor(unittest.TestCase):
         visitor = python_visitor.PythonVisitor().visit(node)
         self.assertEqual(visitor.node_count, 7)
 
+    def test_call(self):
+        node = parse.parse_code("print(2 * 3); f(1, 2) + f(); f() * 2;")
+        visitor = python_visitor.PythonVisitor().visit(node)
+        self.assertListEqual(visitor.results, [6, 2, 0])
+
+    def test_bindings(self):
+        node = parse.parse_code("x * 2 + f(y, 3); x / y;")
+        visitor = python_visitor.PythonVisitor({"x": 7, "y": -2}).visit(node)
+        self.assertListEqual(visitor.results, [17, -4])
+        with self.assertRaisesRegex(ValueError, "Unbound identifier: y"):
+            python_visitor.PythonVisitor({"x": 7}).visit(node)
+
+    def test_node_pool(self):
+        node = pool.from_node(parse.parse_code("1 + 2 * 3; f(4, 5);")).to_node()
+        visitor = python_visitor.PythonVisitor().visit(node)
+        self.assertListEqual(visitor.results, [7, 5])
+
+
+@unittest.skipUnless(numpy_visitor.available(), "NumPy is not installed")
+class TestNumpyVisitor(unittest.TestCase):
+    def test_matches_python_visitor(self):
+        node = parse.parse_code("x * 2 + f(y, 3); 7; x / y - 1; f() - x; print(y);")
+        columns = {"x": [1, -7, 1000000, 0], "y": [3, 2, -4, 5]}
+        results = numpy_visitor.evaluate(node, columns)
+        self.assertEqual(len(results), 5)
+        for row in range(4):
+            bindings = {name: column[row] for name, column in columns.items()}
+            self.assertListEqual(
+                [int(result[row]) for result in results],
+                python_visitor.PythonVisitor(bindings).visit(node).results,
+            )
+
+    def test_overflow_wraps(self):
+        node = parse.parse_code("x * 4; 4611686018427387904 * 2;")
+        results = numpy_visitor.evaluate(node, {"x": [2**62]})
+        self.assertListEqual([int(result[0]) for result in results], [0, -(2**63)])
+
+    def test_errors(self):
+        with self.assertRaises(ZeroDivisionError):
+            numpy_visitor.evaluate(parse.parse_code("1 / x;"), {"x": [1, 0]})
+        with self.assertRaisesRegex(ValueError, "same length"):
+            numpy_visitor.evaluate(parse.parse_code("x;"), {"x": [1], "y": [1, 2]})
+        with self.assertRaisesRegex(ValueError, "Unbound identifier: z"):
+            numpy_visitor.evaluate(parse.parse_code("z;"), {"x": [1]})
+
+
+class TestIncremental(unittest.TestCase):
+    def test_matches_full_build(self):
+        edits = ["print(1 + 2 * 3);", "7;", "f(4 * 5, 6 - 1);", "print(9 / 3);", "g();"]
+        for ssa, optimize in itertools.product([False, True], repeat=2):
+            with self.subTest(ssa=ssa, optimize=optimize):
+                compiler = incremental.IncrementalLlvm("edit.c", ssa, optimize)
+                rng = random.Random(0)
+                lines = ["print({} * {});".format(i, i + 1) for i in range(50)]
+                for _ in range(20):
+                    index = rng.randrange(len(lines))
+                    if rng.random() < 0.2:
+                        lines.insert(index, rng.choice(edits))
+                    elif rng.random() < 0.2:
+                        del lines[index]
+                    else:
+                        lines[index] = rng.choice(edits)
+                    program = "\n".join(lines) + "\n"
+                    tree = parse.parse_code(program)
+                    if optimize:
+                        tree, _ = fold.fold(tree)
+                    self.assertEqual(
+                        compiler.generate(program), llvm.generate(tree, "edit.c", ssa)
+                    )
+
+    def test_reuse(self):
+        compiler = incremental.IncrementalLlvm(ssa=True)
+        compiler.generate("print(1 + 2);\nprint(3 * 4);\nprint(5 - 6);\n")
+        self.assertEqual((compiler.parsed, compiler.renumbered), (3, 3))
+        compiler.generate("print(1 + 2);\nprint(3 / 4);\nprint(5 - 6);\n")
+        self.assertEqual((compiler.parsed, compiler.renumbered), (1, 1))
+        compiler.generate("print(1 + 2);\nprint(3 / 4 + 1);\nprint(5 - 6);\n")
+        self.assertEqual((compiler.parsed, compiler.renumbered), (1, 2))
+
+    def test_errors(self):
+        compiler = incremental.IncrementalLlvm()
+        for program in ["1 +;", "1; 2", ";;"]:
+            with self.subTest(program=program):
+                with self.assertRaisesRegex(ValueError, "Unexpected"):
+                    compiler.generate(program)
+        self.assertEqual(
+            compiler.generate("print(1); @ 2;"),
+            llvm.generate(parse.parse_code("print(1); @ 2;")),
+        )
+
+
+class TestBytecode(unittest.TestCase):
+    def test_matches_python_visitor(self):
+        for code in [
+            "1 + 2 * 3; 2 * 3 + 1; 10 / 2; 1 - 7 / 2;",
+            "print(2 * 3); f(1, 2) + f(); f() * 2; 3 - f(4, 5 * 6) * 2;",
+        ]:
+            node = parse.parse_code(code)
+            self.assertListEqual(
+                bytecode.evaluate(node),
+                python_visitor.PythonVisitor().visit(node).results,
+            )
+
+    def test_const_instructions(self):
+        program = bytecode.compile_node(parse.parse_code("1 + 2 * 3; 4 * f(4);"))
+        self.assertListEqual(
+            list(program.opcodes),
+            [
+                bytecode.CONST,
+                bytecode.CONST,
+                bytecode.MULTIPLY_CONST,
+                bytecode.ADD,
+                bytecode.STATEMENT,
+                bytecode.CONST,
+                bytecode.CONST,
+                bytecode.CALL,
+                bytecode.MULTIPLY,
+                bytecode.STATEMENT,
+            ],
+        )
+        self.assertListEqual(program.constants, [1, 2, 3, 4])
+        self.assertListEqual(program.run(), program.run())
+
+    def test_divide_by_zero(self):
+        with self.assertRaises(ZeroDivisionError):
+            bytecode.evaluate(parse.parse_code("1 / 0;"))
+
+    def test_identifier(self):
+        with self.assertRaisesRegex(ValueError, "not supported .* got: x"):
+            bytecode.evaluate(parse.parse_code("x + 1;"))
+
+
+class TestPythonCodegen(unittest.TestCase):
+    def test_matches_python_visitor(self):
+        for code in [
+            "1 + 2 * 3; 2 * 3 + 1; 10 / 2; 1 - 7 / 2;",
+            "print(2 * 3); f(1, 2) + f(); f() * 2; 3 - f(4, 5 * 6) * 2; f(1);",
+        ]:
+            node = parse.parse_code(code)
+            self.assertListEqual(
+                python_codegen.evaluate(node),
+                python_visitor.PythonVisitor().visit(node).results,
+            )
+
+    def test_print(self):
+        output = []
+        program = python_codegen.compile_node(
+            parse.parse_code("print(2 * 3); f(print(1, 2)) + print(3);")
+        )
+        self.assertListEqual(program.run(output), [6, 5])
+        self.assertListEqual(output, [6, 1, 3])
+
+    def test_deep_expression_order(self):
+        depth = 1_000
+        node = parse.parse_code(
+            "".join("print({}) + f(".format(i) for i in range(depth))
+            + "0"
+            + ")" * depth
+            + ";"
+        )
+        output = []
+        results = python_codegen.compile_node(node).run(output)
+        self.assertListEqual(output, list(range(depth)))
+        self.assertListEqual(results, [depth * (depth - 1) // 2])
+
+    def test_code_cache(self):
+        node = parse.parse_code("print(7 * 6);")
+        python_codegen.evaluate(node)
+        hits = python_codegen.compile_source.cache_info().hits
+        python_codegen.evaluate(node)
+        self.assertEqual(python_codegen.compile_source.cache_info().hits, hits + 1)
+
+
+class TestDeepTrees(unittest.TestCase):
+    """Stress tests for trees which are too deep to parse or visit recursively."""
+
+    def test_long_expression(self):
+        operators = 10**6
+        node = parse.parse_code("1" + " + 2 * 3" * (operators // 2) + ";")
+        visitor = python_visitor.PythonVisitor().visit(node)
+        self.assertListEqual(visitor.results, [3 * operators + 1])
+        self.assertListEqual(bytecode.evaluate(node), [3 * operators + 1])
+
+    def test_nested_calls(self):
+        depth = 10**5
+        node = parse.parse_code("f(1 + " * depth + "1" + ")" * depth + ";")
+        visitor = python_visitor.PythonVisitor().visit(node)
+        self.assertListEqual(visitor.results, [depth + 1])
+        self.assertListEqual(python_codegen.evaluate(node), [depth + 1])
+
 
 class TestLlvm(unittest.TestCase):
     def test_call_parse(self):
@@ -23,6 +243,383 @@ class TestLlvm(unittest.TestCase):
         results = [int(line) for line in result.splitlines()]
         self.assertListEqual(results, [7, 7])
 
+    @unittest.skipUnless(shutil.which("clang"), "clang is not installed")
+    def test_ssa_call_parse(self):
+        node = parse.parse_code("print(1 + 2 * 3); 2 * 2; print(f() + 1);")
+        result = llvm.execute(llvm.generate(node, ssa=True))
+        results = [int(line) for line in result.splitlines()]
+        self.assertListEqual(results, [7, 1])
+
+    @unittest.skipUnless(shutil.which("clang"), "clang is not installed")
+    def test_execute_streamed(self):
+        node = parse.parse_code("print(1 + 2 * 3); print(4);")
+        result = llvm.execute(llvm.Llvm("temp.c", node, ssa=True))
+        self.assertListEqual(result.splitlines(), ["7", "4"])
+
+    def test_write(self):
+        node = parse.parse_code("print(1 + 2 * 3); f(4);")
+        stream = io.StringIO()
+        llvm.write(node, stream)
+        self.assertEqual(stream.getvalue(), llvm.generate(node))
+        self.assertIn("  %1 = alloca i32, align 4\n", stream.getvalue())
+        self.assertIn("  ret i32 0\n}\n", stream.getvalue())
+
+    def test_ssa_registers(self):
+        node = parse.parse_code("print(1 + 2 * 3);")
+        code = llvm.generate(node, ssa=True)
+        self.assertNotIn("alloca", code)
+        self.assertIn("%1 = mul nsw i32 2, 3\n  %2 = add nsw i32 1, %1\n", code)
+        self.assertIn("@printf(ptr noundef @.str, i32 noundef %2)", code)
+
+    def test_optimization(self):
+        node = parse.parse_code("print(1 + 2 * 3);")
+        self.assertIn(
+            "; Function Attrs: noinline nounwind optnone uwtable\n",
+            llvm.generate(node),
+        )
+        for optimization in [1, 2, 3]:
+            code = llvm.generate(node, optimization=optimization)
+            self.assertIn("; Function Attrs: nounwind uwtable\n", code)
+            self.assertNotIn("optnone", code)
+        self.assertListEqual(llvm.optimization_flags(2), ["-O2"])
+        with self.assertRaisesRegex(ValueError, "Optimization level"):
+            llvm.generate(node, optimization=4)
+
+
+class TestBatch(unittest.TestCase):
+    PROGRAMS = ["print(1 + 2 * 3); print(f(4));", "2;", "print(9 / 2);"]
+
+    def test_generate(self):
+        trees = [parse.parse_code(program) for program in self.PROGRAMS]
+        code = batch.generate(trees, ssa=True)
+        for index in range(3):
+            self.assertIn(
+                "define dso_local i32 @program_{}() #0 {{".format(index), code
+            )
+        self.assertEqual(code.count("define dso_local i32 @main()"), 1)
+        self.assertEqual(code.count("declare i32 @printf"), 1)
+        self.assertEqual(code.count("call i32 @fflush(ptr noundef null)"), 3)
+
+    def test_split_output(self):
+        self.assertListEqual(
+            batch.split_output("7\n4\n\x1e\n\x1e\n4\n\x1e\n1\n"), ["7\n4", "", "4"]
+        )
+
+    @unittest.skipUnless(shutil.which("clang"), "clang is not installed")
+    def test_execute(self):
+        trees = [parse.parse_code(program) for program in self.PROGRAMS]
+        self.assertListEqual(batch.execute(trees), ["7\n4", "", "4"])
+
+    @unittest.skipUnless(shutil.which("clang"), "clang is not installed")
+    def test_crash(self):
+        programs = ["print(1);", "print(2);", "print(1 / 0);", "print(3);"]
+        trees = [parse.parse_code(program) for program in programs]
+        with self.assertRaisesRegex(ValueError, "Program 2 of the batch"):
+            batch.execute(trees)
+
+
+@unittest.skipUnless(jit.available(), "llvmlite is not installed")
+class TestJit(unittest.TestCase):
+    def test_execute(self):
+        node = parse.parse_code("print(1 + 2 * 3); 2 * 2; print(f() + 9 / 2);")
+        self.assertEqual(jit.execute(llvm.generate(node)), "7\n4")
+        self.assertEqual(jit.execute(llvm.Llvm("temp.c", node, ssa=True)), "7\n4")
+
+    def test_module_reuse(self):
+        engine = jit.Jit()
+        code = llvm.generate(parse.parse_code("print(5);"))
+        self.assertEqual(engine.run(code), ("5\n", 0))
+        self.assertEqual(engine.run(code), ("5\n", 0))
+        self.assertEqual((engine.hits, engine.misses), (1, 1))
+
+    def test_concurrent_eviction(self):
+        # Every compile releases the module another thread is about to run
+        engine = jit.Jit(max_modules=1)
+        codes = [
+            llvm.generate(parse.parse_code("print({});".format(i))) for i in range(4)
+        ]
+
+        def run(index: int) -> list[str]:
+            return [engine.run(codes[index])[0] for _ in range(25)]
+
+        with concurrent.futures.ThreadPoolExecutor(4) as executor:
+            outputs = list(executor.map(run, range(4)))
+        self.assertListEqual(outputs, [["{}\n".format(i)] * 25 for i in range(4)])
+
+    @unittest.skipUnless(shutil.which("clang"), "clang is not installed")
+    def test_matches_clang(self):
+        node = parse.parse_code("print(2147483647 + 1); print(f(1 - 2) / 2);")
+        code = llvm.generate(node)
+        self.assertEqual(jit.execute(code), llvm.execute(code))
+
+
+# Stands in for clang by "compiling" a shell script to itself
+FAKE_COMPILER = """#!/bin/sh
+while [ $# -gt 0 ]; do if [ "$1" = "-o" ]; then out="$2"; fi; shift; done
+cat > "$out" && chmod +x "$out"
+"""
+# Appends a line printing its arguments to the program
+FAKE_OPT = """#!/bin/sh
+cat; echo "echo $*"
+"""
+FAILING_COMPILER = """#!/bin/sh
+echo "error: bad input" >&2
+exit 1
+"""
+# Never reads its input, so the pipe to it fills up
+HANGING_COMPILER = """#!/bin/sh
+exec sleep 30
+"""
+
+
+def make_script(directory: str, name: str, script: str) -> str:
+    path = os.path.join(directory, name)
+    with open(path, "w") as file:
+        file.write(script)
+    os.chmod(path, 0o755)
+    return path
+
+
+# Answers the probe target.detect sends, like clang -march=native -S -emit-llvm would
+PROBE_COMPILER = """#!/bin/sh
+cat > /dev/null
+echo 'target datalayout = "e-m:e-i64:64-n8:16:32:64-S128"'
+echo 'target triple = "x86_64-unknown-linux-gnu"'
+echo 'attributes #0 = { "target-cpu"="skylake" "target-features"="+avx,+avx2" "tune-cpu"="generic" }'
+"""
+
+# Answers the probe target.for_triple sends, like clang --target=... -S -emit-llvm would
+TRIPLE_COMPILER = """#!/bin/sh
+cat > /dev/null
+echo 'target datalayout = "e-m:e-i8:8:32-i16:16:32-i64:64-i128:128-n32:64-S128"'
+echo "target triple = \\"${1#--target=}\\""
+echo 'attributes #0 = { "target-cpu"="generic" "target-features"="+neon" }'
+"""
+
+
+class TestTarget(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_explicit(self):
+        node = parse.parse_code("print(1);")
+        machine = target.explicit("skylake", "+avx2")
+        code = llvm.generate(node, target=machine)
+        self.assertEqual(code.count('"target-cpu"="skylake"'), 2)
+        self.assertEqual(code.count('"target-features"="+avx2"'), 2)
+        self.assertEqual(code.count('"tune-cpu"="skylake"'), 2)
+        self.assertIn('target triple = "x86_64-pc-linux-gnu"', code)
+        self.assertEqual(code.count('"target-cpu"="x86-64"'), 0)
+        baseline = llvm.generate(node)
+        self.assertEqual(baseline.count('"target-cpu"="x86-64"'), 2)
+
+        # Binaries for different targets are cached separately
+        binaries = cache.Cache(os.path.join(self.directory.name, "cache"))
+        self.assertNotEqual(
+            binaries.key(code, [], sys.executable),
+            binaries.key(baseline, [], sys.executable),
+        )
+
+    def test_detect(self):
+        compiler = make_script(self.directory.name, "probe", PROBE_COMPILER)
+        machine = target.detect(compiler)
+        self.assertEqual(
+            machine,
+            target.Target(
+                "x86_64-unknown-linux-gnu",
+                "e-m:e-i64:64-n8:16:32:64-S128",
+                "skylake",
+                "+avx,+avx2",
+                "generic",
+            ),
+        )
+        self.assertIs(target.resolve("native", compiler=compiler), machine)
+        self.assertEqual(
+            target.resolve("native", "+sse4.2", compiler).features, "+sse4.2"
+        )
+        code = llvm.generate(parse.parse_code("1;"), target=machine)
+        self.assertIn('target triple = "x86_64-unknown-linux-gnu"', code)
+        self.assertIn('target datalayout = "e-m:e-i64:64-n8:16:32:64-S128"', code)
+
+        failing = make_script(self.directory.name, "failing", FAILING_COMPILER)
+        with self.assertRaisesRegex(sandbox.CompileError, "bad input"):
+            target.detect(failing)
+        with self.assertRaisesRegex(sandbox.CompileError, "did not report"):
+            target.detect(make_script(self.directory.name, "silent", "#!/bin/sh\n"))
+
+    def test_triple(self):
+        compiler = make_script(self.directory.name, "cross", TRIPLE_COMPILER)
+        triple = "aarch64-unknown-linux-gnu"
+        datalayout = "e-m:e-i8:8:32-i16:16:32-i64:64-i128:128-n32:64-S128"
+        self.assertEqual(
+            target.resolve(compiler=compiler, triple=triple),
+            target.Target(triple, datalayout, "generic", "+neon", "generic"),
+        )
+        machine = target.resolve("cortex-a72", compiler=compiler, triple=triple)
+        self.assertEqual(
+            machine,
+            target.Target(triple, datalayout, "cortex-a72", "", "cortex-a72"),
+        )
+        code = llvm.generate(parse.parse_code("print(1);"), target=machine)
+        self.assertIn('target triple = "{}"'.format(triple), code)
+        self.assertIn('target datalayout = "{}"'.format(datalayout), code)
+        self.assertEqual(code.count('"target-cpu"="cortex-a72"'), 2)
+        with self.assertRaisesRegex(ValueError, "native CPU cannot"):
+            target.resolve("native", compiler=compiler, triple=triple)
+        failing = make_script(self.directory.name, "failing", FAILING_COMPILER)
+        with self.assertRaisesRegex(sandbox.CompileError, "bad input"):
+            target.resolve("cortex-a72", compiler=failing, triple=triple)
+
+    def test_resolve(self):
+        self.assertIs(target.resolve(), target.BASELINE)
+        self.assertEqual(target.resolve("znver3"), target.explicit("znver3"))
+        self.assertEqual(
+            target.resolve(features="").attribute_pairs(),
+            {
+                "target-cpu": "x86-64",
+                "tune-cpu": "generic",
+            },
+        )
+
+
+class TestSandbox(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.compiler = make_script(self.directory.name, "fake", FAKE_COMPILER)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_run(self):
+        result = sandbox.run("#!/bin/sh\necho hello; exit 3\n", compiler=self.compiler)
+        self.assertEqual(result.stdout, "hello\n")
+        self.assertEqual(result.returncode, 3)
+        self.assertFalse(result.timed_out)
+
+    def test_timeout(self):
+        result = sandbox.run("#!/bin/sh\nsleep 5\n", 0.2, compiler=self.compiler)
+        self.assertTrue(result.timed_out)
+        self.assertLess(result.run_seconds, 5)
+
+    def test_compile_error(self):
+        compiler = make_script(self.directory.name, "failing", FAILING_COMPILER)
+        with self.assertRaises(sandbox.CompileError) as context:
+            sandbox.run("#!/bin/sh\n" * 100_000, compiler=compiler)
+        self.assertEqual(context.exception.returncode, 1)
+        self.assertEqual(context.exception.stderr, "error: bad input\n")
+
+    def test_compile_timeout(self):
+        compiler = make_script(self.directory.name, "hanging", HANGING_COMPILER)
+        start = time.perf_counter()
+        with self.assertRaisesRegex(sandbox.CompileError, "timed out"):
+            sandbox.run("#!/bin/sh\n" * 100_000, compile_timeout=0.5, compiler=compiler)
+        self.assertLess(time.perf_counter() - start, 10)
+
+    def test_compiler_output(self):
+        compiler = make_script(
+            self.directory.name,
+            "noisy",
+            "#!/bin/sh\ncat > /dev/null\necho 'note: noisy'\nexit 1\n",
+        )
+        with self.assertRaises(sandbox.CompileError) as context:
+            sandbox.run("", compiler=compiler)
+        self.assertEqual(context.exception.stderr, "note: noisy\n")
+
+    def test_passes(self):
+        opt = make_script(self.directory.name, "opt", FAKE_OPT)
+        result = sandbox.run(
+            "#!/bin/sh\necho hello\n",
+            compiler=self.compiler,
+            passes="mem2reg,instcombine",
+            opt=opt,
+        )
+        self.assertEqual(result.stdout, "hello\n-S -passes=mem2reg,instcombine\n")
+        failing = make_script(self.directory.name, "failing", FAILING_COMPILER)
+        with self.assertRaisesRegex(sandbox.CompileError, "bad input"):
+            sandbox.run("", compiler=self.compiler, passes="mem2reg", opt=failing)
+
+    def test_concurrent_runs(self):
+        programs = ["#!/bin/sh\necho {}\n".format(i) for i in range(16)]
+        with concurrent.futures.ThreadPoolExecutor(8) as executor:
+            results = executor.map(
+                lambda program: sandbox.run(program, compiler=self.compiler).stdout,
+                programs,
+            )
+        self.assertListEqual(list(results), ["{}\n".format(i) for i in range(16)])
+
+
+class TestCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.log = os.path.join(self.directory.name, "log")
+        # Records each compile, so tests can check whether the compiler ran
+        script = FAKE_COMPILER.replace(
+            "#!/bin/sh\n", "#!/bin/sh\necho >> {}\n".format(self.log)
+        )
+        self.compiler = make_script(self.directory.name, "fake", script)
+        self.cache = cache.Cache(os.path.join(self.directory.name, "cache"))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def run_program(self, program: str, flags: list[str] = []) -> str:
+        return sandbox.run(
+            program, flags=flags, compiler=self.compiler, cache=self.cache
+        ).stdout
+
+    def compile_count(self) -> int:
+        if not os.path.exists(self.log):
+            return 0
+        with open(self.log) as file:
+            return len(file.readlines())
+
+    def test_hit(self):
+        for _ in range(3):
+            self.assertEqual(self.run_program("#!/bin/sh\necho 1\n"), "1\n")
+        self.run_program("#!/bin/sh\necho 1\n", ["-O2"])
+        self.assertEqual(self.compile_count(), 2)
+        stats = self.cache.stats()
+        self.assertEqual((stats.hits, stats.misses, stats.entries), (2, 2, 2))
+
+    def test_passes_in_key(self):
+        opt = make_script(self.directory.name, "opt", FAKE_OPT)
+        for passes in [None, "mem2reg", "mem2reg", "instcombine"]:
+            sandbox.run(
+                "#!/bin/sh\n",
+                compiler=self.compiler,
+                cache=self.cache,
+                passes=passes,
+                opt=opt,
+            )
+        self.assertEqual(self.compile_count(), 3)
+        # Replacing opt, as an upgrade would, invalidates what the old one built
+        os.remove(opt)
+        make_script(self.directory.name, "opt", FAKE_OPT + "# upgraded\n")
+        sandbox.run(
+            "#!/bin/sh\n",
+            compiler=self.compiler,
+            cache=self.cache,
+            passes="mem2reg",
+            opt=opt,
+        )
+        self.assertEqual(self.compile_count(), 4)
+
+    def test_evict_least_recently_used(self):
+        programs = ["#!/bin/sh\necho {}\n".format(i) for i in range(3)]
+        self.run_program(programs[0])
+        self.run_program(programs[1])
+        key = self.cache.key(programs[0], [], self.compiler)
+        os.utime(self.cache.path(key), (0, 0))
+        self.cache.max_bytes = self.cache.stats().size
+        self.run_program(programs[2])
+        self.assertEqual(self.cache.stats().entries, 2)
+        self.run_program(programs[1])
+        self.run_program(programs[2])
+        self.assertEqual(self.compile_count(), 3)
+
 
 if __name__ == "__main__":
     unittest.main()
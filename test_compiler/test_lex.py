@@ -1,5 +1,7 @@
+import io
 import unittest
-from compiler.lex import lex, token_types
+from compiler.lex import lex, stream, token_types
+from compiler.parse import parse
 
 
 class TestLex(unittest.TestCase):
@@ -31,6 +33,85 @@ class TestLex(unittest.TestCase):
             ],
         )
 
+    def test_float_tokens(self):
+        test_case = "1.5 .25 3. 4"
+        result = lex.lex(test_case)
+        self.assertListEqual(
+            list(result),
+            [
+                token_types.Float(1.5),
+                token_types.Float(0.25),
+                token_types.Float(3.0),
+                token_types.Integer(4),
+            ],
+        )
+
+    def test_extract_token(self):
+        tok, position = token_types.extract_token("  12 + 3", 0)
+        self.assertEqual(tok, token_types.Integer(12))
+        self.assertEqual(position, 4)
+        tok, position = token_types.extract_token("  12 + 3", position)
+        self.assertEqual(tok, token_types.Plus())
+        self.assertEqual(position, 6)
+
+    def test_positions(self):
+        tokens = lex.lex("1 +\n  foo;")
+        self.assertEqual((tokens.start(2), tokens.end(2)), (6, 9))
+        self.assertEqual(tokens.line_column(tokens.start(2)), (2, 3))
+        tokens.popleft()
+        self.assertEqual(tokens.span(-1), (0, 1))
+
+    def test_literal_tokens_are_shared(self):
+        self.assertIs(token_types.Plus(), token_types.Plus())
+        self.assertIs(token_types.For(), token_types.For())
+        self.assertEqual(token_types.Plus().type, "Plus")
+        self.assertFalse(hasattr(token_types.Integer(1), "__dict__"))
+
+
+class TestTokenBuffer(unittest.TestCase):
+    def test_matches_lex(self):
+        program = "print(12.5 + x * 4294967296); for foreach(2, x);"
+        self.assertListEqual(list(lex.lex_buffer(program)), list(lex.lex(program)))
+
+    def test_parse(self):
+        program = "myFunc(2, 3);\n1 + 2 * 3;"
+        tokens = lex.lex_buffer(program)
+        node = parse.parse(tokens)
+        self.assertEqual(node, parse.parse_code(program))
+        self.assertEqual((node.statements[1].start, node.statements[1].end), (14, 24))
+        self.assertEqual(len(tokens), 0)
+
+    def test_positions(self):
+        tokens = lex.lex_buffer("1 +\n  foo;")
+        self.assertEqual((tokens.start(2), tokens.end(2)), (6, 9))
+        self.assertEqual(tokens.line_column(tokens.start(2)), (2, 3))
+
+
+class TestTokenStream(unittest.TestCase):
+    def test_matches_lex(self):
+        program = "print(12.5 + 345 * foreach); for(1, 2);\n  while 67;"
+        expected = list(lex.lex(program))
+        for chunk_size in [1, 2, 3, 7, 100]:
+            tokens = stream.TokenStream(io.StringIO(program), chunk_size)
+            self.assertListEqual(list(tokens), expected, chunk_size)
+
+    def test_chunk_iterable(self):
+        tokens = stream.TokenStream(["fo", "", "r 1", "23 ", "+"])
+        self.assertEqual(tokens[1], token_types.Integer(123))
+        self.assertEqual(tokens.popleft(), token_types.For())
+        self.assertListEqual(
+            list(tokens), [token_types.Integer(123), token_types.Plus()]
+        )
+        self.assertFalse(tokens)
+        self.assertRaises(IndexError, tokens.popleft)
+
+    def test_positions(self):
+        tokens = stream.TokenStream(io.StringIO("1 +\n  foo;"), 2)
+        self.assertEqual((tokens.start(2), tokens.end(2)), (6, 9))
+        tokens.popleft()
+        self.assertEqual(tokens.end(-1), 1)
+        self.assertEqual(tokens.line_column(tokens.start(1)), (2, 3))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+from compiler.lex import token_types
+from compiler.parse import expression, parse, statement
+from compiler.optimize import fold
+from compiler.generate import llvm, python_visitor
+
+
+def fold_expression(code: str) -> tuple[expression.Expression, int]:
+    tree, removed = fold.fold(parse.parse_code(code + ";"))
+    return tree.statements[0].expression, removed
+
+
+class TestFold(unittest.TestCase):
+    def test_constants(self):
+        tree, removed = fold.fold(parse.parse_code("1 + 2 * 3; 10 / 3 - 4;"))
+        self.assertEqual(
+            tree,
+            statement.Statements(
+                statement.Statement(expression.IntegerNode(7)),
+                statement.Statement(expression.IntegerNode(-1)),
+            ),
+        )
+        self.assertEqual(removed, 8)
+
+    def test_int32_semantics(self):
+        self.assertEqual(fold_expression("2147483647 + 1")[0].value, -(2**31))
+        # Division is unsigned, like the udiv generated by the llvm backend
+        self.assertEqual(fold_expression("0 - 2 / 2")[0].value, -1)
+        node = expression.Divide(expression.IntegerNode(-2), expression.IntegerNode(2))
+        self.assertEqual(fold.fold(node), (expression.IntegerNode(2**31 - 1), 2))
+
+    def test_division_by_zero(self):
+        node, removed = fold_expression("1 / 0 * 0")
+        self.assertEqual(
+            node,
+            expression.Multiply(
+                expression.Divide(expression.IntegerNode(1), expression.IntegerNode(0)),
+                expression.IntegerNode(0),
+            ),
+        )
+        self.assertEqual(removed, 0)
+
+    def test_identities(self):
+        call = expression.Call(token_types.Id("f"), expression.IntegerNode(2))
+        for code in ["f(2) + 0", "0 + f(2)", "f(2) - 0", "f(2) * 1", "1 * f(2)"]:
+            self.assertEqual(fold_expression(code), (call, 2))
+        self.assertEqual(fold_expression("f(2) / 1 * 1 + 3 * 0"), (call, 8))
+
+    def test_identifiers(self):
+        # Trees with identifiers are left to PythonVisitor and NumpyVisitor, which do not wrap to 32 bits
+        tree = parse.parse_code(
+            "print(65536 * 65536 * x); x * 0 + 2 * 3; print(2147483647 + 1); x * 1 + 0;"
+        )
+        folded, removed = fold.fold(tree)
+        self.assertEqual((folded, removed), (tree, 0))
+        bindings = {"x": 3}
+        self.assertListEqual(
+            python_visitor.PythonVisitor(bindings).visit(folded).results,
+            [3 * 2**32, 6, 2**31, 3],
+        )
+        with self.assertRaisesRegex(ValueError, "Identifiers are not supported"):
+            llvm.generate(fold.fold(parse.parse_code("x * 0;"))[0])
+
+    def test_multiply_by_zero_keeps_calls(self):
+        node, removed = fold_expression("print(2) * 0")
+        self.assertIsInstance(node, expression.Multiply)
+        self.assertEqual(removed, 0)
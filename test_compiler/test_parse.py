@@ -1,7 +1,8 @@
+import io
 import unittest
 from compiler.parse import expression
 from compiler.lex import lex, token_types
-from compiler.parse import parse, expression, statement
+from compiler.parse import parse, expression, node, pool, statement, visitor
 
 
 class TestParse(unittest.TestCase):
@@ -31,6 +32,153 @@ class TestParse(unittest.TestCase):
             ),
         )
 
+    def test_precedence_parse(self):
+        node = parse.parse_code("1 - 2 - 3 * 4 / 5 + 6;")
+        self.assertEqual(
+            node.statements[0].expression,
+            expression.Add(
+                expression.Subtract(
+                    expression.Subtract(
+                        expression.IntegerNode(1), expression.IntegerNode(2)
+                    ),
+                    expression.Divide(
+                        expression.Multiply(
+                            expression.IntegerNode(3), expression.IntegerNode(4)
+                        ),
+                        expression.IntegerNode(5),
+                    ),
+                ),
+                expression.IntegerNode(6),
+            ),
+        )
+
+    def test_nested_call_parse(self):
+        node = parse.parse_code("f(1, 2 * g(3), h(),) + 4;")
+        self.assertEqual(
+            node.statements[0].expression,
+            expression.Add(
+                expression.Call(
+                    token_types.Id("f"),
+                    expression.IntegerNode(1),
+                    expression.Multiply(
+                        expression.IntegerNode(2),
+                        expression.Call(token_types.Id("g"), expression.IntegerNode(3)),
+                    ),
+                    expression.Call(token_types.Id("h")),
+                ),
+                expression.IntegerNode(4),
+            ),
+        )
+
+    def test_parse_stream(self):
+        code = "myFunc(2, 3); 1 + 2 * 3;\n4 / 5;"
+        statements = parse.parse_stream(io.StringIO(code), chunk_size=4)
+        self.assertEqual(statement.Statements(*statements), parse.parse_code(code))
+
+    def test_positions(self):
+        node = parse.parse_code("1 + 2;\n  print(3 * 4) ;")
+        first, second = node.statements
+        self.assertEqual((first.start, first.end), (0, 6))
+        self.assertEqual((first.expression.start, first.expression.end), (0, 5))
+        self.assertEqual(
+            (first.expression.right.start, first.expression.right.end), (4, 5)
+        )
+        self.assertEqual((second.start, second.end), (9, 23))
+        call = second.expression
+        self.assertEqual((call.start, call.end), (9, 21))
+        self.assertEqual((call.arguments[0].start, call.arguments[0].end), (15, 20))
+
+    def test_identifier(self):
+        node = parse.parse_code("x * 2 + f(y);").statements[0].expression
+        self.assertEqual(
+            node,
+            expression.Add(
+                expression.Multiply(expression.IdNode("x"), expression.IntegerNode(2)),
+                expression.Call(token_types.Id("f"), expression.IdNode("y")),
+            ),
+        )
+        self.assertIsInstance(node.left.left, expression.IdNode)
+        self.assertEqual((node.left.left.start, node.left.left.end), (0, 1))
+
+    def test_error_location(self):
+        with self.assertRaisesRegex(ValueError, "line 2, column 7 .* Semicolon"):
+            parse.parse_code("1 + 2;\n3 + 4 5;")
+        with self.assertRaisesRegex(ValueError, "end of input at line 1, column 6"):
+            parse.parse_code("1 + 2")
+
+
+class TestNodePool(unittest.TestCase):
+    def test_round_trip(self):
+        code = "print(1 + 2 * 3);\n f(); 99999999999999999999 - 4 / 2; g(1, 2, h(x));"
+        node = parse.parse_code(code)
+        node_pool = pool.from_node(node)
+        self.assertEqual(len(node_pool), 22)
+        self.assertIsInstance(
+            node_pool.to_node().statements[3].expression.arguments[2].arguments[0],
+            expression.IdNode,
+        )
+        result = node_pool.to_node()
+        self.assertEqual(result, node)
+        self.assertEqual(
+            (result.statements[1].start, result.statements[1].end), (19, 23)
+        )
+
+    def test_post_order(self):
+        node_pool = pool.from_node(parse.parse_code("1 + 2; f(3);"))
+        self.assertListEqual(list(node_pool.post_order()), list(range(len(node_pool))))
+        self.assertEqual(node_pool.children(2), (0, 1))
+
+
+class HookRecorder(visitor.Visitor):
+    def __init__(self) -> None:
+        self.hooks = []
+
+    def visit_node(self, _) -> None:
+        self.hooks.append("node")
+
+    def visit_expression(self, _) -> None:
+        self.hooks.append("expression")
+
+    def visit_terminal_node(self, _) -> None:
+        self.hooks.append("terminal_node")
+
+    def visit_integer_node(self, _) -> None:
+        self.hooks.append("integer_node")
+
+    def visit_add(self, _) -> None:
+        self.hooks.append("add")
+
+
+class Custom(node.Node):
+    def accept(self, visitor) -> None:
+        super().accept(visitor)
+        visitor.hooks.append("custom")
+
+
+class TestVisitor(unittest.TestCase):
+    def test_hook_order_matches_accept(self):
+        for tree in [
+            expression.IntegerNode(1),
+            expression.Add(expression.IntegerNode(1), expression.IntegerNode(2)),
+        ]:
+            accepted = HookRecorder()
+            tree.accept(accepted)
+            self.assertEqual(HookRecorder().visit(tree).hooks, accepted.hooks)
+
+    def test_skips_default_hooks(self):
+        self.assertEqual(
+            HookRecorder.handlers(expression.Multiply),
+            (
+                HookRecorder.visit_node,
+                HookRecorder.visit_expression,
+                visitor.Visitor.visit_binary_operation,
+            ),
+        )
+        self.assertEqual(visitor.PostOrderVisitor.handlers(expression.Add), ())
+
+    def test_unconventional_node(self):
+        self.assertEqual(HookRecorder().visit(Custom()).hooks, ["node", "custom"])
+
 
 if __name__ == "__main__":
     unittest.main()
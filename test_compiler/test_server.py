@@ -0,0 +1,264 @@
+import contextlib
+import io
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from compiler import client, server
+from compiler.generate import llvm
+from compiler.optimize import fold
+from compiler.parse import parse
+from test_compiler import test_generate
+
+
+def setUpModule():
+    test_generate.isolate_cache()
+
+
+class TestServer(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "server.sock")
+        self.server = server.Server(self.path, jobs=1)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.thread.join()
+        self.server.server_close()
+        self.directory.cleanup()
+
+    def write(self, name: str, program: str) -> str:
+        path = os.path.join(self.directory.name, name)
+        with open(path, "w") as file:
+            file.write(program)
+        return path
+
+    def test_compile(self):
+        program = "print(1 + 2);\nprint(3 * 4);\n"
+        with client.Client(self.path) as connection:
+            self.assertEqual(connection.ping(), os.getpid())
+            response = connection.compile(program, file_name="a.c", ssa=True)
+            self.assertEqual(
+                response["llvm"],
+                llvm.generate(parse.parse_code(program), "a.c", ssa=True),
+            )
+            self.assertEqual(response["parsed"], 2)
+            # The server keeps the statements of the last build of a.c
+            program = "print(1 + 2);\nprint(5);\n"
+            response = connection.compile(program, file_name="a.c", ssa=True)
+            self.assertEqual(
+                response["llvm"],
+                llvm.generate(parse.parse_code(program), "a.c", ssa=True),
+            )
+            self.assertEqual(response["parsed"], 1)
+            self.assertEqual(
+                connection.compile(program, file_name="b.c", ssa=True)["parsed"], 2
+            )
+
+    def test_builder_eviction(self):
+        self.server.max_builders = 2
+        program = "print(1);\n"
+        with client.Client(self.path) as connection:
+            for name in ["a.c", "b.c", "a.c", "c.c"]:
+                connection.compile(program, file_name=name)
+            self.assertListEqual(
+                [key[0] for key in self.server.builders], ["a.c", "c.c"]
+            )
+            # a.c was used more recently than b.c, so it is kept and reused
+            self.assertEqual(connection.compile(program, file_name="a.c")["parsed"], 0)
+            self.assertEqual(connection.compile(program, file_name="b.c")["parsed"], 1)
+        self.assertEqual(len(self.server.builders), 2)
+
+    def test_errors(self):
+        with client.Client(self.path) as connection:
+            with self.assertRaisesRegex(ValueError, "Unexpected token"):
+                connection.compile("1 +;")
+            with self.assertRaisesRegex(ValueError, "Optimization level"):
+                connection.compile("1;", optimization=7)
+            with self.assertRaisesRegex(ValueError, "Unknown command"):
+                connection.request({"command": "link"})
+            with self.assertRaisesRegex(ValueError, "Malformed request"):
+                connection.request({"command": "compile"})
+            # The connection is still usable after errors
+            self.assertEqual(connection.ping(), os.getpid())
+
+    def test_unexpected_error(self):
+        failing = mock.Mock(side_effect=IndexError("oops"))
+        with mock.patch.dict(self.server.commands, {"compile": failing}):
+            with client.Client(self.path) as connection:
+                with contextlib.redirect_stderr(io.StringIO()) as stderr:
+                    with self.assertRaisesRegex(ValueError, "^IndexError: oops$"):
+                        connection.compile("1;")
+                # The connection survives the error
+                self.assertEqual(connection.ping(), os.getpid())
+        self.assertIn("Traceback", stderr.getvalue())
+
+    def test_lost_connection(self):
+        source = self.write("a.c", "print(1);\n")
+        path = os.path.join(self.directory.name, "broken.sock")
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        listener.bind(path)
+        listener.listen()
+
+        def drop() -> None:
+            connection, _ = listener.accept()
+            connection.close()
+
+        thread = threading.Thread(target=drop)
+        thread.start()
+        stdout = io.StringIO()
+        stderr = io.StringIO()
+        try:
+            with mock.patch.dict(os.environ, {client.SOCKET_VARIABLE: path}):
+                with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(
+                    stderr
+                ):
+                    self.assertEqual(client.main([source]), 1)
+        finally:
+            thread.join()
+            listener.close()
+        # A server which fails partway is an error, not a reason to compile here instead
+        self.assertIn("The compile server failed", stderr.getvalue())
+        self.assertEqual(stdout.getvalue(), "")
+        self.assertFalse(os.path.exists(source[: -len(".c")] + ".ll"))
+
+    def test_relative_paths(self):
+        with client.Client(self.path) as connection:
+            with self.assertRaisesRegex(ValueError, "binary must be an absolute path"):
+                connection.compile("1;", binary="a.out")
+            with self.assertRaisesRegex(ValueError, "compiler must be an absolute"):
+                connection.compile("1;", compiler="bin/clang")
+            with self.assertRaisesRegex(ValueError, "opt must be an absolute"):
+                connection.execute("1;", opt="./opt", passes="mem2reg")
+
+        # The client resolves paths against its own working directory before sending them
+        self.write("a.c", "print(1);\n")
+        test_generate.make_script(
+            self.directory.name, "fake", test_generate.FAKE_COMPILER
+        )
+        stdout = io.StringIO()
+        with mock.patch.dict(os.environ, {client.SOCKET_VARIABLE: self.path}):
+            with contextlib.chdir(self.directory.name), contextlib.redirect_stdout(
+                stdout
+            ):
+                self.assertEqual(
+                    client.main(["a.c", "--binary", "--compiler", "./fake"]), 0
+                )
+        self.assertIn("Compiled 1 files", stdout.getvalue())
+        self.assertTrue(os.path.exists(os.path.join(self.directory.name, "a.out")))
+        self.assertEqual(client.resolve_program("clang"), "clang")
+
+    def test_concurrent(self):
+        programs = ["print({} * {});".format(index, index + 1) for index in range(8)]
+        responses = [None] * len(programs)
+
+        def compile(index: int) -> None:
+            with client.Client(self.path) as connection:
+                responses[index] = connection.compile(programs[index])["llvm"]
+
+        threads = [
+            threading.Thread(target=compile, args=(index,))
+            for index in range(len(programs))
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertListEqual(
+            responses,
+            [llvm.generate(parse.parse_code(program)) for program in programs],
+        )
+
+    def test_main(self):
+        source = self.write("a.c", "print(1 + 2);\n")
+        stdout = io.StringIO()
+        stderr = io.StringIO()
+        with mock.patch.dict(os.environ, {client.SOCKET_VARIABLE: self.path}):
+            with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+                self.assertEqual(client.main([source]), 0)
+                self.assertEqual(client.main([source, source + ".h"]), 2)
+        self.assertIn("a.c -> ", stdout.getvalue())
+        self.assertIn("No files match", stderr.getvalue())
+        with open(source[: -len(".c")] + ".ll") as file:
+            self.assertEqual(
+                file.read(),
+                llvm.generate(
+                    fold.fold(parse.parse_code("print(3);"))[0], "a.c", ssa=True
+                ),
+            )
+
+    def test_shared_pool(self):
+        sources = [self.write("{}.c".format(name), "print(7);\n") for name in "abc"]
+        path = os.path.join(self.directory.name, "pool.sock")
+        with server.Server(path, jobs=2) as pooled:
+            self.assertIsNotNone(pooled.executor)
+            thread = threading.Thread(target=pooled.serve_forever)
+            thread.start()
+            try:
+                stdout = io.StringIO()
+                with mock.patch.dict(os.environ, {client.SOCKET_VARIABLE: path}):
+                    with contextlib.redirect_stdout(stdout):
+                        for _ in range(2):
+                            self.assertEqual(client.main(sources), 0)
+            finally:
+                pooled.shutdown()
+                thread.join()
+        self.assertEqual(stdout.getvalue().count("Compiled 3 files"), 2)
+        for source in sources:
+            self.assertTrue(os.path.exists(source[: -len(".c")] + ".ll"))
+
+    def test_default_socket(self):
+        environment = {
+            name: value
+            for name, value in os.environ.items()
+            if name not in (client.SOCKET_VARIABLE, client.RUNTIME_VARIABLE)
+        }
+        with mock.patch.dict(os.environ, environment, clear=True), mock.patch(
+            "tempfile.gettempdir", return_value=self.directory.name
+        ):
+            path = client.default_socket()
+            directory = os.path.dirname(path)
+            self.assertEqual(os.path.dirname(directory), self.directory.name)
+            self.assertEqual(os.stat(directory).st_mode & 0o777, 0o700)
+            self.assertEqual(client.default_socket(), path)
+            # Anyone could have created a directory which is open to others
+            os.chmod(directory, 0o777)
+            with self.assertRaises(PermissionError):
+                client.default_socket()
+            os.environ[client.RUNTIME_VARIABLE] = "/run/user/1000"
+            self.assertEqual(client.default_socket(), "/run/user/1000/ecco.sock")
+
+    def test_fallback(self):
+        source = self.write("a.c", "print(1);\n")
+        missing = os.path.join(self.directory.name, "missing.sock")
+        stdout = io.StringIO()
+        with mock.patch.dict(os.environ, {client.SOCKET_VARIABLE: missing}):
+            with contextlib.redirect_stdout(stdout):
+                self.assertEqual(client.main([source]), 0)
+        self.assertIn("Compiled 1 files", stdout.getvalue())
+
+    def test_already_listening(self):
+        with self.assertRaisesRegex(ValueError, "already listening"):
+            server.Server(self.path, jobs=1)
+
+    def test_shutdown(self):
+        with client.Client(self.path) as connection:
+            connection.shutdown()
+        self.thread.join(10)
+        self.assertFalse(self.thread.is_alive())
+
+    @unittest.skipUnless(shutil.which("clang"), "clang is not installed")
+    def test_execute(self):
+        with client.Client(self.path) as connection:
+            response = connection.execute("print(6 * 7);")
+        self.assertEqual(response["stdout"].strip(), "42")
+        self.assertEqual(response["returncode"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+import contextlib
+import dataclasses
+import io
+import os
+import tempfile
+import unittest
+from benchmark import regression, workload
+from compiler.generate import bytecode, python_codegen, python_visitor
+from compiler.parse import parse, visitor
+
+
+class DepthVisitor(visitor.PostOrderVisitor):
+    """Finds the greatest nesting depth of operations and calls in a statement."""
+
+    def __init__(self):
+        self.depths = []
+
+    def visit_integer_node(self, node):
+        self.depths.append(1)
+
+    def visit_binary_operation(self, node):
+        right, left = self.depths.pop(), self.depths.pop()
+        self.depths.append(max(left, right) + 1)
+
+    def visit_call(self, node):
+        arguments = [self.depths.pop() for _ in node.arguments]
+        self.depths.append(max(arguments, default=0) + 1)
+
+
+class TestWorkload(unittest.TestCase):
+    def test_seeded(self):
+        shape = workload.Shape(statements=20, call_density=0.3)
+        self.assertEqual(workload.generate(shape), workload.generate(shape))
+        self.assertNotEqual(
+            workload.generate(shape),
+            workload.generate(dataclasses.replace(shape, seed=1)),
+        )
+
+    def test_valid(self):
+        for seed in range(10):
+            shape = workload.Shape(statements=30, depth=6, call_density=0.3, seed=seed)
+            tree = parse.parse_code(workload.generate(shape))
+            self.assertEqual(len(tree.statements), 30)
+            expected = python_visitor.PythonVisitor().visit(tree).results
+            self.assertListEqual(bytecode.evaluate(tree), expected)
+            self.assertListEqual(python_codegen.evaluate(tree), expected)
+
+    def test_shape(self):
+        shape = workload.Shape(
+            statements=50,
+            depth=3,
+            operators=(0, 0, 1, 0),
+            call_density=0,
+            print_density=0,
+        )
+        program = workload.generate(shape)
+        self.assertNotRegex(program, r"[-+/(]")
+        self.assertIn("*", program)
+        shape = dataclasses.replace(shape, call_density=1, print_density=1)
+        program = workload.generate(shape)
+        self.assertTrue(all(line.startswith("print(") for line in program.splitlines()))
+        self.assertNotIn("*", program)
+
+    def test_depth(self):
+        shape = workload.Shape(
+            statements=100, depth=5, leaf_chance=0, call_density=0.5, print_density=0
+        )
+        depths = DepthVisitor()
+        depths.visit_all(*parse.parse_code(workload.generate(shape)).statements)
+        self.assertEqual(len(depths.depths), 100)
+        self.assertEqual(max(depths.depths), 5)
+
+
+class TestRegression(unittest.TestCase):
+    def test_measure(self):
+        results = regression.measure([5, 10], repeat=1)
+        self.assertSetEqual(set(results), {stage.name for stage in regression.STAGES})
+        for timings in results.values():
+            self.assertListEqual(list(timings), ["5", "10"])
+
+    def test_compare(self):
+        baseline = {"lex": {"100": 0.010, "1000": 0.100}, "parse": {"100": 0.010}}
+        results = {
+            "lex": {"100": 0.012, "1000": 0.200},
+            "parse": {"100": 0.020, "1000": 0.500},
+            "fold": {"100": 1.0},
+        }
+        self.assertListEqual(
+            regression.compare(results, baseline, threshold=0.25),
+            [
+                regression.Regression("lex", 1000, 0.100, 0.200),
+                regression.Regression("parse", 100, 0.010, 0.020),
+            ],
+        )
+        self.assertListEqual(regression.compare(results, baseline, threshold=1.5), [])
+        self.assertListEqual(
+            regression.compare(results, baseline, threshold=0.25, min_seconds=0.3), []
+        )
+
+    def test_baseline_mismatch(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "baseline.json")
+            arguments = ["--sizes", "5", "--repeat", "1", "--retries", "0"]
+            with contextlib.redirect_stdout(io.StringIO()):
+                self.assertEqual(regression.main([*arguments, "--output", path]), 0)
+            stderr = io.StringIO()
+            with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(
+                stderr
+            ):
+                self.assertEqual(
+                    regression.main([*arguments, "--seed", "1", "--baseline", path]),
+                    2,
+                )
+            self.assertIn("--seed 0 --repeat 1", stderr.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()